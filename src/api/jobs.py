@@ -0,0 +1,186 @@
+import json
+import time
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from src.extensions import db
+from src.models.enums import JobStatus
+from src.models.jobs import SolveJob, SolveProgress, ACTIVE_STATUSES
+from src.models.schedule import ScheduleEntry, Workload, TimeSlot, StudentGroup
+from src.models.school import Room, Subject, Teacher
+from src.solver.engines import get_engine
+from src.solver.profiles import get_profile
+from src.tasks.jobs import submit_job, cancel_job, control_job, JobConflictError
+from src.tasks.batch import submit_batch
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+
+def job_params_from_request():
+    """Параметры расчета из JSON или формы: profile, decompose, warm, max_changes, portfolio, replay_run, no_cache, two_phase, engine, heuristic_hint, lean, debug_names."""
+    data = request.get_json(silent=True) or request.values
+    params = {}
+    if data.get('profile'): params['profile'] = get_profile(data.get('profile')).name
+    if data.get('decompose'): params['decompose'] = data.get('decompose')
+    if data.get('warm'): params['warm'] = True
+    if data.get('max_changes') not in (None, ''): params['max_changes'] = int(data.get('max_changes'))
+    if data.get('portfolio'): params['portfolio'] = True
+    if data.get('replay_run'): params['replay_run'] = int(data.get('replay_run'))
+    if data.get('no_cache'): params['no_cache'] = True
+    if data.get('engine'): params['engine'] = get_engine(data.get('engine')).engine
+    if data.get('heuristic_hint'): params['heuristic_hint'] = True
+    if data.get('lean'): params['lean'] = True
+    if data.get('debug_names'): params['debug_names'] = True
+    if data.get('two_phase') not in (None, ''):
+        # Явное "0"/false отключает двухфазный режим профиля
+        params['two_phase'] = str(data.get('two_phase')).lower() in ('1', 'true', 'yes', 'on')
+    return params
+
+
+def _positive_int(data, name):
+    """Необязательный параметр запроса — целое больше 0 (число или строка цифр). ValueError — иначе."""
+    value = data.get(name)
+    if value in (None, ''):
+        return None
+    if isinstance(value, int) and not isinstance(value, bool):
+        number = value
+    elif isinstance(value, str) and value.strip().isdigit():
+        number = int(value)
+    else:
+        number = 0
+    if number <= 0:
+        raise ValueError(f"{name}: нужно целое число больше 0, получено {value!r}")
+    return number
+
+
+@jobs_bp.route('', methods=['POST'])
+def submit():
+    """Поставить расчет в очередь. Ответ приходит сразу, расчет идет в воркере."""
+    data = request.get_json(silent=True) or request.values
+    school_id = int(data.get('school_id', 1))
+    try:
+        job = submit_job(school_id, job_params_from_request())
+    except JobConflictError as e:
+        return jsonify({"error": str(e), "job": e.job.to_dict()}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job.to_dict()), 202
+
+
+@jobs_bp.route('/batch', methods=['POST'])
+def submit_batch_route():
+    """
+    Пакетный расчет: {"school_ids": [1, 2, ...] (пусто — все школы), "cpu_budget": 16,
+    "max_parallel": 4, + те же параметры, что у одиночной задачи}.
+    Школы, где расчет уже идет, возвращаются в conflicts.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        jobs, conflicts = submit_batch(data.get('school_ids'), job_params_from_request(),
+                                       cpu_budget=_positive_int(data, 'cpu_budget'),
+                                       max_parallel=_positive_int(data, 'max_parallel'))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"jobs": [j.to_dict() for j in jobs],
+                    "conflicts": [j.to_dict() for j in conflicts]}), 202
+
+
+@jobs_bp.route('/<int:job_id>')
+def job_status(job_id):
+    job = db.get_or_404(SolveJob, job_id)
+    return jsonify(job.to_dict())
+
+
+@jobs_bp.route('/<int:job_id>/cancel', methods=['POST'])
+def cancel(job_id):
+    job = db.get_or_404(SolveJob, job_id)
+    if not cancel_job(job):
+        return jsonify({"error": "Задача уже завершена", "job": job.to_dict()}), 409
+    return jsonify(job.to_dict())
+
+
+@jobs_bp.route('/<int:job_id>/stop', methods=['POST'])
+def stop(job_id):
+    """Досрочная остановка: качество устраивает — сохраняем лучшее найденное."""
+    job = db.get_or_404(SolveJob, job_id)
+    if not control_job(job, 'stop'):
+        return jsonify({"error": "Задача не выполняется", "job": job.to_dict()}), 409
+    return jsonify(job.to_dict()), 202
+
+
+@jobs_bp.route('/<int:job_id>/save-best', methods=['POST'])
+def save_best(job_id):
+    """Сохранить лучшее расписание на текущий момент, расчет продолжается."""
+    job = db.get_or_404(SolveJob, job_id)
+    if not control_job(job, 'save'):
+        return jsonify({"error": "Задача не выполняется", "job": job.to_dict()}), 409
+    return jsonify(job.to_dict()), 202
+
+
+def _progress_after(job_id, last_id):
+    return SolveProgress.query.filter(SolveProgress.job_id == job_id, SolveProgress.id > last_id) \
+        .order_by(SolveProgress.id).all()
+
+
+@jobs_bp.route('/<int:job_id>/progress')
+def progress(job_id):
+    job = db.get_or_404(SolveJob, job_id)
+    return jsonify({"job": job.to_dict(), "points": [p.to_dict() for p in _progress_after(job_id, 0)]})
+
+
+@jobs_bp.route('/<int:job_id>/progress/stream')
+def progress_stream(job_id):
+    """
+    Server-Sent Events: событие "progress" на каждое улучшающее решение,
+    в конце — событие "status" с итоговым состоянием задачи.
+    """
+    db.get_or_404(SolveJob, job_id)
+    interval = float(request.args.get('interval', 1.0))
+
+    @stream_with_context
+    def events():
+        last_id = int(request.headers.get('Last-Event-ID', 0))
+        while True:
+            job = db.session.get(SolveJob, job_id)
+            db.session.refresh(job)
+            finished = job.status not in ACTIVE_STATUSES
+
+            # Статус читаем до точек: последние точки пишутся раньше смены статуса
+            for point in _progress_after(job_id, last_id):
+                last_id = point.id
+                yield f"id: {point.id}\nevent: progress\ndata: {json.dumps(point.to_dict())}\n\n"
+
+            if finished:
+                yield f"event: status\ndata: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n"
+                return
+            db.session.commit()  # закрываем транзакцию, чтобы видеть новые строки
+            time.sleep(interval)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@jobs_bp.route('/<int:job_id>/result')
+def result(job_id):
+    job = db.get_or_404(SolveJob, job_id)
+    if job.status != JobStatus.DONE:
+        return jsonify({"error": "Результата нет", "job": job.to_dict()}), 409
+
+    rows = db.session.query(TimeSlot.day_of_week, TimeSlot.period_number, Subject.name, Teacher.name,
+                            StudentGroup.name, Room.name) \
+        .select_from(ScheduleEntry) \
+        .join(Workload, Workload.id == ScheduleEntry.workload_id) \
+        .join(TimeSlot, TimeSlot.id == ScheduleEntry.timeslot_id) \
+        .join(Subject, Subject.id == Workload.subject_id) \
+        .join(Teacher, Teacher.id == Workload.teacher_id) \
+        .join(StudentGroup, StudentGroup.id == Workload.group_id) \
+        .outerjoin(Room, Room.id == ScheduleEntry.room_id) \
+        .filter(Workload.school_id == job.school_id) \
+        .order_by(TimeSlot.day_of_week, TimeSlot.period_number).all()
+
+    schedule_json = [{"day": d, "period": p, "subject": subj, "teacher": t, "group": g, "room": r}
+                     for d, p, subj, t, g, r in rows]
+    return jsonify({
+        "job": job.to_dict(),
+        "total_lessons": len(schedule_json),
+        "schedule": schedule_json
+    })
@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify, request
+from src.extensions import db
+from src.models.school import School
+from src.solver.quality import ScheduleEvaluator, evaluate_school
+from src.solver.snapshot import ProblemSnapshot
+
+quality_bp = Blueprint('quality', __name__, url_prefix='/quality')
+
+
+@quality_bp.route('/<int:school_id>', methods=['GET', 'POST'])
+def school_quality(school_id):
+    """
+    Оценка расписания школы (см. src/solver/quality.py).
+    GET — текущее расписание; POST {"entries": [[workload_id, slot_id, room_id?], ...]} — переданное.
+    """
+    db.get_or_404(School, school_id)
+    if request.method == 'GET':
+        return jsonify(evaluate_school(school_id))
+
+    entries = (request.get_json(silent=True) or {}).get('entries')
+    if not isinstance(entries, list):
+        return jsonify({"error": "Нужен список entries: [[workload_id, slot_id, room_id?], ...]"}), 400
+    try:
+        entries = [tuple(int(v) if v is not None else None for v in e) for e in entries]
+    except (TypeError, ValueError):
+        return jsonify({"error": "entries: ожидаются целые id"}), 400
+    return jsonify(ScheduleEvaluator(ProblemSnapshot.load(school_id)).evaluate(entries))
@@ -0,0 +1,67 @@
+from flask import Blueprint, jsonify, request
+from src.extensions import db
+from src.models.school import ConstraintRule, School, Subject
+from src.solver.rules import school_rules, validate_rule
+
+rules_bp = Blueprint('rules', __name__, url_prefix='/rules')
+
+
+def _unknown_subjects(school_id, subjects):
+    """Названия, которых нет среди предметов школы (правило на них не действует — не ошибка, а подсказка)."""
+    known = {name for (name,) in db.session.query(Subject.name).filter(Subject.school_id == school_id)}
+    return [s for s in subjects if s not in known]
+
+
+def _save(school_id, rule, data):
+    """Проверка и запись правила из JSON. Ответ — правило + неизвестные предметы, либо 400."""
+    created = rule.id is None
+    fields = {} if created else rule.to_rule()
+    fields.update({k: data[k] for k in ('type', 'subjects', 'max_value', 'preferred_periods', 'bonus') if k in data})
+    try:
+        checked = validate_rule(fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rule.rule_type = checked["type"]
+    rule.subjects = checked["subjects"]
+    rule.max_value = checked.get("max_value")
+    rule.preferred_periods = checked.get("preferred_periods")
+    rule.bonus = checked.get("bonus")
+    if 'enabled' in data:
+        rule.enabled = bool(data['enabled'])
+    db.session.add(rule)
+    db.session.commit()
+    return jsonify({**rule.to_dict(), "unknown_subjects": _unknown_subjects(school_id, rule.subjects)}), \
+        201 if created else 200
+
+
+@rules_bp.route('/<int:school_id>')
+def list_rules(school_id):
+    """Правила школы. source = "default" — своих нет, действуют GLOBAL_CONSTRAINTS."""
+    db.get_or_404(School, school_id)
+    rows = ConstraintRule.query.filter_by(school_id=school_id).order_by(ConstraintRule.id).all()
+    if rows:
+        return jsonify({"source": "school", "rules": [r.to_dict() for r in rows]})
+    defaults = [{**rule, "type": rule["type"].value} for rule in school_rules(school_id)]
+    return jsonify({"source": "default", "rules": defaults})
+
+
+@rules_bp.route('/<int:school_id>', methods=['POST'])
+def create_rule(school_id):
+    """Новое правило: {"type", "subjects", "max_value" | "preferred_periods" + "bonus", "enabled"?}."""
+    db.get_or_404(School, school_id)
+    return _save(school_id, ConstraintRule(school_id=school_id), request.get_json(silent=True) or {})
+
+
+@rules_bp.route('/<int:school_id>/<int:rule_id>', methods=['PUT'])
+def update_rule(school_id, rule_id):
+    rule = ConstraintRule.query.filter_by(id=rule_id, school_id=school_id).first_or_404()
+    return _save(school_id, rule, request.get_json(silent=True) or {})
+
+
+@rules_bp.route('/<int:school_id>/<int:rule_id>', methods=['DELETE'])
+def delete_rule(school_id, rule_id):
+    rule = ConstraintRule.query.filter_by(id=rule_id, school_id=school_id).first_or_404()
+    db.session.delete(rule)
+    db.session.commit()
+    return jsonify({"deleted": rule_id})
@@ -0,0 +1,29 @@
+from flask import Blueprint, jsonify, request
+from src.extensions import db
+from src.models.jobs import SolveJob, SolveRun
+
+runs_bp = Blueprint('runs', __name__, url_prefix='/runs')
+
+
+@runs_bp.route('')
+def list_runs():
+    """Последние запуски решателя (фильтр ?school_id=, ?limit=)."""
+    query = SolveRun.query
+    if request.args.get('school_id'):
+        query = query.filter(SolveRun.school_id == int(request.args['school_id']))
+    limit = min(int(request.args.get('limit', 50)), 500)
+    runs = query.order_by(SolveRun.id.desc()).limit(limit).all()
+    return jsonify([r.to_dict() for r in runs])
+
+
+@runs_bp.route('/<int:run_id>')
+def run_detail(run_id):
+    return jsonify(db.get_or_404(SolveRun, run_id).to_dict())
+
+
+@runs_bp.route('/job/<int:job_id>')
+def job_runs(job_id):
+    """Телеметрия запусков фоновой задачи."""
+    db.get_or_404(SolveJob, job_id)
+    runs = SolveRun.query.filter_by(job_id=job_id).order_by(SolveRun.id).all()
+    return jsonify([r.to_dict() for r in runs])
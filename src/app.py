@@ -1,5 +1,6 @@
 import os
-from flask import Flask, render_template, redirect, url_for, request
+from dataclasses import asdict
+from flask import Flask, render_template, redirect, url_for, request, abort, g
 from werkzeug.utils import secure_filename
 from flask_admin import Admin
 from flask_admin.contrib.sqla import ModelView
@@ -8,12 +9,21 @@ from src.config import Config
 from src.extensions import db, migrate
 from src.commands import register_commands
 from src.api.debug import debug_bp
-
-from src.models.schedule import Workload, TimeSlot, StudentGroup, ScheduleEntry
-from src.models.school import Room, Subject, Teacher, School
-from src.models.enums import SubgroupType
-from src.solver.engine import SchoolScheduler
+from src.api.jobs import jobs_bp, job_params_from_request
+from src.api.quality import quality_bp
+from src.api.rules import rules_bp
+from src.api.runs import runs_bp
+from src.tasks import celery_init_app
+from src.tasks.jobs import submit_job, JobConflictError
+
+from src.models.schedule import Workload, StudentGroup, ScheduleEntry
+from src.models.school import Room, Teacher, School, ConstraintRule
+from src.solver.profiles import PROFILES
+from src.solver.snapshot import load_schedule_hints
+from src.solver.repair import Disruption, REPAIR_MAX_TIME
 from src.utils.importer import import_data_from_file, import_rooms_from_file
+from src.utils.menus import school_menus, invalidate_menus
+from src.utils.schedule_views import load_view, materialize_views
 
 
 # --- АДМИНКА ---
@@ -21,9 +31,60 @@ class WorkloadView(ModelView):
     column_list = ['subject', 'group', 'teacher', 'hours_per_week']
 
 
-class ScheduleEntryView(ModelView):
+class ScheduleViewsMixin:
+    """Правка в админке пересобирает готовые сетки страниц школы (src/utils/schedule_views.py)."""
+
+    def school_of(self, model):
+        return model.school_id
+
+    # Школа запоминается до commit: после удаления объект отсоединен и его поля уже не прочитать
+    def on_model_change(self, form, model, is_created):
+        model._views_school = self.school_of(model)
+
+    def on_model_delete(self, model):
+        model._views_school = self.school_of(model)
+
+    def after_model_change(self, form, model, is_created):
+        self._refresh_views(model)
+
+    def after_model_delete(self, model):
+        self._refresh_views(model)
+
+    def _refresh_views(self, model):
+        school_id = getattr(model, '_views_school', None)
+        if school_id is not None:
+            materialize_views(school_id)
+            db.session.commit()
+
+
+class ScheduleEntryView(ScheduleViewsMixin, ModelView):
     column_list = ['timeslot', 'workload', 'room']
 
+    def school_of(self, model):
+        return model.workload.school_id if model.workload else None
+
+
+class SchoolDataView(ScheduleViewsMixin, ModelView):
+    """Учителя и классы: их имена записаны в готовых сетках и в меню."""
+
+    def _refresh_views(self, model):
+        school_id = getattr(model, '_views_school', None)
+        if school_id is not None:
+            invalidate_menus(school_id)
+        super()._refresh_views(model)
+
+
+class SchoolView(ModelView):
+    column_list = ['name', 'solver_profile']
+    form_choices = {'solver_profile': [(name, name) for name in PROFILES]}
+    form_excluded_columns = ['rules_version', 'menu_version']
+
+
+class ConstraintRuleView(ModelView):
+    # Проверка и сброс кэша правил — в событиях модели (см. src/solver/rules.py)
+    column_list = ['school_id', 'rule_type', 'subjects', 'max_value', 'preferred_periods', 'bonus', 'enabled']
+    form_columns = ['school_id', 'rule_type', 'subjects', 'max_value', 'preferred_periods', 'bonus', 'enabled']
+
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -34,101 +95,28 @@ def create_app(config_class=Config):
     db.init_app(app)
     migrate.init_app(app, db)
     register_commands(app)
+    celery_init_app(app)
+
+    app.register_blueprint(debug_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(runs_bp)
+    app.register_blueprint(quality_bp)
+    app.register_blueprint(rules_bp)
 
     admin = Admin(app, name='School Scheduler', template_mode='bootstrap4')
-    admin.add_view(ModelView(Teacher, db.session, name="Учителя"))
-    admin.add_view(ModelView(StudentGroup, db.session, name="Классы"))
+    admin.add_view(SchoolView(School, db.session, name="Школы"))
+    admin.add_view(SchoolDataView(Teacher, db.session, name="Учителя"))
+    admin.add_view(SchoolDataView(StudentGroup, db.session, name="Классы"))
     admin.add_view(ScheduleEntryView(ScheduleEntry, db.session, name="Сетка"))
+    admin.add_view(ConstraintRuleView(ConstraintRule, db.session, name="Правила"))
 
-    # === ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ===
-    def build_grid(entries):
-        grid = {}
-        subjects = {s.id: s.name for s in Subject.query.all()}
-        teachers = {t.id: t.name for t in Teacher.query.all()}
-        groups = {g.id: g.name for g in StudentGroup.query.all()}
-        rooms = {r.id: r.name for r in Room.query.all()}
-        workloads = {w.id: w for w in Workload.query.all()}
-        slots = {s.id: s for s in TimeSlot.query.all()}
-
-        for entry in entries:
-            w = workloads.get(entry.workload_id)
-            s = slots.get(entry.timeslot_id)
-            r_name = rooms.get(entry.room_id, "?")
-            if not w or not s: continue
-
-            key = (s.day_of_week, s.period_number)
-            if key not in grid: grid[key] = []
-
-            subj_name = subjects.get(w.subject_id, "?")
-            if w.subgroup == SubgroupType.GROUP_1:
-                subj_name += " (Гр. 1)"
-            elif w.subgroup == SubgroupType.GROUP_2:
-                subj_name += " (Гр. 2)"
-
-            grid[key].append({
-                "subject": subj_name,
-                "teacher": teachers.get(w.teacher_id, "?"),
-                "group": groups.get(w.group_id, "?"),
-                "room": r_name
-            })
-        return grid
-
-    # === УМНОЕ МЕНЮ (НАТУРАЛЬНАЯ СОРТИРОВКА) ===
+    # === УМНОЕ МЕНЮ (НАТУРАЛЬНАЯ СОРТИРОВКА, кэш по школам — src/utils/menus.py) ===
     @app.context_processor
     def inject_menus():
         try:
-            # 1. ПОЛУЧАЕМ ДАННЫЕ
-            teachers = Teacher.query.all()
-            groups = StudentGroup.query.all()
-
-            # 2. СОРТИРОВКА УЧИТЕЛЕЙ (1, 2, 10 + Вакансии в конце)
-            def teacher_sort_key(t):
-                name = t.name.strip()
-                lower_name = name.lower()
-
-                # А. ОПРЕДЕЛЯЕМ ПРЕДМЕТ (Группировка)
-                subject = name
-                is_vacancy = 0  # 0 = Учитель (сверху), 1 = Вакансия (снизу)
-
-                if t.is_vacancy or "вакансия" in lower_name:
-                    is_vacancy = 1
-                    if "(" in name and ")" in name:
-                        start = name.find('(') + 1
-                        end = name.find(')')
-                        subject = name[start:end].strip()
-                    else:
-                        subject = name
-                elif "_" in name:
-                    subject = name.split('_')[0].strip()
-
-                # Б. ИЗВЛЕКАЕМ НОМЕР (Для Teach_1, Teach_2, Teach_10)
-                number = 0
-                parts = name.split('_')
-                if len(parts) > 1 and parts[-1].isdigit():
-                    number = int(parts[-1])  # Превращаем "10" в число 10
-
-                # В. КЛЮЧ СОРТИРОВКИ:
-                # 1. Предмет (Английский вместе)
-                # 2. Вакансия? (Люди выше вакансий)
-                # 3. Номер (2 < 10)
-                # 4. Имя (на случай если номеров нет)
-                return (subject.lower(), is_vacancy, number, name)
-
-            teachers.sort(key=teacher_sort_key)
-
-            # 3. СОРТИРОВКА КЛАССОВ (1, 2 ... 10, 11)
-            def group_sort_key(g):
-                try:
-                    parts = g.name.split('-')
-                    if len(parts) >= 2 and parts[0].isdigit():
-                        return (int(parts[0]), parts[1])
-                    if g.name.isdigit(): return (int(g.name), "")
-                    return (999, g.name)
-                except:
-                    return (999, g.name)
-
-            groups.sort(key=group_sort_key)
-
+            # Школа страницы расписания, ?school_id=..., иначе первая
+            school_id = g.get('school_id') or request.args.get('school_id', type=int)
+            teachers, groups = school_menus(school_id)
             return dict(all_teachers=teachers, all_groups=groups)
         except Exception as e:
             print(f"!!! ОШИБКА В МЕНЮ: {e}")
@@ -163,26 +151,32 @@ def create_app(config_class=Config):
     def index():
         return render_template('schedule.html', schedule_grid=None, title="Добро пожаловать")
 
+    # Страницы расписания: готовая сетка — одна строка по индексу (см. src/utils/schedule_views.py)
+    def render_view(kind, owner_id, show_group_name, show_teacher_name):
+        view = load_view(kind, owner_id)
+        if view is None:
+            abort(404)
+        g.school_id, title, grid = view
+        return render_template('schedule.html', schedule_grid=grid, title=f"Расписание: {title}",
+                               show_group_name=show_group_name, show_teacher_name=show_teacher_name)
+
     @app.route('/teacher/<int:teacher_id>')
     def show_teacher_schedule(teacher_id):
-        teacher = Teacher.query.get_or_404(teacher_id)
-        entries = ScheduleEntry.query.join(Workload).filter(Workload.teacher_id == teacher_id).all()
-        grid = build_grid(entries)
-        return render_template('schedule.html', schedule_grid=grid, title=f"Расписание: {teacher.name}",
-                               show_group_name=True, show_teacher_name=False)
+        return render_view('teacher', teacher_id, show_group_name=True, show_teacher_name=False)
 
     @app.route('/group/<int:group_id>')
     def show_group_schedule(group_id):
-        group = StudentGroup.query.get_or_404(group_id)
-        entries = ScheduleEntry.query.join(Workload).filter(Workload.group_id == group_id).all()
-        grid = build_grid(entries)
-        return render_template('schedule.html', schedule_grid=grid, title=f"Расписание: {group.name}",
-                               show_group_name=False, show_teacher_name=True)
+        return render_view('group', group_id, show_group_name=False, show_teacher_name=True)
+
+    @app.route('/room/<int:room_id>')
+    def show_room_schedule(room_id):
+        return render_view('room', room_id, show_group_name=True, show_teacher_name=True)
 
     @app.route('/import', methods=['GET', 'POST'])
     def import_page():
         if request.method == 'POST':
             import_type = request.form.get('import_type')
+            school_id = request.form.get('school_id', type=int)  # по умолчанию — первая школа
             if 'file' not in request.files: return "Нет файла", 400
             file = request.files['file']
             if file.filename == '': return "Файл не выбран", 400
@@ -195,10 +189,10 @@ def create_app(config_class=Config):
                 msg = ""
                 count = 0
                 if import_type == 'rooms':
-                    count = import_rooms_from_file(filepath)
+                    count = import_rooms_from_file(filepath, school_id)
                     msg = f"Инфраструктура: загружено {count} помещений."
                 elif import_type == 'workload':
-                    count = import_data_from_file(filepath)
+                    count = import_data_from_file(filepath, school_id)
                     msg = f"Нагрузка: загружено {count} записей."
 
                 return render_template('import_success.html', message=msg)
@@ -208,17 +202,47 @@ def create_app(config_class=Config):
 
     @app.route('/generate', methods=['POST'])
     def generate_schedule():
-        school_id = 1
-        workloads = Workload.query.filter_by(school_id=school_id).all()
-        slots = TimeSlot.query.filter_by(school_id=school_id).all()
-        rooms = Room.query.filter_by(school_id=school_id).all()
-
-        if not workloads: return "Ошибка: База нагрузки пуста!", 400
-
-        solver = SchoolScheduler(school_id)
-        if solver.run_algorithm(workloads, slots, rooms):
-            return redirect(url_for('index'))
-        else:
-            return "Не удалось составить расписание", 400
+        school_id = request.values.get('school_id', 1, type=int)
+        if not Workload.query.filter_by(school_id=school_id).first():
+            return "Ошибка: База нагрузки пуста!", 400
+
+        # Расчет уходит в фоновую задачу, страница сразу показывает ее статус.
+        # ?profile=draft|standard|deep — профиль решателя (по умолчанию — настройка школы),
+        # ?decompose=shift|teacher|auto — параллельно по частям,
+        # ?warm=1 — теплый старт от текущего расписания, ?max_changes=N — не больше N перестановок
+        try:
+            job = submit_job(school_id, job_params_from_request())
+        except JobConflictError as e:
+            return str(e), 409
+        except ValueError as e:
+            return str(e), 400
+        return redirect(url_for('jobs.job_status', job_id=job.id))
+
+    @app.route('/repair', methods=['POST'])
+    def repair_schedule_route():
+        """
+        Быстрый ремонт текущего расписания (фоновая задача, как /generate). Тело (JSON):
+        {"teacher_unavailable": {"<teacher_id>": [slot_id, ...]},
+         "removed_rooms": [room_id, ...],
+         "hours_changed": {"<workload_id>": hours},
+         "time_limit": 5, "school_id": 1}
+        time_limit — секунды, не больше REPAIR_MAX_TIME.
+        Пока у школы идет расчет — 409: ремонт и расчет не пишут расписание одновременно.
+        """
+        data = request.get_json(silent=True) or {}
+        school_id = int(data.get('school_id', 1))
+        if not load_schedule_hints(school_id): return "Ошибка: нет текущего расписания для ремонта", 400
+        try:
+            repair = {**asdict(Disruption.from_json(data)), 'time_limit': float(data.get('time_limit', 5))}
+        except (TypeError, ValueError, AttributeError) as e:
+            return f"Ошибка в описании сбоя: {e}", 400
+        if not 0 < repair['time_limit'] <= REPAIR_MAX_TIME:
+            return f"Ошибка: time_limit должен быть в пределах (0, {REPAIR_MAX_TIME}] сек", 400
+
+        try:
+            job = submit_job(school_id, {'repair': repair})
+        except JobConflictError as e:
+            return str(e), 409
+        return redirect(url_for('jobs.job_status', job_id=job.id))
 
     return app
\ No newline at end of file
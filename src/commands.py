@@ -4,7 +4,7 @@ from flask.cli import with_appcontext
 from src.extensions import db
 from src.models.school import School, Room, Teacher, Subject
 from src.models.schedule import StudentGroup, TimeSlot, Workload
-from src.models.enums import RoomType, SubgroupType
+from src.models.enums import RoomType, SubgroupType, JobStatus
 
 
 @click.command('init_real_school')
@@ -33,5 +33,63 @@ def init_real_school_command():
     print("✅ БАЗА ГОТОВА. Теперь загружай 'rooms.csv' и 'workload.csv' через /import.")
 
 
+@click.command('solve_batch')
+@click.argument('school_ids', nargs=-1, type=int)
+@click.option('--profile', default=None, help='draft / standard / deep (по умолчанию — настройка школы)')
+@click.option('--decompose', default=None, help='shift / teacher / auto')
+@click.option('--cpu', 'cpu_budget', type=int, default=None, help='Сколько ядер отдать пакету (по умолчанию — все)')
+@click.option('--parallel', 'max_parallel', type=int, default=None, help='Сколько школ считать одновременно')
+@with_appcontext
+def solve_batch_command(school_ids, profile, decompose, cpu_budget, max_parallel):
+    """Пакетный расчет школ (без аргументов — все школы) в пуле процессов."""
+    from src.solver.profiles import get_profile
+    from src.tasks.batch import create_batch, run_batch
+
+    params = {}
+    if profile: params['profile'] = get_profile(profile).name
+    if decompose: params['decompose'] = decompose
+
+    jobs, conflicts, parallel = create_batch(school_ids, params, cpu_budget, max_parallel)
+    for job in conflicts:
+        print(f"⏭ Школа {job.school_id}: уже идет расчет (задача #{job.id}), пропускаем.")
+    if not jobs:
+        return
+    print(f"📦 Пакет: {len(jobs)} школ, одновременно {parallel}, "
+          f"потоков на школу {jobs[0].params['workers']}.")
+    results = run_batch([job.id for job in jobs], parallel)
+    ok = sum(1 for r in results if r['status'] == JobStatus.DONE.value)
+    print(f"✅ Готово: {ok} из {len(results)} школ.")
+
+
+@click.command('evaluate_schedule')
+@click.argument('school_ids', nargs=-1, type=int)
+@click.option('--json', 'as_json', is_flag=True, help='Полный отчет в JSON')
+@with_appcontext
+def evaluate_schedule_command(school_ids, as_json):
+    """Оценка текущего расписания школ (без аргументов — всех школ)."""
+    import json
+    from src.solver.quality import evaluate_school
+
+    for school_id in school_ids or [s.id for s in School.query.order_by(School.id)]:
+        report = evaluate_school(school_id)
+        if as_json:
+            print(json.dumps({"school_id": school_id, **report}, ensure_ascii=False))
+            continue
+        hard, windows = report["hard"], report["windows"]
+        print(f"🏫 Школа {school_id}: уроков {report['lessons']}, objective={report['objective']}")
+        print(f"   {'✅' if not hard['total'] else '🚫'} Жесткие нарушения: {hard['total']} "
+              f"(учителя {hard['teacher_conflicts']}, классы {hard['group_conflicts']}, "
+              f"кабинеты {hard['room_conflicts']}, часы {hard['hours_mismatch']})")
+        print(f"   🪟 Окна: учителей {windows['teacher']} (у {windows['teachers_with_windows']} учителей), "
+              f"классов {windows['group']}")
+        print(f"   📏 Правила: {', '.join(f'{k}={v}' for k, v in report['rules'].items())}")
+        print(f"   ⚖️ Баланс по дням: σ={report['balance']['daily_std']}, разброс {report['balance']['daily_spread']}")
+        rooms = report["rooms"]
+        print(f"   🚪 Кабинеты: без кабинета {rooms['without_room']}, малы {rooms['too_small']}, загрузка "
+              f"{', '.join(f'{k} {v:.0%}' for k, v in rooms['utilisation'].items())}")
+
+
 def register_commands(app):
-    app.cli.add_command(init_real_school_command)
\ No newline at end of file
+    app.cli.add_command(init_real_school_command)
+    app.cli.add_command(solve_batch_command)
+    app.cli.add_command(evaluate_schedule_command)
\ No newline at end of file
@@ -16,4 +16,20 @@ class Config:
     if not SQLALCHEMY_DATABASE_URI:
         raise ValueError("DATABASE_URL не найден в .env файле!")
 
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Кэш моделей и решений по отпечатку задачи (см. src/solver/cache.py); 0 МБ — выключен
+    SOLVER_CACHE_DIR = os.environ.get('SOLVER_CACHE_DIR', str(base_dir / 'cache' / 'solver'))
+    SOLVER_CACHE_MAX_MB = int(os.environ.get('SOLVER_CACHE_MAX_MB', 512))
+
+    # Фоновые расчеты: "celery" — воркер через Redis, "eager" — прямо в процессе (тесты, без Redis)
+    JOB_BACKEND = os.environ.get('JOB_BACKEND', 'celery')
+    CELERY = dict(
+        broker_url=os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0'),
+        result_backend=os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0'),
+        task_ignore_result=True,
+        task_always_eager=JOB_BACKEND == 'eager',
+        # Задачи — в потоках главного процесса воркера: у prefork задачи идут в демонических
+        # процессах, а им нельзя запускать свои (декомпозиция, пакет, портфель)
+        worker_pool='threads',
+    )
@@ -13,4 +13,11 @@ class RoomType(enum.Enum):
     LAB_CHEMISTRY = "chemistry"
     LAB_BIO = "bio"
     GYM = "gym"
-    IT_LAB = "it"
\ No newline at end of file
+    IT_LAB = "it"
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
@@ -0,0 +1,123 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, Enum, Index, text
+from sqlalchemy.orm import Mapped, mapped_column
+from src.extensions import db
+from src.models.enums import JobStatus
+
+# Статусы, при которых задача считается активной (не больше одной на школу)
+ACTIVE_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+_ACTIVE_WHERE = text("status IN ('QUEUED', 'RUNNING')")
+
+
+class SolveJob(db.Model):
+    __tablename__ = 'solve_jobs'
+    __table_args__ = (
+        # Одна активная задача на школу — гарантируется самой базой
+        Index('uq_solve_jobs_active_school', 'school_id', unique=True,
+              postgresql_where=_ACTIVE_WHERE, sqlite_where=_ACTIVE_WHERE),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    school_id: Mapped[int] = mapped_column(ForeignKey('schools.id'), nullable=False)
+    status: Mapped[JobStatus] = mapped_column(Enum(JobStatus), default=JobStatus.QUEUED)
+
+    params: Mapped[dict] = mapped_column(db.JSON, nullable=True)  # decompose / warm / max_changes
+    message: Mapped[str] = mapped_column(nullable=True)
+    task_id: Mapped[str] = mapped_column(nullable=True)           # id задачи Celery
+    control: Mapped[str] = mapped_column(nullable=True)           # команда воркеру: "stop" / "save"
+
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    started_at: Mapped[datetime] = mapped_column(nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(nullable=True)
+    heartbeat_at: Mapped[datetime] = mapped_column(nullable=True)  # воркер жив (см. _JobMonitor)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "school_id": self.school_id,
+            "status": self.status.value,
+            "params": self.params or {},
+            "message": self.message,
+            "control": self.control,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "heartbeat_at": self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+        }
+
+    def __str__(self):
+        return f"Job #{self.id} ({self.status.value})"
+
+
+class SolveProgress(db.Model):
+    """Точка прогресса: одно улучшающее решение CP-SAT."""
+    __tablename__ = 'solve_progress'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    job_id: Mapped[int] = mapped_column(ForeignKey('solve_jobs.id'), index=True)
+
+    objective: Mapped[float] = mapped_column(nullable=False)
+    best_bound: Mapped[float] = mapped_column(nullable=False)
+    gap: Mapped[float] = mapped_column(nullable=False)
+    wall_time: Mapped[float] = mapped_column(nullable=False)
+
+    def to_dict(self):
+        return {"id": self.id, "objective": self.objective, "best_bound": self.best_bound,
+                "gap": self.gap, "wall_time": self.wall_time}
+
+
+class SolveRun(db.Model):
+    """Телеметрия одного вызова run_algorithm (см. src/solver/telemetry.py)."""
+    __tablename__ = 'solve_runs'
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    school_id: Mapped[int] = mapped_column(ForeignKey('schools.id'), index=True)
+    job_id: Mapped[int] = mapped_column(ForeignKey('solve_jobs.id'), nullable=True, index=True)
+
+    profile: Mapped[str] = mapped_column(nullable=True)
+    mode: Mapped[str] = mapped_column(nullable=True)       # "single" или режим декомпозиции
+    success: Mapped[bool] = mapped_column(default=False)
+    status: Mapped[str] = mapped_column(nullable=True)     # статус CP-SAT
+
+    n_workloads: Mapped[int] = mapped_column(nullable=True)
+    n_variables: Mapped[int] = mapped_column(nullable=True)
+    n_constraints: Mapped[int] = mapped_column(nullable=True)
+    conflicts: Mapped[int] = mapped_column(nullable=True)
+    branches: Mapped[int] = mapped_column(nullable=True)
+    objective: Mapped[float] = mapped_column(nullable=True)
+    best_bound: Mapped[float] = mapped_column(nullable=True)
+    gap: Mapped[float] = mapped_column(nullable=True)
+    total_seconds: Mapped[float] = mapped_column(nullable=True)
+    peak_memory_mb: Mapped[float] = mapped_column(nullable=True)
+
+    phases: Mapped[dict] = mapped_column(db.JSON, nullable=True)                 # фаза -> секунды
+    constraints_by_family: Mapped[dict] = mapped_column(db.JSON, nullable=True)  # семейство -> штук
+    stats: Mapped[dict] = mapped_column(db.JSON, nullable=True)                  # остальное (пресолв и т.п.)
+
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "school_id": self.school_id,
+            "job_id": self.job_id,
+            "profile": self.profile,
+            "mode": self.mode,
+            "success": self.success,
+            "status": self.status,
+            "n_workloads": self.n_workloads,
+            "n_variables": self.n_variables,
+            "n_constraints": self.n_constraints,
+            "conflicts": self.conflicts,
+            "branches": self.branches,
+            "objective": self.objective,
+            "best_bound": self.best_bound,
+            "gap": self.gap,
+            "total_seconds": self.total_seconds,
+            "peak_memory_mb": self.peak_memory_mb,
+            "phases": self.phases or {},
+            "constraints_by_family": self.constraints_by_family or {},
+            "stats": self.stats or {},
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, Enum
+from sqlalchemy import ForeignKey, Enum, Index, select
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.extensions import db
 # ИМПОРТ ИЗ НОВОГО ФАЙЛА
@@ -72,4 +72,35 @@ class ScheduleEntry(db.Model):
     room = relationship('Room')
 
     def __str__(self):
-        return f"{self.workload} @ {self.timeslot}"
\ No newline at end of file
+        return f"{self.workload} @ {self.timeslot}"
+
+
+class ScheduleView(db.Model):
+    """
+    Готовая сетка недели одного учителя / класса / кабинета для страниц просмотра.
+    Строится при сохранении расписания (src/utils/schedule_views.py), страница читает одну строку.
+    """
+    __tablename__ = 'schedule_views'
+    __table_args__ = (
+        Index('uq_schedule_views_owner', 'kind', 'owner_id', unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    school_id: Mapped[int] = mapped_column(ForeignKey('schools.id'), index=True)
+    kind: Mapped[str] = mapped_column(nullable=False)    # teacher / group / room
+    owner_id: Mapped[int] = mapped_column(nullable=False)
+    title: Mapped[str] = mapped_column(nullable=False)
+    cells: Mapped[list] = mapped_column(db.JSON, default=list)  # [[день, урок, предмет, учитель, класс, кабинет], ...]
+
+
+def delete_school_schedule(school_id):
+    """
+    Удаляет расписание одной школы (без commit) вместе с готовыми сетками. У ScheduleEntry нет
+    school_id, поэтому школа определяется через нагрузку — чужие расписания не трогаем.
+    """
+    db.session.query(ScheduleView).filter(ScheduleView.school_id == school_id) \
+        .delete(synchronize_session=False)
+    school_workloads = select(Workload.id).where(Workload.school_id == school_id)
+    return db.session.query(ScheduleEntry) \
+        .filter(ScheduleEntry.workload_id.in_(school_workloads)) \
+        .delete(synchronize_session=False)
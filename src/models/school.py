@@ -2,12 +2,16 @@ from sqlalchemy import ForeignKey, Enum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.extensions import db
 from src.models.enums import RoomType
+from src.utils.constraints_config import ConstraintType
 
 
 class School(db.Model):
     __tablename__ = 'schools'
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(nullable=False)
+    solver_profile: Mapped[str] = mapped_column(nullable=True)  # draft / standard / deep (None — по умолчанию)
+    rules_version: Mapped[int] = mapped_column(default=0, server_default='0')  # растет при изменении ConstraintRule
+    menu_version: Mapped[int] = mapped_column(default=0, server_default='0')  # растет при изменении учителей/классов
     teachers = relationship('Teacher', back_populates='school')
     rooms = relationship('Room', back_populates='school')
 
@@ -50,4 +54,32 @@ class Subject(db.Model):
     name: Mapped[str] = mapped_column(nullable=False)
     school_id: Mapped[int] = mapped_column(ForeignKey('schools.id'), nullable=False)
 
-    def __str__(self): return self.name
\ No newline at end of file
+    def __str__(self): return self.name
+
+class ConstraintRule(db.Model):
+    """Правило расписания школы (формат constraints_config.py). Проверка и компиляция — src/solver/rules.py."""
+    __tablename__ = 'constraint_rules'
+    id: Mapped[int] = mapped_column(primary_key=True)
+    school_id: Mapped[int] = mapped_column(ForeignKey('schools.id'), nullable=False, index=True)
+    rule_type: Mapped[ConstraintType] = mapped_column(Enum(ConstraintType), nullable=False)
+    subjects: Mapped[list] = mapped_column(db.JSON, nullable=False)             # названия предметов
+    max_value: Mapped[int] = mapped_column(nullable=True)                       # MAX_PER_DAY / MAX_CONTINUOUS
+    preferred_periods: Mapped[list] = mapped_column(db.JSON, nullable=True)     # PERIOD_PRIORITY
+    bonus: Mapped[int] = mapped_column(nullable=True)                           # PERIOD_PRIORITY
+    enabled: Mapped[bool] = mapped_column(default=True)
+
+    def to_rule(self):
+        """Dict в формате GLOBAL_CONSTRAINTS."""
+        rule = {"type": self.rule_type, "subjects": self.subjects}
+        if self.rule_type == ConstraintType.PERIOD_PRIORITY:
+            rule.update(preferred_periods=self.preferred_periods, bonus=self.bonus)
+        else:
+            rule["max_value"] = self.max_value
+        return rule
+
+    def to_dict(self):
+        return {"id": self.id, "school_id": self.school_id, "type": self.rule_type.value, "subjects": self.subjects,
+                "max_value": self.max_value, "preferred_periods": self.preferred_periods, "bonus": self.bonus,
+                "enabled": self.enabled}
+
+    def __str__(self): return f"{self.rule_type.value}: {', '.join(self.subjects or [])}"
@@ -0,0 +1,79 @@
+"""
+Бенчмарк построения CP-модели (без решения).
+
+Запуск из корня проекта:
+    python -m src.scripts.benchmark_build
+    python -m src.scripts.benchmark_build --classes 30 100 300 --legacy-max 300
+
+Для каждого размера школы генерируется синтетическая нагрузка (в памяти, без БД),
+после чего замеряется:
+  * indexed — снимок + полное построение модели через ConstraintIndex;
+  * legacy  — только старые квадратичные проходы (поиск нагрузки через next()
+              для каждой переменной и пересканирование нагрузок в правилах).
+"""
+import argparse
+import math
+import time
+
+from ortools.sat.python import cp_model
+
+from src.scripts.synthetic import SchoolSpec, generate_school
+from src.solver.engine import SchoolScheduler
+from src.solver.snapshot import ProblemSnapshot
+from src.utils.constraints_config import GLOBAL_CONSTRAINTS, ConstraintType
+
+
+def make_school(n_classes, seed=42):
+    """Синтетическая школа из n_classes классов: (workloads, slots, rooms). См. synthetic.py."""
+    return generate_school(SchoolSpec(parallels=math.ceil(n_classes / 11), classes=n_classes, seed=seed))
+
+
+def legacy_scans(workloads, slots, time_vars):
+    """Старые квадратичные проходы из engine.py до перехода на индексы."""
+    model = cp_model.CpModel()
+    group_ids = list(set(w.group_id for w in workloads))
+
+    for rule in GLOBAL_CONSTRAINTS:
+        if rule["type"] == ConstraintType.MAX_PER_DAY:
+            for gid in group_ids:
+                for subj_name in rule["subjects"]:
+                    for day in range(1, 6):
+                        daily_vars = [time_vars[(w.id, s.id)] for s in slots
+                                      for w in workloads if s.day_of_week == day
+                                      and w.group_id == gid and w.subject.name == subj_name
+                                      and (w.id, s.id) in time_vars]
+                        if daily_vars:
+                            model.Add(sum(daily_vars) <= rule["max_value"])
+
+    group_vars = {}
+    for (wid, sid), var in time_vars.items():
+        w = next(x for x in workloads if x.id == wid)
+        group_vars.setdefault((w.group_id, sid), []).append((w.subgroup, var))
+
+
+def run(sizes, legacy_max):
+    print(f"{'classes':>8} {'workloads':>10} {'vars':>9} {'indexed, s':>11} {'legacy scans, s':>16}")
+    for n in sizes:
+        workloads, slots, rooms = make_school(n)
+
+        scheduler = SchoolScheduler(school_id=0)
+        t0 = time.perf_counter()
+        scheduler.build_model(ProblemSnapshot.from_objects(0, workloads, slots, rooms))
+        indexed = time.perf_counter() - t0
+
+        legacy = "—"
+        if n <= legacy_max:
+            t0 = time.perf_counter()
+            legacy_scans(workloads, slots, scheduler.time_vars)
+            legacy = f"{time.perf_counter() - t0:.2f}"
+
+        print(f"{n:>8} {len(workloads):>10} {len(scheduler.time_vars):>9} {indexed:>11.2f} {legacy:>16}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк построения модели SchoolScheduler")
+    parser.add_argument("--classes", type=int, nargs="+", default=[30, 100, 300])
+    parser.add_argument("--legacy-max", type=int, default=100,
+                        help="Не замерять legacy-проходы для школ крупнее (они квадратичные)")
+    args = parser.parse_args()
+    run(args.classes, args.legacy_max)
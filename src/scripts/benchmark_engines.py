@@ -0,0 +1,86 @@
+"""
+Бенчмарк вариантов модели: булевой (engine.py) и интервальной (intervals.py).
+
+Запуск из корня проекта:
+    python -m src.scripts.benchmark_engines
+    python -m src.scripts.benchmark_engines --classes 11 33 --time 60 --workers 8
+    python -m src.scripts.benchmark_engines --classes 11 --two-phase
+
+Каждый запуск — в отдельном процессе (spawn), чтобы пик RSS относился только к нему.
+Замеряется размер модели (переменные, ограничения), время построения, пик памяти,
+статус и качество. Качество считается одной функцией для обоих вариантов — целью
+булевой модели по итоговой сетке (ScheduleEvaluator, см. src/solver/quality.py),
+поэтому числа сравнимы. Интервальная модель запускается со сдвоенными уроками и без.
+"""
+import argparse
+import multiprocessing
+import time
+
+from src.scripts.benchmark_build import make_school
+from src.solver.engines import get_engine
+from src.solver.progress import ProgressCallback
+from src.solver.quality import ScheduleEvaluator
+from src.solver.snapshot import ProblemSnapshot
+from src.solver.telemetry import peak_memory_mb
+
+VARIANTS = [("bool", True), ("interval", False), ("interval", True)]
+
+
+def solve(n_classes, engine, double_periods, time_limit, workers, two_phase=False):
+    workloads, slots, rooms = make_school(n_classes)
+    snap = ProblemSnapshot.from_objects(0, workloads, slots, rooms)
+    scheduler = get_engine(engine)(school_id=0, profile="standard")
+    scheduler.double_periods = double_periods
+    scheduler.two_phase = two_phase
+    params = scheduler.solver.parameters
+    params.max_time_in_seconds = time_limit
+    params.num_search_workers = workers
+    params.log_search_progress = False
+
+    t0 = time.perf_counter()
+    scheduler.build_model(snap)
+    build = time.perf_counter() - t0
+    proto = scheduler.model.Proto()
+    build_memory = peak_memory_mb()
+
+    scheduler.progress = ProgressCallback(scheduler.time_vars, verbose=False, decode=scheduler.lessons)
+    status = scheduler._solve_with_watchdog()
+    found = scheduler.solver.StatusName(status) in ("OPTIMAL", "FEASIBLE")
+    points = scheduler.progress.points
+    return {
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "build": build,
+        "build_mb": build_memory,
+        "peak_mb": peak_memory_mb(),
+        "status": scheduler.solver.StatusName(status),
+        "first": points[0]["wall_time"] if points else None,
+        "quality": ScheduleEvaluator(snap).evaluate(scheduler.active_lessons())["objective"] if found else None,
+    }
+
+
+def run(sizes, time_limit, workers, two_phase=False):
+    def fmt(value, spec=".1f"):
+        return "—" if value is None else format(value, spec)
+
+    print(f"{'classes':>8} {'engine':>16} {'vars':>8} {'constr':>8} {'build, s':>9} {'build MB':>9} "
+          f"{'peak MB':>8} {'status':>9} {'first, s':>9} {'quality':>10}")
+    ctx = multiprocessing.get_context("spawn")
+    for n in sizes:
+        for engine, double_periods in VARIANTS:
+            name = engine if engine == "bool" else f"{engine}{'+double' if double_periods else ''}"
+            with ctx.Pool(1) as pool:
+                r = pool.apply(solve, (n, engine, double_periods, time_limit, workers, two_phase))
+            print(f"{n:>8} {name:>16} {r['variables']:>8} {r['constraints']:>8} {r['build']:>9.2f} "
+                  f"{fmt(r['build_mb'], '.0f'):>9} {fmt(r['peak_mb'], '.0f'):>8} {r['status']:>9} "
+                  f"{fmt(r['first']):>9} {fmt(r['quality'], '.0f'):>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк булевой и интервальной моделей")
+    parser.add_argument("--classes", type=int, nargs="+", default=[11, 33])
+    parser.add_argument("--time", type=float, default=60.0, help="Лимит решения, сек")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--two-phase", action="store_true", help="Сначала допустимость, затем оптимизация")
+    args = parser.parse_args()
+    run(args.classes, args.time, args.workers, args.two_phase)
@@ -0,0 +1,60 @@
+"""
+Бенчмарк облегченной модели (SchoolScheduler.lean) против обычной: построение без решения.
+
+Запуск из корня проекта:
+    python -m src.scripts.benchmark_lean
+    python -m src.scripts.benchmark_lean --classes 100 300 600
+
+Каждое построение — в отдельном процессе (spawn), чтобы пик RSS относился только к нему.
+Прирост RSS считается от уровня после генерации школы и снимка (до построения модели).
+"""
+import argparse
+import multiprocessing
+import time
+
+from src.scripts.benchmark_build import make_school
+from src.solver.engine import SchoolScheduler
+from src.solver.snapshot import ProblemSnapshot
+from src.solver.telemetry import peak_memory_mb
+
+MODES = [("named", False, False), ("lean", True, False), ("lean+names", True, True)]
+
+
+def build(n_classes, lean, debug_names):
+    workloads, slots, rooms = make_school(n_classes)
+    snap = ProblemSnapshot.from_objects(0, workloads, slots, rooms)
+    del workloads, slots, rooms
+    before = peak_memory_mb()
+
+    scheduler = SchoolScheduler(school_id=0)
+    scheduler.lean = lean
+    scheduler.debug_names = debug_names
+    t0 = time.perf_counter()
+    scheduler.build_model(snap)
+    seconds = time.perf_counter() - t0
+    proto = scheduler.model.Proto()
+    return {
+        "workloads": snap.n_workloads,
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "build": seconds,
+        "rss_mb": peak_memory_mb() - before,
+    }
+
+
+def run(sizes):
+    print(f"{'classes':>8} {'workloads':>10} {'mode':>11} {'vars':>9} {'constr':>9} {'build, s':>9} {'RSS +MB':>8}")
+    ctx = multiprocessing.get_context("spawn")
+    for n in sizes:
+        for name, lean, debug_names in MODES:
+            with ctx.Pool(1) as pool:
+                r = pool.apply(build, (n, lean, debug_names))
+            print(f"{n:>8} {r['workloads']:>10} {name:>11} {r['variables']:>9} {r['constraints']:>9} "
+                  f"{r['build']:>9.2f} {r['rss_mb']:>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк облегченной модели SchoolScheduler")
+    parser.add_argument("--classes", type=int, nargs="+", default=[100, 300])
+    args = parser.parse_args()
+    run(args.classes)
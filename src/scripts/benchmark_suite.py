@@ -0,0 +1,188 @@
+"""
+Бенчмарк решателя на лестнице синтетических школ (см. src/scripts/synthetic.py).
+
+Запуск из корня проекта:
+    python -m src.scripts.benchmark_suite
+    python -m src.scripts.benchmark_suite --parallels 1 2 4 --buildings 2 --split-ratio 0.5 --vacancy-share 0.2
+    python -m src.scripts.benchmark_suite --compare benchmarks/baseline.json
+    python -m src.scripts.benchmark_suite --out benchmarks/baseline.json        # обновить эталон
+
+Каждая школа — в отдельном процессе (spawn): построение модели, решение, кабинеты, оценка
+(ScheduleEvaluator). Результаты пишутся в JSON (--out). Решение ограничено детерминированным
+временем CP-SAT (--dtime, по фазе) при фиксированном seed и одном потоке, поэтому статус, objective
+и размер модели воспроизводимы между машинами; время и память — нет, для них допуск шире.
+
+--compare: сравнение с эталоном по именам школ; при регрессии код выхода 1.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from dataclasses import replace
+from datetime import datetime
+
+import numpy as np
+import ortools
+
+from src.scripts.synthetic import SchoolSpec, generate_school
+from src.solver.engine import SchoolScheduler
+from src.solver.progress import ProgressCallback
+from src.solver.quality import ScheduleEvaluator
+from src.solver.rooms import assign_rooms
+from src.solver.snapshot import ProblemSnapshot
+from src.solver.telemetry import peak_memory_mb
+
+DEFAULT_OUT = os.path.join("benchmarks", "results.json")
+
+# Допуски сравнения с эталоном: во сколько раз метрика может вырасти (время — еще и абсолютный порог, сек)
+GROWTH_LIMITS = {"variables": 1.01, "constraints": 1.01, "build_s": 1.5, "solve_s": 1.5, "rooms_s": 1.5,
+                 "peak_rss_mb": 1.3}
+TIME_FLOOR = 0.25
+OBJECTIVE_DROP = 0.01    # objective (максимизация) может упасть не больше чем на 1%
+FOUND = ("OPTIMAL", "FEASIBLE")
+
+
+def run_case(spec, dtime, time_limit, workers, two_phase):
+    """Один прогон (в отдельном процессе): метрики школы spec."""
+    workloads, slots, rooms = generate_school(spec)
+    snap = ProblemSnapshot.from_objects(0, workloads, slots, rooms)
+
+    scheduler = SchoolScheduler(school_id=0, profile="deep")
+    scheduler.profile = replace(scheduler.profile, no_improvement_timeout=0)
+    scheduler.two_phase = two_phase
+    params = scheduler.solver.parameters
+    params.max_deterministic_time = dtime
+    params.max_time_in_seconds = time_limit
+    params.num_search_workers = workers
+    params.log_search_progress = False
+
+    t0 = time.perf_counter()
+    scheduler.build_model(snap)
+    build = time.perf_counter() - t0
+    proto = scheduler.model.Proto()
+
+    scheduler.progress = ProgressCallback(scheduler.time_vars, verbose=False)
+    t0 = time.perf_counter()
+    status = scheduler.solver.StatusName(scheduler._solve_with_watchdog())
+    solve = time.perf_counter() - t0
+    points = scheduler.progress.points
+
+    result = {
+        "name": spec.name,
+        "spec": spec.to_dict(),
+        "workloads": snap.n_workloads,
+        "lessons": int(snap.w_hours.sum()),
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "build_s": round(build, 3),
+        "solve_s": round(solve, 3),
+        "first_solution_s": round(points[0]["wall_time"], 3) if points else None,
+        "deterministic_time": round(scheduler.solver.deterministic_time, 3),
+        "status": status,
+        "rooms_s": None, "objective": None, "hard_violations": None, "unplaced": None,
+    }
+    if status in FOUND:
+        t0 = time.perf_counter()
+        assignment = assign_rooms(snap, scheduler.active_lessons())
+        result["rooms_s"] = round(time.perf_counter() - t0, 3)
+        report = ScheduleEvaluator(snap).evaluate(assignment.placed + assignment.unplaced)
+        result.update(objective=report["objective"], hard_violations=report["hard"]["total"],
+                      unplaced=len(assignment.unplaced))
+    result["peak_rss_mb"] = round(peak_memory_mb() or 0, 1)
+    return result
+
+
+def environment():
+    return {"python": platform.python_version(), "ortools": ortools.__version__, "numpy": np.__version__,
+            "platform": platform.platform(), "cpu_count": os.cpu_count()}
+
+
+def run(specs, dtime, time_limit, workers, two_phase):
+    cases = []
+    print(f"{'school':>42} {'workl.':>7} {'vars':>7} {'constr':>7} {'build':>6} {'solve':>6} "
+          f"{'rooms':>6} {'MB':>5} {'status':>9} {'objective':>10}")
+    ctx = multiprocessing.get_context("spawn")
+    for spec in specs:
+        with ctx.Pool(1) as pool:
+            r = pool.apply(run_case, (spec, dtime, time_limit, workers, two_phase))
+        cases.append(r)
+        print(f"{r['name']:>42} {r['workloads']:>7} {r['variables']:>7} {r['constraints']:>7} "
+              f"{r['build_s']:>6.2f} {r['solve_s']:>6.1f} {r['rooms_s'] or 0:>6.2f} {r['peak_rss_mb']:>5.0f} "
+              f"{r['status']:>9} {r['objective'] if r['objective'] is not None else '—':>10}")
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {"dtime": dtime, "time_limit": time_limit, "workers": workers, "two_phase": two_phase},
+        "cases": cases,
+    }
+
+
+def compare(results, baseline):
+    """Регрессии относительно эталона: [(школа, метрика, было, стало)]."""
+    base = {c["name"]: c for c in baseline["cases"]}
+    regressions = []
+    for case in results["cases"]:
+        old = base.get(case["name"])
+        if old is None:
+            print(f"➕ {case['name']}: нет в эталоне")
+            continue
+        if old["status"] in FOUND and case["status"] not in FOUND:
+            regressions.append((case["name"], "status", old["status"], case["status"]))
+        for metric, limit in GROWTH_LIMITS.items():
+            was, now = old.get(metric), case.get(metric)
+            if was is None or now is None:
+                continue
+            floor = TIME_FLOOR if metric.endswith("_s") else 0
+            if now > was * limit and now - was > floor:
+                regressions.append((case["name"], metric, was, now))
+        for metric in ("hard_violations", "unplaced"):
+            if (old.get(metric) or 0) < (case.get(metric) or 0):
+                regressions.append((case["name"], metric, old.get(metric), case.get(metric)))
+        was, now = old.get("objective"), case.get("objective")
+        if was is not None and now is not None and now < was - abs(was) * OBJECTIVE_DROP:
+            regressions.append((case["name"], "objective", was, now))
+
+    if baseline.get("settings") != results["settings"]:
+        print(f"⚠️ Настройки прогона отличаются от эталона: {baseline.get('settings')} -> {results['settings']}")
+    for name, metric, was, now in regressions:
+        print(f"❌ {name}: {metric} {was} -> {now}")
+    if not regressions:
+        print(f"✅ Регрессий нет ({len(results['cases'])} школ).")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк решателя на лестнице синтетических школ")
+    parser.add_argument("--parallels", type=int, nargs="+", default=[1, 2, 3], help="Лестница: классов в параллели")
+    parser.add_argument("--buildings", type=int, default=1)
+    parser.add_argument("--split-ratio", type=float, default=1.0)
+    parser.add_argument("--teacher-load", type=int, default=18)
+    parser.add_argument("--shifts", type=int, default=2, choices=[1, 2])
+    parser.add_argument("--vacancy-share", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dtime", type=float, default=5.0, help="Детерминированное время CP-SAT на школу")
+    parser.add_argument("--time", type=float, default=600.0, help="Предельное время на школу, сек")
+    parser.add_argument("--workers", type=int, default=1, help="Потоков CP-SAT (1 — воспроизводимо)")
+    parser.add_argument("--single-phase", action="store_true",
+                        help="Без фазы допустимости (на одном потоке решение часто не находится)")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Файл результатов (JSON)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Эталон для сравнения (JSON)")
+    args = parser.parse_args()
+
+    specs = [SchoolSpec(parallels=p, buildings=args.buildings, split_ratio=args.split_ratio,
+                        teacher_load=args.teacher_load, shifts=args.shifts,
+                        vacancy_share=args.vacancy_share, seed=args.seed) for p in args.parallels]
+    results = run(specs, args.dtime, args.time, args.workers, not args.single_phase)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"💾 Результаты: {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        sys.exit(1 if compare(results, baseline) else 0)
@@ -0,0 +1,81 @@
+"""
+Бенчмарк ограничений симметрии (взаимозаменяемые нагрузки, см. src/solver/symmetry.py).
+
+Запуск из корня проекта:
+    python -m src.scripts.benchmark_symmetry
+    python -m src.scripts.benchmark_symmetry --classes 11 22 --vacancy-share 0.3 --time 60 --gap 0.01
+    python -m src.scripts.benchmark_symmetry --classes 33 --two-phase
+
+Синтетическая школа (make_school из benchmark_build) решается дважды — с упорядочиванием
+взаимозаменяемых нагрузок и без него; часть учителей объявляется вакансиями.
+Замеряется время до первого решения и до целевого gap, итоговая цель.
+"""
+import argparse
+import random
+import time
+
+from src.scripts.benchmark_build import make_school
+from src.solver.engine import SchoolScheduler
+from src.solver.progress import ProgressCallback
+from src.solver.snapshot import ProblemSnapshot
+
+
+def make_snapshot(n_classes, vacancy_share, seed=42):
+    workloads, slots, rooms = make_school(n_classes, seed)
+    rnd = random.Random(seed)
+    for teacher in {w.teacher_id: w.teacher for w in workloads}.values():
+        teacher.is_vacancy = rnd.random() < vacancy_share
+    return ProblemSnapshot.from_objects(0, workloads, slots, rooms)
+
+
+def solve(snap, symmetry, time_limit, workers, gap, two_phase=False):
+    scheduler = SchoolScheduler(school_id=0, profile="deep")
+    scheduler.break_symmetry = symmetry
+    scheduler.two_phase = two_phase
+    params = scheduler.solver.parameters
+    params.max_time_in_seconds = time_limit
+    params.num_search_workers = workers
+    params.log_search_progress = False
+
+    t0 = time.perf_counter()
+    scheduler.build_model(snap)
+    build = time.perf_counter() - t0
+    scheduler.progress = ProgressCallback(scheduler.time_vars, verbose=False)
+    status = scheduler._solve_with_watchdog()
+
+    points = scheduler.progress.points
+    feasibility = scheduler.telemetry.stats.get("feasibility_phase")
+    return {
+        "build": build,
+        "classes": len(scheduler.symmetry_classes),
+        "status": scheduler.solver.StatusName(status),
+        "first": feasibility["wall_time"] if feasibility else points[0]["wall_time"] if points else None,
+        "to_gap": next((p["wall_time"] for p in points if p["gap"] <= gap), None),
+        "objective": points[-1]["objective"] if points else None,
+    }
+
+
+def run(sizes, vacancy_share, time_limit, workers, gap, two_phase=False):
+    def fmt(value):
+        return "—" if value is None else f"{value:.1f}"
+
+    print(f"{'classes':>8} {'symmetry':>9} {'sym.classes':>12} {'status':>9} {'first, s':>9} "
+          f"{f'gap≤{gap:.0%}, s':>11} {'objective':>11}")
+    for n in sizes:
+        snap = make_snapshot(n, vacancy_share)
+        for symmetry in (False, True):
+            r = solve(snap, symmetry, time_limit, workers, gap, two_phase)
+            print(f"{n:>8} {'on' if symmetry else 'off':>9} {r['classes']:>12} {r['status']:>9} "
+                  f"{fmt(r['first']):>9} {fmt(r['to_gap']):>11} {fmt(r['objective']):>11}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк ограничений симметрии SchoolScheduler")
+    parser.add_argument("--classes", type=int, nargs="+", default=[11, 22])
+    parser.add_argument("--vacancy-share", type=float, default=0.3, help="Доля учителей-вакансий")
+    parser.add_argument("--time", type=float, default=60.0, help="Лимит решения, сек")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--gap", type=float, default=0.01, help="Целевой gap")
+    parser.add_argument("--two-phase", action="store_true", help="Сначала допустимость, затем оптимизация")
+    args = parser.parse_args()
+    run(args.classes, args.vacancy_share, args.time, args.workers, args.gap, args.two_phase)
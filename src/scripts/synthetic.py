@@ -0,0 +1,92 @@
+"""
+Синтетические школы для бенчмарков: детерминированные (seed) и параметризованные.
+
+В отличие от generate_demo.py (одна школа 11 x "АБВ", random без seed) здесь одинаковые
+параметры всегда дают одинаковую школу — результаты разных запусков сравнимы.
+Объекты — SimpleNamespace с атрибутами ORM-моделей, подходят для ProblemSnapshot.from_objects.
+"""
+import math
+import random
+from dataclasses import asdict, dataclass
+from types import SimpleNamespace
+
+from src.models.enums import RoomType, SubgroupType
+from src.utils.ministry_norms import MINISTRY_REQUIREMENTS
+
+LETTERS = "АБВГДЕЖЗИКЛМНОП"
+BUILDINGS = "АБВГД"
+GRADES = range(1, 12)
+SPLIT_SUBJECTS = ["Англ. мова", "Інформатика", "Захист України"]
+ROOM_TYPES = {"Фізична культура": RoomType.GYM, "Інформатика": RoomType.IT_LAB,
+              "Хімія": RoomType.LAB_CHEMISTRY, "Фізика": RoomType.LAB_PHYSICS, "Біологія": RoomType.LAB_BIO}
+
+
+@dataclass(frozen=True)
+class SchoolSpec:
+    """Параметры синтетической школы."""
+    parallels: int = 1          # классов в параллели (буквы А, Б, В, ...)
+    classes: int = None         # обрезать до стольких классов (None — все 11 x parallels)
+    buildings: int = 1          # корпусов: кабинеты делятся между ними поровну
+    split_ratio: float = 1.0    # доля классов 5+, где языки / информатика / ЗУ делятся на подгруппы
+    teacher_load: int = 18      # ставка: учитель берет часы до нее, затем открывается следующий
+    shifts: int = 2             # 2 — 6-9 классы во второй смене, 1 — все в первой
+    vacancy_share: float = 0.0  # доля учителей-вакансий
+    seed: int = 42
+
+    @property
+    def name(self):
+        size = f"c{self.classes}" if self.classes else f"p{self.parallels}"
+        return (f"{size}-b{self.buildings}-split{self.split_ratio:g}-load{self.teacher_load}"
+                f"-sh{self.shifts}-vac{self.vacancy_share:g}-s{self.seed}")
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def generate_school(spec):
+    """Синтетическая школа по SchoolSpec: (workloads, slots, rooms)."""
+    rnd = random.Random(spec.seed)
+    slots = [SimpleNamespace(id=(d - 1) * 14 + p, day_of_week=d, period_number=p, shift_number=1 if p <= 7 else 2)
+             for d in range(1, 6) for p in range(1, 15)]
+
+    letters = [LETTERS[k] if k < len(LETTERS) else str(k + 1) for k in range(spec.parallels)]
+    classes = [(g, l) for l in letters for g in GRADES][:spec.classes]
+    n_classes = len(classes)
+
+    subjects, teachers, workloads = {}, {}, []
+    for gid, (grade, letter) in enumerate(classes, start=1):
+        shift = 2 if spec.shifts == 2 and 6 <= grade <= 9 else 1
+        group = SimpleNamespace(id=gid, name=f"{grade}-{letter}", shift=shift, size=30)
+        # Случайные числа тянем только когда параметр их требует: спецификация по умолчанию
+        # не зависит от порядка вызовов rnd
+        split_class = grade > 4 and (spec.split_ratio >= 1 or rnd.random() < spec.split_ratio)
+        for subj_name, hours in MINISTRY_REQUIREMENTS[grade].items():
+            subj = subjects.setdefault(subj_name, SimpleNamespace(id=len(subjects) + 1, name=subj_name))
+            parts = [SubgroupType.GROUP_1, SubgroupType.GROUP_2] \
+                if subj_name in SPLIT_SUBJECTS and split_class else [SubgroupType.WHOLE_CLASS]
+            for sub in parts:
+                pool = teachers.setdefault(subj_name, [])
+                if not pool or pool[-1].load >= spec.teacher_load:
+                    pool.append(SimpleNamespace(id=sum(len(p) for p in teachers.values()) + 1,
+                                                is_vacancy=False, load=0))
+                teacher = pool[-1]
+                teacher.load += math.ceil(hours)
+                workloads.append(SimpleNamespace(
+                    id=len(workloads) + 1, hours_per_week=int(math.ceil(hours)),
+                    teacher_id=teacher.id, teacher=teacher, subject_id=subj.id, subject=subj,
+                    group_id=gid, group=group, subgroup=sub,
+                    required_room_type=ROOM_TYPES.get(subj_name, RoomType.STANDARD)))
+
+    if spec.vacancy_share > 0:
+        for teacher in sorted({w.teacher_id: w.teacher for w in workloads}.values(), key=lambda t: t.id):
+            teacher.is_vacancy = rnd.random() < spec.vacancy_share
+
+    # Кабинеты: обычный на класс + спец. кабинеты каждого типа; корпуса — по кругу
+    room_types = [RoomType.STANDARD] * n_classes
+    for rt in ROOM_TYPES.values():
+        room_types += [rt] * max(2, n_classes // 10)
+    rooms = [SimpleNamespace(id=k + 1, room_type=rt, capacity=30,
+                             building=BUILDINGS[k % spec.buildings] if spec.buildings > 1 else "")
+             for k, rt in enumerate(room_types)]
+    rnd.shuffle(workloads)
+    return workloads, slots, rooms
@@ -0,0 +1,146 @@
+"""
+Кэш по содержимому задачи: одинаковые входные данные — одинаковый отпечаток (fingerprint).
+
+Отпечаток считается по нагрузке, сетке, кабинетам, справочникам и правилам школы.
+Идентификаторы из БД в него не входят — только позиции (ранги) в снимке, поэтому
+повторный импорт того же файла (новые id, те же данные) дает тот же отпечаток.
+По той же причине в кэше все хранится в позициях снимка, а не в id.
+
+На диске (каталог SOLVER_CACHE_DIR):
+  <fp>.model.json.gz              — CpModelProto (текстовый формат) + позиции переменных
+  <fp>-<профиль>.solution.json.gz — итоговая сетка (позиции нагрузки и слота)
+                                    только решения с gap цели профиля (SchoolScheduler._final_quality)
+Вытеснение по размеру: при превышении SOLVER_CACHE_MAX_MB удаляются давно не читанные файлы.
+"""
+import gzip
+import hashlib
+import json
+import os
+from dataclasses import fields
+
+import numpy as np
+
+# Меняется при изменении построения модели — старые записи перестают совпадать
+CACHE_FORMAT = 3
+
+# Колонки-ссылки: в отпечаток идут как ранги в соответствующем справочнике
+_REFERENCES = {"w_teacher": "teacher_ids", "w_group": "group_ids", "w_subject": "subject_ids"}
+# Сами id строк: порядок уже задан позициями, значения в отпечаток не входят
+_ROW_IDS = {"school_id", "workload_ids", "slot_ids", "teacher_ids", "group_ids", "subject_ids", "room_ids"}
+
+
+def _json(value):
+    return json.dumps(value, sort_keys=True, ensure_ascii=False,
+                      default=lambda o: getattr(o, "value", str(o))).encode()
+
+
+def fingerprint(snap, blocked_slots=(), room_limits=None, variant="bool"):
+    """Отпечаток задачи (sha256 hex): снимок (с правилами школы) + резервы декомпозиции + вариант модели."""
+    h = hashlib.sha256(f"format:{CACHE_FORMAT}:{variant}".encode())
+    for f in fields(snap):
+        if f.name in _ROW_IDS:
+            continue
+        value = getattr(snap, f.name)
+        if f.name in _REFERENCES:
+            value = np.searchsorted(getattr(snap, _REFERENCES[f.name]), value)
+        elif f.name == "rules":
+            # Правила ссылаются на предметы по id — в отпечаток идут ранги
+            value = [[r.type.value, np.searchsorted(snap.subject_ids, r.subject_ids).tolist(), r.max_value,
+                      list(r.preferred_periods), r.bonus] for r in value]
+        h.update(f.name.encode())
+        if isinstance(value, np.ndarray):
+            h.update(str(value.dtype).encode() + str(value.shape).encode())
+            h.update(np.ascontiguousarray(value).tobytes())
+        else:
+            h.update(_json(value))
+
+    teacher_pos = {t: k for k, t in enumerate(snap.teacher_ids.tolist())}
+    slot_pos = {s: k for k, s in enumerate(snap.slot_ids.tolist())}
+    h.update(_json(sorted([teacher_pos.get(t, -1), slot_pos.get(s, -1)] for t, s in blocked_slots)))
+    h.update(_json(sorted([rt, slot_pos.get(s, -1), n] for (rt, s), n in (room_limits or {}).items())))
+    return h.hexdigest()
+
+
+class SolveCache:
+    """Файловый кэш моделей и решений с вытеснением по суммарному размеру."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_config(cls, config):
+        """Кэш по настройкам приложения; None, если выключен (SOLVER_CACHE_MAX_MB = 0)."""
+        max_mb = config.get("SOLVER_CACHE_MAX_MB", 0)
+        if not max_mb or not config.get("SOLVER_CACHE_DIR"):
+            return None
+        return cls(config["SOLVER_CACHE_DIR"], int(max_mb) * 1024 * 1024)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read(self, name):
+        path = self._path(name)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Битый файл (например, процесс упал при записи) — считаем промахом
+            os.remove(path)
+            return None
+        os.utime(path)  # свежий доступ — вытесняется последним
+        return data
+
+    def _write(self, name, data):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=1) as f:
+            json.dump(data, f)
+        os.replace(tmp, path)  # атомарно: параллельный читатель не увидит половину файла
+        self.evict()
+
+    def evict(self):
+        """Удаляет самые давно прочитанные файлы, пока кэш больше max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".json.gz"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    # --- Модель ---
+
+    def load_model(self, key):
+        """
+        {"proto": текст CpModelProto, "vars": [[i, j, индекс переменной]], "presolve": отчет,
+         "symmetry": классы взаимозаменяемых нагрузок [[i, ...]]} или None.
+        """
+        return self._read(f"{key}.model.json.gz")
+
+    def store_model(self, key, model, var_positions, presolve_report, symmetry_classes=()):
+        self._write(f"{key}.model.json.gz", {
+            "proto": str(model.Proto()),
+            "vars": var_positions,
+            "presolve": presolve_report,
+            "symmetry": list(symmetry_classes),
+        })
+
+    # --- Решение ---
+
+    def load_solution(self, key, profile):
+        """{"active": [[i, j]], "status", "objective", "best_bound"} или None."""
+        return self._read(f"{key}-{profile}.solution.json.gz")
+
+    def store_solution(self, key, profile, active, **info):
+        self._write(f"{key}-{profile}.solution.json.gz", {"active": active, **info})
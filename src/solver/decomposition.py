@@ -0,0 +1,294 @@
+"""
+Декомпозиция задачи на слабо связанные части и параллельное решение.
+
+Части выделяются:
+  * "shift"   — по смене класса (1 и 2 смена связаны только общими учителями и кабинетами);
+  * "teacher" — по компонентам связности графа "класс — учитель" (вакансии не связывают,
+                у них нет запрета на двойную занятость);
+  * "auto"    — граф учителей, а если он связный — по сменам.
+
+Общие ресурсы резервируются заранее: каждый пересекающийся слот общего учителя
+отдается одной части, а кабинеты каждого типа в общих слотах делятся пропорционально
+спросу. После этого части не зависят друг от друга и решаются в пуле процессов.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from src.solver.presolve import shift_windows, effective_room_types
+from src.solver.progress import ProgressCallback
+
+MODES = ("shift", "teacher", "auto")
+
+_part_stop = None  # событие остановки частей в процессе пула (см. _init_part)
+
+
+def find_components(snap, by="auto"):
+    """Список массивов позиций нагрузок — по одному на независимую часть."""
+    if by not in MODES:
+        raise ValueError(f"Неизвестный режим декомпозиции: {by}")
+
+    if by in ("teacher", "auto"):
+        comps = _teacher_components(snap)
+        if by == "teacher" or len(comps) > 1:
+            return comps
+
+    return [np.flatnonzero(snap.w_shift == shift) for shift in np.unique(snap.w_shift)]
+
+
+def _teacher_components(snap):
+    """Компоненты связности классов через общих (не вакантных) учителей."""
+    parent = {g: g for g in snap.w_group.tolist()}
+
+    def find(g):
+        while parent[g] != g:
+            parent[g] = parent[parent[g]]
+            g = parent[g]
+        return g
+
+    vacancy = dict(zip(snap.teacher_ids.tolist(), snap.teacher_is_vacancy.tolist()))
+    first_group = {}
+    for t_id, g_id in zip(snap.w_teacher.tolist(), snap.w_group.tolist()):
+        if vacancy.get(t_id): continue
+        if t_id in first_group:
+            parent[find(g_id)] = find(first_group[t_id])
+        else:
+            first_group[t_id] = g_id
+
+    roots = np.array([find(g) for g in snap.w_group.tolist()], dtype=np.int64)
+    return [np.flatnonzero(roots == r) for r in np.unique(roots)]
+
+
+def pack_components(components, hours, n_bins):
+    """Объединяет мелкие компоненты в n_bins частей примерно равного объема (LPT)."""
+    if len(components) <= n_bins:
+        return components
+    bins = [[] for _ in range(n_bins)]
+    load = [0] * n_bins
+    for comp in sorted(components, key=lambda c: -int(hours[c].sum())):
+        k = load.index(min(load))
+        bins[k].append(comp)
+        load[k] += int(hours[comp].sum())
+    return [np.sort(np.concatenate(b)) for b in bins if b]
+
+
+def reserve_shared_resources(snap, parts):
+    """
+    Резервирование общих ресурсов между частями.
+    Возвращает для каждой части (blocked_slots, room_limits) в формате SchoolScheduler.
+    """
+    slot_ids = snap.slot_ids.tolist()
+    slot_period = snap.slot_period.tolist()
+    vacancy = dict(zip(snap.teacher_ids.tolist(), snap.teacher_is_vacancy.tolist()))
+    capacities = snap.room_capacities()
+    windows = shift_windows(snap)
+    w_room_type, _ = effective_room_types(snap)
+
+    blocked = [set() for _ in parts]
+    room_limits = [{} for _ in parts]
+
+    # Спрос частей: часы учителя, часы по типу кабинета, смены
+    t_hours = defaultdict(lambda: defaultdict(int))    # teacher_id -> part -> hours
+    t_shifts = defaultdict(lambda: defaultdict(set))   # teacher_id -> part -> {shift}
+    rt_hours = defaultdict(lambda: defaultdict(int))   # rt -> part -> hours
+    rt_shifts = defaultdict(lambda: defaultdict(set))  # rt -> part -> {shift}
+    for p, positions in enumerate(parts):
+        for i in positions.tolist():
+            t_id, rt, shift = int(snap.w_teacher[i]), int(w_room_type[i]), int(snap.w_shift[i])
+            h = int(snap.w_hours[i])
+            if not vacancy.get(t_id):
+                t_hours[t_id][p] += h
+                t_shifts[t_id][p].add(shift)
+            rt_hours[rt][p] += h
+            rt_shifts[rt][p].add(shift)
+
+    def users(shifts_by_part, j):
+        return [p for p, shifts in shifts_by_part.items()
+                if any(windows[sh][0] <= slot_period[j] <= windows[sh][1] for sh in shifts)]
+
+    # Учителя: каждый общий слот — одной части, пропорционально часам
+    for t_id, by_part in t_shifts.items():
+        if len(by_part) < 2: continue
+        taken = defaultdict(int)
+        for j in range(len(slot_ids)):
+            owners = users(by_part, j)
+            if len(owners) == 1:
+                taken[owners[0]] += 1
+        for j in range(len(slot_ids)):
+            owners = users(by_part, j)
+            if len(owners) < 2: continue
+            winner = max(owners, key=lambda p: t_hours[t_id][p] / (1 + taken[p]))
+            taken[winner] += 1
+            for p in owners:
+                if p != winner:
+                    blocked[p].add((t_id, slot_ids[j]))
+
+    # Кабинеты: в общих слотах делим количество по спросу (остаток — по наибольшей доле)
+    for rt, by_part in rt_shifts.items():
+        if len(by_part) < 2: continue
+        cap = int(capacities[rt])
+        for j in range(len(slot_ids)):
+            owners = users(by_part, j)
+            if len(owners) < 2: continue
+            total = sum(rt_hours[rt][p] for p in owners)
+            shares = {p: cap * rt_hours[rt][p] / total for p in owners}
+            limits = {p: int(shares[p]) for p in owners}
+            for p in sorted(owners, key=lambda p: limits[p] - shares[p])[:cap - sum(limits.values())]:
+                limits[p] += 1
+            for p in owners:
+                room_limits[p][(rt, slot_ids[j])] = limits[p]
+
+    return list(zip(blocked, room_limits))
+
+
+def split_budget(total, weights):
+    """
+    total пропорционально weights целыми долями (наибольшие остатки): сумма долей ровно total.
+    Лимит перестановок теплого старта делится так между частями — общий лимит не превышается.
+    """
+    weight_sum = sum(weights)
+    if not weight_sum:
+        return [0] * len(weights)
+    shares = [total * w / weight_sum for w in weights]
+    budget = [int(x) for x in shares]
+    for k in sorted(range(len(weights)), key=lambda k: budget[k] - shares[k])[:total - sum(budget)]:
+        budget[k] += 1
+    return budget
+
+
+def _init_part(stop):
+    """Инициализация рабочего процесса: общее событие остановки частей."""
+    global _part_stop
+    _part_stop = stop
+
+
+def _forward_stop(should_stop, stop, done):
+    """Флаг родителя (SchoolScheduler.stop_requested) -> событие остановки частей."""
+    while not done.wait(0.5):
+        if should_stop():
+            stop.set()
+            return
+
+
+def _solve_part(payload, stop=None):
+    """
+    Решение одной части в рабочем процессе. Возвращает сводку и выбранные уроки.
+    stop — событие остановки (в пуле процессов — из _init_part).
+    """
+    from src.solver.engine import SchoolScheduler
+
+    sub, blocked, room_limits, profile, time_limit, workers, seed, hints, max_changes, two_phase = payload
+    start = time.time()
+    scheduler = SchoolScheduler(sub.school_id, profile)
+    scheduler.solver.parameters.max_time_in_seconds = time_limit
+    scheduler.solver.parameters.num_search_workers = workers
+    scheduler.solver.parameters.random_seed = seed
+    scheduler.solver.parameters.log_search_progress = False
+    scheduler.blocked_slots = blocked
+    scheduler.room_limits = room_limits
+    scheduler.two_phase = two_phase
+
+    # Остановка родителя (отмена, "stop") прерывает и части — в том числе еще до решения
+    stop, done = stop if stop is not None else _part_stop, threading.Event()
+
+    def watch():
+        while not done.wait(0.2):
+            if stop.is_set():
+                scheduler.stop()
+                return
+
+    if stop is not None:
+        threading.Thread(target=watch, daemon=True).start()
+    try:
+        scheduler.build_model(sub, hints)
+        if hints:
+            scheduler.apply_hints(hints, max_changes)
+        scheduler.progress = ProgressCallback(scheduler.time_vars, verbose=False)
+        with scheduler.telemetry.phase("solve"):
+            status = cp_model.UNKNOWN if scheduler.stop_requested else scheduler._solve_with_watchdog()
+    finally:
+        done.set()
+    ok = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    proto = scheduler.model.Proto()
+    return {
+        "status": scheduler.solver.StatusName(status),
+        "objective": scheduler.solver.ObjectiveValue() if ok and not scheduler.from_feasibility else None,
+        "seconds": time.time() - start,
+        "active": scheduler.active_lessons() if ok else None,
+        # Телеметрия части (сводится в SolveTelemetry родителя)
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "conflicts": scheduler.solver.NumConflicts(),
+        "branches": scheduler.solver.NumBranches(),
+        "phases": scheduler.telemetry.phases,
+        "constraints_by_family": scheduler.telemetry.constraints_by_family,
+    }
+
+
+def solve_decomposed(snap, by, params, max_parts=None, hints=None, max_changes=None, profile=None,
+                     telemetry=None, two_phase=False, should_stop=None):
+    """
+    Декомпозиция + параллельное решение частей.
+    params — SatParameters родительского решателя (лимит времени, потоки, seed),
+    profile — имя профиля (gap и стоп без улучшений для частей).
+    hints / max_changes — теплый старт; лимит перестановок делится между частями (split_budget).
+    telemetry — SolveTelemetry, куда сводится статистика частей.
+    two_phase — части решаются в два этапа (см. SchoolScheduler._feasibility_phase).
+    should_stop — функция без аргументов: True — остановить все части (лучшее найденное остается).
+    Возвращает объединенный список (workload_id, slot_id) или None, если часть не решена.
+    """
+    total_workers = max(1, params.num_search_workers or os.cpu_count() or 1)
+    max_parts = max_parts or total_workers
+
+    parts = pack_components(find_components(snap, by), snap.w_hours, max_parts)
+    reservations = reserve_shared_resources(snap, parts)
+    workers_per_part = max(1, total_workers // len(parts))
+
+    print(f"🧩 Декомпозиция ({by}): {len(parts)} частей, "
+          f"нагрузок: {[len(p) for p in parts]}, потоков на часть: {workers_per_part}")
+
+    subs, part_hints = [], []
+    for positions in parts:
+        sub = snap.subset(positions)
+        part_ids = set(sub.workload_ids.tolist())
+        subs.append(sub)
+        part_hints.append([h for h in hints or () if h[0] in part_ids])
+    # Общий лимит перестановок — по частям пропорционально числу подсказанных уроков
+    budgets = split_budget(max_changes, [len(h) for h in part_hints]) if max_changes is not None \
+        else [None] * len(parts)
+
+    payloads = []
+    for sub, (blocked, limits), h, budget in zip(subs, reservations, part_hints, budgets):
+        payloads.append((sub, blocked, limits, profile, params.max_time_in_seconds, workers_per_part,
+                         params.random_seed, h, budget, two_phase))
+
+    # spawn: не наследуем соединения с БД и состояние OR-Tools родителя
+    ctx = multiprocessing.get_context("spawn")
+    stop, done = (threading.Event() if len(payloads) == 1 else ctx.Event()), threading.Event()
+    if should_stop is not None:
+        threading.Thread(target=_forward_stop, args=(should_stop, stop, done), daemon=True).start()
+    try:
+        if len(payloads) == 1:
+            results = [_solve_part(payloads[0], stop)]
+        else:
+            with ProcessPoolExecutor(max_workers=len(payloads), mp_context=ctx,
+                                     initializer=_init_part, initargs=(stop,)) as pool:
+                results = list(pool.map(_solve_part, payloads))
+    finally:
+        done.set()
+
+    active = []
+    for k, res in enumerate(results, start=1):
+        print(f"   Часть {k}: {res['status']} за {res['seconds']:.1f} сек, objective={res['objective']}")
+        if telemetry is not None:
+            telemetry.add_part(res)
+        if res["active"] is None:
+            return None
+        active.extend(res["active"])
+    return active
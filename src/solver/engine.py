@@ -1,222 +1,804 @@
+import numpy as np
 from ortools.sat.python import cp_model
 from src.extensions import db
-from src.models.schedule import ScheduleEntry
-from src.models.enums import RoomType, SubgroupType
-from src.utils.constraints_config import GLOBAL_CONSTRAINTS, ConstraintType
+from src.models.schedule import ScheduleEntry, delete_school_schedule
+from src.models.enums import SubgroupType
+from src.utils.constraints_config import ConstraintType
+from src.utils.schedule_views import materialize_views
+from src.solver.cache import fingerprint
+from src.solver.feasibility import precheck
+from src.solver.index import ConstraintIndex, DenseVars
+from src.solver.presolve import presolve
+from src.solver.rooms import assign_rooms
+from src.solver.profiles import get_profile
+from src.solver.progress import ProgressCallback
+from src.solver.telemetry import SolveTelemetry, peak_memory_mb
+from src.solver.snapshot import SUBGROUP_CODE
+from src.solver.symmetry import symmetric_classes
+from dataclasses import replace
+import threading
 import time
 
 
+# Бонус за каждый урок, оставшийся на месте при теплом старте (сильнее "магнита" окон)
+KEEP_BONUS = 10000
+
+
 class SchoolScheduler:
-    def __init__(self, school_id):
+    engine = "bool"   # вариант модели (см. engines.py)
+
+    def __init__(self, school_id, profile=None):
         self.school_id = school_id
         self.model = cp_model.CpModel()
         self.solver = cp_model.CpSolver()
 
-        # === НАСТРОЙКИ "ТЯЖЕЛОГО" РАСЧЕТА ===
-        # Увеличили до 600 секунд для поиска почти идеального варианта
-        self.solver.parameters.max_time_in_seconds = 600.0
-        self.solver.parameters.num_search_workers = 8
+        # === НАСТРОЙКИ РАСЧЕТА: профиль draft / standard / deep (см. profiles.py) ===
+        self.profile = get_profile(profile)
+        self.profile.apply(self.solver.parameters)
         self.solver.parameters.random_seed = 42
-        self.solver.parameters.log_search_progress = True
+        self.two_phase = self.profile.two_phase  # см. _feasibility_phase
+        self.break_symmetry = True               # см. _break_symmetries
+        self.symmetry_classes = []
 
         self.time_vars = {}
-
-    def run_algorithm(self, workloads, slots, rooms):
-        print(f"🧠 ЗАПУСК УНИВЕРСАЛЬНОГО SOLVER: {len(workloads)} нагрузок.")
+        self.var_index = None        # (нагрузка i, слот j) -> индекс переменной в CpModelProto, -1 — переменной нет
+        self.lean = False            # облегченная модель: переменные без имен, time_vars поверх var_index (см. build_model)
+        self.debug_names = False     # имена переменных (w{id}_d{day}_p{period}, busy_t.., cons_t..) и в облегченной модели
+        self.keep_bonus = KEEP_BONUS  # 0 — подсказка только ускоряет поиск, не удерживает уроки (см. apply_hints)
+        self.complete_hints = False   # достроить подсказку до всех переменных (см. _complete_hints)
+        self.unplaced = []           # [(workload_id, slot_id)] без кабинета после расчета
+
+        # Резервы общих ресурсов (заполняются при декомпозиции, см. decomposition.py)
+        self.blocked_slots = set()   # (teacher_id, slot_id), отданные другой части задачи
+        self.room_limits = {}        # (код RoomType, slot_id) -> доля кабинетов для этой части
+
+        self.stop_requested = False
+        self.keep_best = False
+        self.progress = None         # ProgressCallback текущего решения
+        self.feasible_lessons = None  # расписание фазы 1 (two_phase) — если фаза 2 не успела (см. _solve_with_watchdog)
+        self.from_feasibility = False  # итог расчета — расписание фазы 1, а не решателя
+
+        self.telemetry = SolveTelemetry()
+        self.job_id = None           # SolveJob, если расчет идет как фоновая задача
+        self.cache = None            # SolveCache: готовые модели и решения по отпечатку задачи
+        self.infeasibility = None    # почему решения нет: {"checks": [...]} или {"core": [...]}
+
+    def stop(self, keep_best=False):
+        """
+        Прервать расчет (можно из другого потока).
+        keep_best=True — сохранить лучшее найденное к этому моменту расписание.
+        """
+        self.keep_best = keep_best
+        self.stop_requested = True
+        self.solver.StopSearch()
+
+    def run_algorithm(self, snapshot, decompose=None, hints=None, max_changes=None, portfolio=False, replay=None):
+        """
+        Полный цикл: модель -> решение -> кабинеты -> запись в БД.
+        snapshot — ProblemSnapshot (см. src/solver/snapshot.py), ORM внутри не используется.
+        decompose — "shift" / "teacher" / "auto": решать независимые части параллельно.
+        hints / max_changes — теплый старт от текущего расписания (см. apply_hints).
+        portfolio — гонка нескольких конфигураций CP-SAT (см. portfolio.py).
+        replay — запись победителя гонки: повторить его поиск.
+        Каждый вызов оставляет строку SolveRun с телеметрией (см. telemetry.py).
+        """
         start_time = time.time()
+        mode = decompose or ("portfolio" if portfolio else "replay" if replay else "single")
+        ok = False
+        try:
+            if not self._precheck(snapshot):
+                return False
+            if portfolio:
+                ok = self._run_portfolio(snapshot, hints, max_changes)
+            else:
+                ok = self._run(snapshot, decompose, hints, max_changes, start_time, replay)
+            return ok
+        finally:
+            self._record_run(snapshot, mode, ok, time.time() - start_time)
+
+    def _run_portfolio(self, snapshot, hints, max_changes):
+        from src.solver.portfolio import race
+
+        print(f"🧠 ЗАПУСК ПОРТФЕЛЯ SOLVER: {snapshot.n_workloads} нагрузок.")
+        tel = self.telemetry
+        self.snapshot = snapshot
+        with tel.phase("solve"):
+            active, summary = race(self, snapshot, hints, max_changes)
+        tel.stats["portfolio"] = summary
+        winner = summary["winner"]
+        if winner:
+            tel.stats.update({k: winner[k] for k in ("status", "objective", "best_bound", "conflicts", "branches")})
+
+        if self.stop_requested and not self.keep_best:
+            print("⛔ Расчет остановлен по запросу — расписание не сохранено.")
+            return False
+        if active is None:
+            print("💥 Ни один гонщик не нашел решение.")
+            return False
+        self._save_schedule(self._assign_rooms(active))
+        return True
+
+    def _run(self, snapshot, decompose, hints, max_changes, start_time, replay=None):
+        print(f"🧠 ЗАПУСК УНИВЕРСАЛЬНОГО SOLVER: {snapshot.n_workloads} нагрузок.")
+        tel = self.telemetry
+
+        if decompose:
+            from src.solver.decomposition import solve_decomposed
+            self.snapshot = snapshot
+            with tel.phase("solve"):
+                active = solve_decomposed(snapshot, decompose, self.solver.parameters, hints=hints,
+                                          max_changes=max_changes, profile=self.profile.name, telemetry=tel,
+                                          two_phase=self.two_phase, should_stop=lambda: self.stop_requested)
+            print(f"⏱ Время расчета (декомпозиция): {time.time() - start_time:.2f} сек.")
+            if self.stop_requested and not self.keep_best:
+                print("⛔ Расчет остановлен по запросу — расписание не сохранено.")
+                return False
+            if active is None:
+                print("💥 Одна из частей не решена — расписание не сохранено.")
+                return False
+            self._save_schedule(self._assign_rooms(active))
+            return True
 
-        # Сортировка для стабильности результата
-        workloads.sort(key=lambda x: x.id)
-        slots.sort(key=lambda x: (x.day_of_week, x.period_number))
+        # Кэш: решение — только для "чистого" расчета (подсказки и повтор меняют результат)
+        cache_key = fingerprint(snapshot, self.blocked_slots, self.room_limits,
+                                variant=self.cache_variant()) if self.cache else None
+        reusable = cache_key is not None and not hints and not replay
+        if reusable and self._solution_from_cache(snapshot, cache_key):
+            return True
 
-        # Кэш инфраструктуры
-        room_capacities = {rt: 0 for rt in RoomType}
-        for r in rooms:
-            room_capacities[r.room_type] += 1
+        self._build_or_load(snapshot, cache_key, hints)
+        if hints:
+            with tel.phase("hints", self.model):
+                self.apply_hints(hints, max_changes, self.keep_bonus)
+                if self.complete_hints:
+                    self._complete_hints()
+        print(f"🏗 Модель построена за {time.time() - start_time:.2f} сек.")
+
+        # 5. ЗАПУСК ОПТИМИЗАТОРА
+        if self.stop_requested:
+            return False
+        print(f"⏳ Решение запущено (лимит {self.solver.parameters.max_time_in_seconds} сек)...")
+        self.progress = ProgressCallback(self.time_vars, decode=self.lessons)
+        with tel.phase("solve"):
+            if replay:
+                status = self._solve_replay(replay)
+            else:
+                status = self._solve_with_watchdog()
+        tel.record_solver(self.solver, status)
+        if self.from_feasibility:
+            # Цель фазы 1 не считалась — значения решателя относятся к неудачной фазе 2
+            tel.stats.update({"objective": None, "best_bound": None, "gap": None, "fallback": "feasibility_phase"})
 
-        workloads_by_type = {}
-        for w in workloads:
-            workloads_by_type.setdefault(w.required_room_type, []).append(w)
+        duration = time.time() - start_time
+        print(f"⏱ Время расчета: {duration:.2f} сек. Статус: {self.solver.StatusName(status)}")
+
+        if self.stop_requested and not self.keep_best:
+            print("⛔ Расчет остановлен по запросу — расписание не сохранено.")
+            return False
+
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            if self.from_feasibility:
+                print("✅ Сохраняется допустимое расписание фазы 1 (оптимизация не успела улучшить его).")
+            else:
+                print(f"✅ Оценка качества (Objective): {self.solver.ObjectiveValue()}")
+            active = self.active_lessons()
+            if reusable and not self.stop_requested and not self.from_feasibility:
+                self._store_solution(snapshot, cache_key, active, status)
+            self._save_schedule(self._assign_rooms(active))
+            return True
 
-        # 1. СОЗДАНИЕ ПЕРЕМЕННЫХ РЕШЕНИЯ
-        for w in workloads:
-            for s in slots:
-                # Жесткие границы смен
-                if w.group.shift == 1 and s.period_number > 8: continue
-                if w.group.shift == 2 and s.period_number < 5: continue
+        print("💥 Не удалось найти решение, удовлетворяющее всем ЖЕСТКИМ правилам.")
+        if status == cp_model.INFEASIBLE:
+            self._explain_infeasibility(snapshot)
+        return False
 
-                self.time_vars[(w.id, s.id)] = self.model.NewBoolVar(
-                    f'w{w.id}_d{s.day_of_week}_p{s.period_number}'
-                )
+    def _precheck(self, snapshot):
+        """Очевидные границы до построения модели (см. feasibility.py). False — решения заведомо нет."""
+        tel = self.telemetry
+        with tel.phase("precheck"):
+            issues = precheck(snapshot, presolve(snapshot, self.blocked_slots))
+        tel.stats["precheck"] = issues
+        for issue in issues[:20]:
+            print(f"{'🚫' if issue['severity'] == 'error' else '⚠️'} {issue['message']}")
+        errors = [issue for issue in issues if issue["severity"] == "error"]
+        if errors:
+            self.infeasibility = {"checks": errors}
+            print(f"💥 Предпроверка: {len(errors)} нарушений — решения заведомо нет, решатель не запускается.")
+            return False
+        return True
+
+    def _explain_infeasibility(self, snapshot):
+        """Какие семейства ограничений противоречат друг другу (допущения CP-SAT)."""
+        from src.solver.feasibility import explain_infeasibility
+
+        helper = type(self)(self.school_id, self.profile.name)
+        helper.blocked_slots, helper.room_limits = self.blocked_slots, self.room_limits
+        with self.telemetry.phase("explain"):
+            core = explain_infeasibility(helper, snapshot)
+        self.infeasibility = {"core": core}
+        self.telemetry.stats["infeasible_core"] = core
+        if core:
+            print(f"🧩 Противоречат друг другу ограничения: {', '.join(core)}")
+        else:
+            print("🧩 Причину неразрешимости быстро найти не удалось.")
+
+    def cache_variant(self):
+        """Часть отпечатка задачи: разные варианты модели не делят кэш."""
+        return self.engine
+
+    def _solution_from_cache(self, snapshot, key):
+        """Готовое решение той же задачи (тот же профиль): сразу кабинеты и запись."""
+        tel = self.telemetry
+        with tel.phase("cache.load"):
+            cached = self.cache.load_solution(key, self.profile.name)
+        if cached is not None and not self._final_quality(cached.get("status"), cached.get("objective"),
+                                                          cached.get("best_bound")):
+            cached = None  # запись до проверки качества (см. _store_solution) — считаем промахом
+        tel.stats["cache"] = {"key": key[:16], "solution": "hit" if cached else "miss"}
+        if cached is None:
+            return False
+
+        w_ids, s_ids = snapshot.workload_ids.tolist(), snapshot.slot_ids.tolist()
+        active = [(w_ids[i], s_ids[j]) for i, j in cached["active"]]
+        tel.stats.update({k: cached.get(k) for k in ("status", "objective", "best_bound")})
+        print(f"⚡ Решение взято из кэша ({len(active)} уроков, objective={cached.get('objective')}) — расчет пропущен.")
+        self.snapshot = snapshot
+        self._save_schedule(self._assign_rooms(active))
+        return True
+
+    def _final_quality(self, status, objective, bound):
+        """
+        Решение годится для кэша: OPTIMAL или gap не больше relative_gap_limit профиля.
+        Досрочные решения (стоп без улучшений, доля CPU в пакете, короткий бюджет фаз) не кэшируются:
+        повторный расчет той же задачи мог бы найти лучше, а получил бы их из кэша.
+        """
+        if status == "OPTIMAL":
+            return True
+        if status != "FEASIBLE" or objective is None or bound is None:
+            return False
+        return abs(bound - objective) / max(1.0, abs(objective)) <= self.profile.relative_gap_limit
+
+    def _store_solution(self, snapshot, key, active, status):
+        objective, bound = self.solver.ObjectiveValue(), self.solver.BestObjectiveBound()
+        if not self._final_quality(self.solver.StatusName(status), objective, bound):
+            print("🗃 Решение не сохранено в кэш: поиск остановлен раньше цели профиля.")
+            return
+        w_pos = {wid: i for i, wid in enumerate(snapshot.workload_ids.tolist())}
+        s_pos = {sid: j for j, sid in enumerate(snapshot.slot_ids.tolist())}
+        with self.telemetry.phase("cache.store"):
+            self.cache.store_solution(key, self.profile.name, [[w_pos[w], s_pos[s]] for w, s in active],
+                                      status=self.solver.StatusName(status),
+                                      objective=objective, best_bound=bound)
+
+    def _build_or_load(self, snapshot, key, hints=None):
+        """
+        build_model или готовая модель из кэша (без пресолва и построения ограничений).
+        В кэш модель идет без ограничений симметрии: их порядок зависит от подсказки.
+        """
+        if key is None:
+            return self.build_model(snapshot, hints)
+
+        tel = self.telemetry
+        with tel.phase("cache.load"):
+            cached = self.cache.load_model(key)
+        tel.stats.setdefault("cache", {"key": key[:16]})["model"] = "hit" if cached else "miss"
+
+        if cached is None:
+            self.build_model(snapshot, symmetry=False)
+            rows, cols = np.nonzero(self.var_index >= 0)
+            with tel.phase("cache.store"):
+                self.cache.store_model(key, self.model,
+                                       np.column_stack([rows, cols, self.var_index[rows, cols]]).tolist(),
+                                       self.presolve_report, self.symmetry_classes)
+            self._break_symmetries(hints)
+            return self.model
+
+        self.snapshot = snapshot
+        with tel.phase("cache.model"):
+            self.model.Proto().parse_text_format(cached["proto"])
+            self._set_time_vars(snapshot, np.asarray(cached["vars"], dtype=np.int64).reshape(-1, 3))
+            # Maximize хранится как минимизация: коэффициенты с обратным знаком, scaling_factor = -1
+            objective = self.model.Proto().objective
+            self.objectives = [self.model.GetIntVarFromProtoIndex(v) * int(c * objective.scaling_factor)
+                               for v, c in zip(objective.vars, objective.coeffs)]
+        self.presolve_report = cached["presolve"]
+        self.symmetry_classes = cached["symmetry"] if self.break_symmetry else []
+        print(f"🗃 Модель взята из кэша: переменных {len(self.time_vars)}, "
+              f"ограничений {len(self.model.Proto().constraints)}.")
+        self._break_symmetries(hints)
+        return self.model
+
+    def _solve_replay(self, replay):
+        """
+        Повтор поиска победителя гонки: та же конфигурация, профиль (gap), лимит времени,
+        потоки и детерминированное время.
+        """
+        from src.solver.portfolio import RacerConfig, solve_configured
+
+        config = RacerConfig(**replay["config"])
+        # Параметры гонщика, а не профиля задачи-повтора: gap и лимит времени меняют путь поиска
+        if replay.get("profile"):
+            self.profile = get_profile(replay["profile"])
+            self.profile.apply(self.solver.parameters)
+        if replay.get("max_time_in_seconds"):
+            self.solver.parameters.max_time_in_seconds = replay["max_time_in_seconds"]
+        # Гонщик решал в два этапа, если так требовал профиль задачи (записи до этого поля — нет)
+        self.two_phase = bool(replay.get("two_phase", False))
+        self.solver.parameters.num_search_workers = replay.get("workers", 1)
+        if self.solver.parameters.repair_hint:
+            self.allow_hint_repair()
+        self.telemetry.stats["replay"] = replay
+        print(f"🔁 Повтор конфигурации {config.name} (seed={config.random_seed}).")
+        return solve_configured(self, config, self.progress, replay.get("deterministic_time"))
+
+    def _record_run(self, snapshot, mode, ok, seconds):
+        """Запись телеметрии в solve_runs. Ошибка записи не должна ломать сам расчет."""
+        from src.models.jobs import SolveRun
+
+        tel = self.telemetry
+        stats = dict(tel.stats)
+        stats["engine"] = self.engine
+        stats["lean"] = self.lean
+        stats["presolve"] = getattr(self, "presolve_report", None)
+        stats["unplaced"] = len(self.unplaced)
+        stats["stopped"] = self.stop_requested
+        proto = self.model.Proto()
+        try:
+            db.session.add(SolveRun(
+                school_id=self.school_id, job_id=self.job_id, profile=self.profile.name,
+                mode=mode, success=ok, status=stats.pop("status", None),
+                n_workloads=snapshot.n_workloads,
+                n_variables=stats.pop("variables", None) or len(proto.variables),
+                n_constraints=stats.pop("constraints", None) or len(proto.constraints),
+                conflicts=stats.pop("conflicts", None), branches=stats.pop("branches", None),
+                objective=stats.pop("objective", None), best_bound=stats.pop("best_bound", None),
+                gap=stats.pop("gap", None), total_seconds=seconds, peak_memory_mb=peak_memory_mb(),
+                phases=tel.phases, constraints_by_family=tel.constraints_by_family, stats=stats,
+            ))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Телеметрия не записана: {e}")
+
+    def _solve_with_watchdog(self, deterministic_time=None):
+        """
+        Solve + стоп по no_improvement_timeout профиля (лучшее решение при этом остается).
+        При two_phase сначала идет фаза допустимости, оптимизация получает остаток лимита.
+        Если оптимизация не нашла ничего (UNKNOWN), времени на нее не осталось или расчет
+        остановлен после фазы 1, итог — расписание фазы 1 со статусом FEASIBLE (active_lessons вернет его).
+        deterministic_time — лимит детерминированного времени оптимизации (повтор гонщика, см. portfolio.py);
+        стоп без улучшений тогда не действует: он зависит от скорости машины.
+        """
+        self.feasible_lessons, self.from_feasibility = None, False
+        if self.two_phase:
+            status = self._feasibility_phase()
+            if status == cp_model.INFEASIBLE:
+                return status
+            if self.stop_requested:
+                return self._fall_back_to_feasible(status)
+            if self.solver.parameters.max_time_in_seconds <= 0:
+                print("⌛ Лимит времени исчерпан фазой допустимости — оптимизация пропущена.")
+                return self._fall_back_to_feasible(status)
+
+        if deterministic_time:
+            self.solver.parameters.max_deterministic_time = deterministic_time
+        status = self._optimize(watch=not deterministic_time)
+        if self.two_phase and status == cp_model.UNKNOWN:
+            return self._fall_back_to_feasible(status)
+        return status
+
+    def _fall_back_to_feasible(self, status):
+        """Итог — расписание фазы 1 (FEASIBLE), если оно есть; иначе status без изменений."""
+        if self.feasible_lessons is None:
+            return status
+        print("↩️ Итог — расписание фазы допустимости (оптимизация не дала решения).")
+        self.from_feasibility = True
+        if self.progress is not None:
+            self.progress.best = self.feasible_lessons
+        return cp_model.FEASIBLE
+
+    def _optimize(self, watch=True):
+        """Solve основной модели со стопом по no_improvement_timeout профиля (watch=False — без него)."""
+        timeout = self.profile.no_improvement_timeout if watch else 0
+        if not timeout:
+            return self.solver.Solve(self.model, self.progress)
+
+        done = threading.Event()
+
+        def watch():
+            while not done.wait(0.5):
+                idle = time.time() - self.progress.last_improvement
+                if self.progress.points and idle > timeout:
+                    print(f"🛑 Нет улучшений {timeout:.0f} сек — останавливаем поиск.")
+                    self.solver.StopSearch()
+                    return
+
+        threading.Thread(target=watch, daemon=True).start()
+        try:
+            return self.solver.Solve(self.model, self.progress)
+        finally:
+            done.set()
+
+    def _feasibility_phase(self):
+        """
+        Фаза 1 двухфазного решения: только жесткие ограничения (цель снята), параметры
+        под быстрый поиск допустимого решения, стоп на первом найденном.
+        Найденное расписание становится полной подсказкой (hint) для фазы 2 — оптимизации,
+        которой остается оставшееся время (общий лимит не превышается: может остаться 0).
+        Возвращает статус фазы 1.
+        """
+        params = self.solver.parameters
+        saved = (params.stop_after_first_solution, params.linearization_level, params.max_time_in_seconds)
+        feasibility = self.model.Clone()
+        feasibility.ClearObjective()
+        params.stop_after_first_solution = True
+        params.linearization_level = 0   # LP-релаксация цели здесь не нужна
+        with self.telemetry.phase("solve.feasibility"):
+            status = self.solver.Solve(feasibility)
+        params.stop_after_first_solution, params.linearization_level, time_limit = saved
+
+        elapsed = self.solver.WallTime()
+        found = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        self.telemetry.stats["feasibility_phase"] = {"status": self.solver.StatusName(status), "wall_time": elapsed}
+        print(f"🧱 Фаза допустимости: {self.solver.StatusName(status)} за {elapsed:.2f} сек.")
+        if found:
+            # Индексы переменных у копии те же — значения читаем через переменные оригинала.
+            # Подсказка полная (и вспомогательные переменные): решателю не нужно ее достраивать
+            self.model.ClearHints()
+            for k in range(len(self.model.Proto().variables)):
+                var = self.model.GetIntVarFromProtoIndex(k)
+                self.model.AddHint(var, self.solver.Value(var))
+            self.feasible_lessons = self.active_lessons()
+            if self.progress is not None:
+                self.progress.best = self.feasible_lessons
+        params.max_time_in_seconds = max(0.0, time_limit - elapsed)
+        return status
+
+    def build_model(self, snapshot, hints=None, symmetry=True):
+        """
+        Строит CP-модель (переменные, ограничения, цель) без запуска решателя.
+        hints — будущая подсказка (apply_hints): по ней упорядочиваются взаимозаменяемые нагрузки.
+        symmetry=False — без ограничений симметрии (их можно добавить позже, _break_symmetries).
+        """
+        self.snapshot = snapshot
+        tel = self.telemetry
+
+        # 0. ПРЕСОЛВ: допустимые слоты каждой нагрузки (смены, учителя, кабинеты)
+        with tel.phase("presolve"):
+            pre = presolve(snapshot, self.blocked_slots)
+            self.index = idx = ConstraintIndex(replace(snapshot, w_room_type=pre.room_type))
+            self.symmetry_classes = symmetric_classes(snapshot, pre) if self.break_symmetry else []
+
+        # Кэш инфраструктуры
+        room_capacities = snapshot.room_capacities()
+
+        w_ids = snapshot.workload_ids.tolist()
+        s_ids = snapshot.slot_ids.tolist()
+        lean = self.lean
+        named = self.debug_names or not lean
+
+        # 1. СОЗДАНИЕ ПЕРЕМЕННЫХ РЕШЕНИЯ (только в допустимых слотах)
+        with tel.phase("variables"):
+            first = len(self.model.Proto().variables)
+            for i, wid in enumerate(w_ids):
+                for j in np.flatnonzero(pre.allowed[i]).tolist():
+                    var = self.model.NewBoolVar(f'w{wid}_d{idx.slot_day[j]}_p{idx.slot_period[j]}' if named else '')
+                    if not lean:
+                        self.time_vars[(wid, s_ids[j])] = var
+                    idx.add_var(i, j, var)
+            # Переменные созданы подряд в порядке (i, j) — в том же порядке маска обходит allowed
+            self.var_index = np.full(pre.allowed.shape, -1, dtype=np.int32)
+            self.var_index[pre.allowed] = first + np.arange(np.count_nonzero(pre.allowed))
+            if lean:
+                self.time_vars = DenseVars(self.model, self.var_index, snapshot.workload_ids, snapshot.slot_ids)
+
+        if pre.impossible:
+            # Нагрузку некуда поставить — модель заведомо неразрешима
+            print(f"⚠️ Нет ни одного допустимого слота для нагрузок: {pre.impossible}")
+            self.model.AddBoolOr([])
 
         # 2. ПРИМЕНЕНИЕ ВНЕШНИХ ОГРАНИЧЕНИЙ (ИЗ ФАЙЛА КОНФИГУРАЦИИ)
         objectives = []
-        self._apply_external_constraints(workloads, slots, objectives)
+        self._apply_external_constraints(objectives)
 
         # 3. ПОСТРОЕНИЕ ПЛАНА И ЦЕЛЕЙ (МАГНИТЫ И ГРАВИТАЦИЯ)
-        teacher_schedule = {}  # teacher_id -> day -> period -> [vars]
-
-        for w in workloads:
-            w_vars = []
-            for s in slots:
-                if (w.id, s.id) in self.time_vars:
-                    var = self.time_vars[(w.id, s.id)]
+        w_hours = snapshot.w_hours.tolist()
+        with tel.phase("constraints.hours", self.model):
+            for i in range(snapshot.n_workloads):
+                w_vars = []
+                shift = idx.w_shift[i]
+                for j, var in idx.vars_by_workload[i]:
                     w_vars.append(var)
 
                     # Гравитация (прижимаем к началу смены)
                     # Чем дальше от старта смены, тем больше штраф
-                    dist = s.period_number if w.group.shift == 1 else abs(s.period_number - 6)
-                    objectives.append(var * -(dist ** 2))
-
-                    if not w.teacher.is_vacancy:
-                        t_day = teacher_schedule.setdefault(w.teacher_id, {}).setdefault(s.day_of_week, {})
-                        t_day.setdefault(s.period_number, []).append(var)
+                    if not lean:  # облегченная модель добавит ее массивами (см. цель ниже)
+                        period = idx.slot_period[j]
+                        dist = period if shift == 1 else abs(period - 6)
+                        objectives.append(var * -(dist ** 2))
 
-            # Hard Constraint: Нагрузка должна быть выполнена полностью
-            if w_vars:
-                self.model.Add(sum(w_vars) == w.hours_per_week)
+                # Hard Constraint: Нагрузка должна быть выполнена полностью
+                if w_vars:
+                    self.model.Add(sum(w_vars) == w_hours[i])
 
         # "Магнит" окон: Даем огромный бонус за уроки, идущие подряд
-        for t_id, days in teacher_schedule.items():
-            for day, p_map in days.items():
+        skipped = 0  # вспомогательных пар (переменная + ограничение), которые не понадобились
+        with tel.phase("constraints.magnet", self.model):
+            for (t_id, day), p_map in idx.vars_by_teacher_day.items():
+                if idx.teacher_is_vacancy.get(t_id): continue
+
+                # Только уроки, где у учителя вообще есть переменные: остальные заведомо свободны
                 busy_at_period = {}
-                for p in range(1, 14):
-                    b_var = self.model.NewBoolVar(f'busy_t{t_id}_d{day}_p{p}')
-                    if p in p_map:
-                        self.model.Add(sum(p_map[p]) == b_var)
-                    else:
-                        self.model.Add(b_var == 0)
+                for p in sorted(p_map):
+                    b_var = self.model.NewBoolVar(f'busy_t{t_id}_d{day}_p{p}' if named else '')
+                    self.model.Add(sum(p_map[p]) == b_var)
                     busy_at_period[p] = b_var
 
-                for p in range(1, 13):
-                    is_consecutive = self.model.NewBoolVar(f'cons_t{t_id}_d{day}_p{p}')
+                day_periods = len(idx.slots_by_day[day])
+                skipped += day_periods - len(busy_at_period)
+                for p in busy_at_period:
+                    if p + 1 not in busy_at_period:
+                        continue
+                    is_consecutive = self.model.NewBoolVar(f'cons_t{t_id}_d{day}_p{p}' if named else '')
                     # Если занят в p и p+1 одновременно -> бонус
                     self.model.AddBoolAnd([busy_at_period[p], busy_at_period[p + 1]]).OnlyEnforceIf(is_consecutive)
                     objectives.append(is_consecutive * 5000)
+                    skipped -= 1
+                skipped += day_periods - 1
 
         # Главная цель — максимизация суммы всех бонусов и минимизация штрафов
-        self.model.Maximize(sum(objectives))
+        with tel.phase("objective"):
+            self.objectives = objectives
+            if lean:
+                # Гравитация — по переменной на слагаемое, поэтому сразу массивами в CpModelProto
+                # (в self.objectives ее нет — см. apply_hints)
+                rows, cols = np.nonzero(self.var_index >= 0)
+                period = snapshot.slot_period[cols].astype(np.int64)
+                dist = np.where(snapshot.w_shift[rows] == 1, period, np.abs(period - 6))
+                self.model.Maximize(cp_model.LinearExpr.Sum(objectives))
+                self._extend_objective(self.var_index[rows, cols][dist > 0], -(dist[dist > 0] ** 2))
+            else:
+                self.model.Maximize(sum(objectives))
 
         # 4. СТАНДАРТНЫЕ ЖЕСТКИЕ ПРАВИЛА (КОНФЛИКТЫ)
-        self._add_standard_constraints(teacher_schedule, workloads, slots, room_capacities, workloads_by_type)
-
-        # 5. ЗАПУСК ОПТИМИЗАТОРА
-        print(f"⏳ Решение запущено (лимит {self.solver.parameters.max_time_in_seconds} сек)...")
-        status = self.solver.Solve(self.model)
-
-        duration = time.time() - start_time
-        print(f"⏱ Время расчета: {duration:.2f} сек. Статус: {self.solver.StatusName(status)}")
-
-        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-            print(f"✅ Оценка качества (Objective): {self.solver.ObjectiveValue()}")
-            self._assign_rooms_greedy(workloads, slots, rooms)
-            return True
-
-        print("💥 Не удалось найти решение, удовлетворяющее всем ЖЕСТКИМ правилам.")
-        return False
-
-    def _apply_external_constraints(self, workloads, slots, objectives):
-        """Метод для обработки правил из constraints_config.py"""
-        group_ids = list(set(w.group_id for w in workloads))
-
-        for rule in GLOBAL_CONSTRAINTS:
-            # ПРАВИЛО: Запрет на N уроков подряд (например, 3 физики)
-            if rule["type"] == ConstraintType.MAX_CONTINUOUS:
-                for gid in group_ids:
-                    for subj_name in rule["subjects"]:
-                        for day in range(1, 6):
-                            day_slots = [s for s in slots if s.day_of_week == day]
-                            limit = rule["max_value"]
-                            for i in range(len(day_slots) - limit):
-                                window = day_slots[i: i + limit + 1]
-                                window_vars = [self.time_vars[(w.id, s.id)] for s in window
-                                               for w in workloads if w.group_id == gid
-                                               and w.subject.name == subj_name
-                                               and (w.id, s.id) in self.time_vars]
+        self._add_standard_constraints(room_capacities)
+
+        # 5. СИММЕТРИИ: взаимозаменяемые нагрузки не переставляем друг с другом
+        if symmetry:
+            self._break_symmetries(hints)
+
+        self.presolve_report = {
+            "variables": pre.n_vars,
+            "variables_removed": pre.n_removed,
+            "removed_by": pre.removed,
+            "helpers_skipped": skipped,
+            "constraints": len(self.model.Proto().constraints),
+            "impossible": pre.impossible,
+            "symmetry_classes": len(self.symmetry_classes),
+            "symmetric_workloads": sum(len(c) for c in self.symmetry_classes),
+        }
+        by = ", ".join(f"{k}: {v}" for k, v in pre.removed.items() if v)
+        print(f"✂️ Пресолв: переменных {pre.n_vars} из {pre.n_vars + pre.n_removed} "
+              f"(отсечено {pre.n_removed}{f' — {by}' if by else ''}); "
+              f"ограничений {self.presolve_report['constraints']}, "
+              f"вспомогательных не понадобилось {self.presolve_report['helpers_skipped']}.")
+        return self.model
+
+    def _break_symmetries(self, hints=None):
+        """
+        Классы взаимозаменяемых нагрузок (см. symmetry.py): первый урок каждой следующей
+        нагрузки класса — не раньше первого урока предыдущей. Любое решение перестановкой
+        внутри класса приводится к такому виду, поэтому оптимум не теряется.
+        hints — порядок внутри класса по подсказке, чтобы она оставалась допустимой.
+        """
+        if not self.symmetry_classes:
+            return
+        snap = self.snapshot
+        w_ids, n_s = snap.workload_ids.tolist(), snap.n_slots
+        s_pos = {sid: j for j, sid in enumerate(snap.slot_ids.tolist())}
+
+        in_classes = {w_ids[i] for members in self.symmetry_classes for i in members}
+        vars_by_wid = {}
+        for (wid, sid), var in self.time_vars.items():
+            if wid in in_classes:
+                vars_by_wid.setdefault(wid, []).append((s_pos[sid], var))
+        hinted_first = {}
+        for wid, sid in hints or ():
+            if wid in in_classes and sid in s_pos:
+                hinted_first[wid] = min(hinted_first.get(wid, n_s), s_pos[sid])
+
+        with self.telemetry.phase("constraints.symmetry", self.model):
+            for members in self.symmetry_classes:
+                firsts = []
+                for i in sorted(members, key=lambda i: hinted_first.get(w_ids[i], n_s)):
+                    wid = w_ids[i]
+                    # Номер слота первого урока (вместо невыбранных слотов — j + n_s, заведомо больше)
+                    first = self.model.NewIntVar(0, 2 * n_s, f'first_w{wid}')
+                    self.model.AddMinEquality(first, [j + n_s * (1 - var) for j, var in vars_by_wid[wid]])
+                    firsts.append(first)
+                for a, b in zip(firsts, firsts[1:]):
+                    self.model.Add(a <= b)
+
+    def apply_hints(self, hints, max_changes=None, keep_bonus=KEEP_BONUS):
+        """
+        Теплый старт: текущее расписание как подсказка (hint) для CP-SAT.
+        hints — пары (workload_id, slot_id) из ScheduleEntry.
+        max_changes — жесткий лимит: сколько уроков из подсказки можно сдвинуть.
+        keep_bonus — бонус в цели за каждый сохраненный урок (меньше перестановок).
+        """
+        hints = set(hints)
+        kept = []
+        for key, var in self.time_vars.items():
+            in_hint = key in hints
+            self.model.AddHint(var, in_hint)
+            if in_hint:
+                kept.append(var)
+
+        if not kept:
+            return 0
+
+        # Подсказка может частично не совпасть с новой моделью — решатель ее починит
+        self.allow_hint_repair()
+
+        if max_changes is not None:
+            self.model.Add(sum(kept) >= len(kept) - max_changes)
+        if keep_bonus and self.lean:
+            self._extend_objective([var.Index() for var in kept], np.full(len(kept), keep_bonus))
+        elif keep_bonus:
+            self.model.Maximize(sum(self.objectives) + keep_bonus * sum(kept))
+
+        print(f"🔥 Теплый старт: {len(kept)} из {len(hints)} уроков подсказки совпали с моделью.")
+        return len(kept)
+
+    def allow_hint_repair(self):
+        """
+        repair_hint — только в однопоточном поиске: при нескольких воркерах OR-Tools 9.15
+        роняет весь процесс (Check failed: heuristics.fixed_search), исключения не будет.
+        Вызывать после того, как задано num_search_workers.
+        """
+        params = self.solver.parameters
+        params.repair_hint = params.num_search_workers == 1
+
+    def _set_time_vars(self, snapshot, triples):
+        """
+        time_vars и var_index по тройкам (i, j, индекс переменной в CpModelProto).
+        Облегченная модель не держит словарь с объектами переменных (см. DenseVars).
+        """
+        self.var_index = np.full((snapshot.n_workloads, snapshot.n_slots), -1, dtype=np.int32)
+        self.var_index[triples[:, 0], triples[:, 1]] = triples[:, 2]
+        if self.lean:
+            self.time_vars = DenseVars(self.model, self.var_index, snapshot.workload_ids, snapshot.slot_ids)
+        else:
+            w_ids, s_ids = snapshot.workload_ids.tolist(), snapshot.slot_ids.tolist()
+            self.time_vars = {(w_ids[i], s_ids[j]): self.model.GetBoolVarFromProtoIndex(k)
+                              for i, j, k in triples.tolist()}
+
+    def _extend_objective(self, var_indices, coeffs):
+        """Дописать к цели (Maximize) слагаемые coeffs * переменные по индексам — прямо в CpModelProto."""
+        objective = self.model.Proto().objective
+        # Maximize хранится как минимизация: коэффициенты с обратным знаком, scaling_factor = -1
+        sign = int(objective.scaling_factor)
+        objective.vars.extend(np.asarray(var_indices, dtype=np.int64).tolist())
+        objective.coeffs.extend((np.asarray(coeffs, dtype=np.int64) * sign).tolist())
+
+    def _complete_hints(self, time_limit=10.0):
+        """
+        Подсказка по урокам -> полная (со вспомогательными переменными "магнита", симметрий):
+        копия модели с зафиксированными подсказанными значениями решается за доли секунды.
+        Неполную, но допустимую подсказку CP-SAT часто не достраивает сам и ищет с нуля.
+        """
+        proto = self.model.Proto()
+        fixed = self.model.Clone()  # с целью: бонусы "магнита" должны быть выставлены, а не просто допустимы
+        for k, value in zip(proto.solution_hint.vars, proto.solution_hint.values):
+            fixed.Add(fixed.GetIntVarFromProtoIndex(k) == value)
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit
+        with self.telemetry.phase("hints.complete"):
+            status = solver.Solve(fixed)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            print(f"⚠️ Подсказку не удалось достроить ({solver.StatusName(status)}) — решатель починит ее сам.")
+            return False
+        self.model.ClearHints()
+        for k in range(len(proto.variables)):
+            var = self.model.GetIntVarFromProtoIndex(k)
+            self.model.AddHint(var, solver.Value(var))
+        return True
+
+    def _apply_external_constraints(self, objectives):
+        """Правила школы (snapshot.rules, см. rules.py): предметы уже заданы id."""
+        idx = self.index
+
+        for rule in self.snapshot.rules:
+            with self.telemetry.phase(f"constraints.{rule.type.value}", self.model):
+                # ПРАВИЛО: Запрет на N уроков подряд (например, 3 физики)
+                if rule.type == ConstraintType.MAX_CONTINUOUS:
+                    limit = rule.max_value
+                    for gid, subj_id in idx.group_subject_pairs(rule.subject_ids):
+                        for day in idx.days:
+                            day_slots = idx.slots_by_day[day]
+                            for k in range(len(day_slots) - limit):
+                                window = day_slots[k: k + limit + 1]
+                                window_vars = [v for j in window
+                                               for v in idx.vars_by_group_subject_slot.get((gid, subj_id, j), ())]
                                 if window_vars:
                                     self.model.Add(sum(window_vars) <= limit)
 
-            # ПРАВИЛО: Лимит одного предмета в день для класса
-            elif rule["type"] == ConstraintType.MAX_PER_DAY:
-                for gid in group_ids:
-                    for subj_name in rule["subjects"]:
-                        for day in range(1, 6):
-                            daily_vars = [self.time_vars[(w.id, s.id)] for s in slots
-                                          for w in workloads if s.day_of_week == day
-                                          and w.group_id == gid and w.subject.name == subj_name
-                                          and (w.id, s.id) in self.time_vars]
+                # ПРАВИЛО: Лимит одного предмета в день для класса
+                elif rule.type == ConstraintType.MAX_PER_DAY:
+                    for gid, subj_id in idx.group_subject_pairs(rule.subject_ids):
+                        for day in idx.days:
+                            daily_vars = [v for j in idx.slots_by_day[day]
+                                          for v in idx.vars_by_group_subject_slot.get((gid, subj_id, j), ())]
                             if daily_vars:
-                                self.model.Add(sum(daily_vars) <= rule["max_value"])
-
-            # ПРАВИЛО: Приоритетные часы (Soft constraint)
-            elif rule["type"] == ConstraintType.PERIOD_PRIORITY:
-                for w in workloads:
-                    if w.subject.name in rule["subjects"]:
-                        for s in slots:
-                            if (w.id, s.id) in self.time_vars and s.period_number in rule["preferred_periods"]:
-                                objectives.append(self.time_vars[(w.id, s.id)] * rule["bonus"])
-
-    def _add_standard_constraints(self, teacher_schedule, workloads, slots, room_capacities, workloads_by_type):
-        # Учитель не может быть в двух местах
-        for t_days in teacher_schedule.values():
-            for p_map in t_days.values():
+                                self.model.Add(sum(daily_vars) <= rule.max_value)
+
+                # ПРАВИЛО: Приоритетные часы (Soft constraint)
+                elif rule.type == ConstraintType.PERIOD_PRIORITY:
+                    preferred = set(rule.preferred_periods)
+                    for subj_id in rule.subject_ids:
+                        for i in idx.by_subject.get(subj_id, ()):
+                            for j, var in idx.vars_by_workload[i]:
+                                if idx.slot_period[j] in preferred:
+                                    objectives.append(var * rule.bonus)
+
+    def _add_standard_constraints(self, room_capacities):
+        idx, tel = self.index, self.telemetry
+        whole_class = SUBGROUP_CODE[SubgroupType.WHOLE_CLASS]
+
+        with tel.phase("constraints.teacher", self.model):
+            # Учитель не может быть в двух местах
+            for (t_id, day), p_map in idx.vars_by_teacher_day.items():
+                if idx.teacher_is_vacancy.get(t_id): continue
                 for v_list in p_map.values():
                     self.model.Add(sum(v_list) <= 1)
 
-        # Класс не может быть на двух уроках (с учетом подгрупп)
-        group_vars = {}
-        for (wid, sid), var in self.time_vars.items():
-            w = next(x for x in workloads if x.id == wid)
-            group_vars.setdefault((w.group_id, sid), []).append((w.subgroup, var))
-
-        for (gid, sid), entries in group_vars.items():
-            whole_lesson = sum([v for sub, v in entries if sub == SubgroupType.WHOLE_CLASS])
-            self.model.Add(whole_lesson <= 1)
-            for sub, v in entries:
-                if sub != SubgroupType.WHOLE_CLASS:
-                    self.model.Add(whole_lesson + v <= 1)
-
-        # Кабинеты (не превышать вместимость)
-        for s in slots:
-            for rt, w_list in workloads_by_type.items():
-                vars_in = [self.time_vars[(w.id, s.id)] for w in w_list if (w.id, s.id) in self.time_vars]
-                if vars_in:
-                    limit = room_capacities.get(rt, room_capacities.get(RoomType.STANDARD, 0))
-                    if rt == RoomType.GYM and room_capacities.get(RoomType.GYM, 0) == 0:
-                        self.model.Add(sum(vars_in) == 0)
-                    else:
-                        self.model.Add(sum(vars_in) <= limit)
-
-    def _assign_rooms_greedy(self, workloads, slots, rooms):
-        """Распределение кабинетов после того, как сетка времени утверждена."""
-        final_schedule = []
-        active = [(wid, sid) for (wid, sid), var in self.time_vars.items() if self.solver.Value(var)]
-
-        from collections import defaultdict
-        s_map = defaultdict(list)
-        for wid, sid in active: s_map[sid].append(wid)
-
-        w_map = {w.id: w for w in workloads}
-        r_map = {r.id: r for r in rooms}
-
-        for sid, w_ids in s_map.items():
-            avail = list(r_map.values())
-            # Сначала даем кабинеты спец. предметам
-            curr_w = sorted([w_map[wid] for wid in w_ids],
-                            key=lambda x: 0 if x.required_room_type != RoomType.STANDARD else 1)
-
-            for w in curr_w:
-                cands = [r for r in avail if r.room_type == w.required_room_type]
-                if not cands and w.required_room_type != RoomType.GYM:
-                    cands = [r for r in avail if r.room_type == RoomType.STANDARD]
-
-                if cands:
-                    chosen = cands[0]
-                    avail.remove(chosen)
-                    final_schedule.append(ScheduleEntry(
-                        workload_id=w.id, timeslot_id=sid, room_id=chosen.id
-                    ))
-
-        db.session.query(ScheduleEntry).delete()
-        db.session.add_all(final_schedule)
-        db.session.commit()
\ No newline at end of file
+        with tel.phase("constraints.group", self.model):
+            # Класс не может быть на двух уроках (с учетом подгрупп)
+            for (gid, j), entries in idx.vars_by_group_slot.items():
+                whole_lesson = sum([v for sub, v in entries if sub == whole_class])
+                self.model.Add(whole_lesson <= 1)
+                for sub, v in entries:
+                    if sub != whole_class:
+                        self.model.Add(whole_lesson + v <= 1)
+
+        with tel.phase("constraints.rooms", self.model):
+            # Кабинеты (не превышать вместимость)
+            s_ids = self.snapshot.slot_ids.tolist()
+            for (rt, j), vars_in in idx.vars_by_room_type_slot.items():
+                limit = self.room_limits.get((rt, s_ids[j]), int(room_capacities[rt]))
+                self.model.Add(sum(vars_in) <= limit)
+
+    def lessons(self, value):
+        """Пары (workload_id, slot_id) решения; value — solver.Value или Value колбэка."""
+        return [(wid, sid) for (wid, sid), var in self.time_vars.items() if value(var)]
+
+    def active_lessons(self):
+        """Пары (workload_id, slot_id), выбранные решателем (или расписание фазы 1, см. _fall_back_to_feasible)."""
+        if self.from_feasibility:
+            return list(self.feasible_lessons)
+        return self.lessons(self.solver.Value)
+
+    def _assign_rooms(self, active):
+        """
+        Распределение кабинетов после того, как сетка времени утверждена (см. rooms.py).
+        Уроки, которым кабинет не нашелся, сохраняются без кабинета и попадают в self.unplaced.
+        """
+        with self.telemetry.phase("rooms"):
+            result = assign_rooms(self.snapshot, active)
+        self.unplaced = result.unplaced
+        if result.unplaced:
+            print(f"⚠️ Без кабинета осталось {len(result.unplaced)} уроков: {result.unplaced[:10]}"
+                  f"{' ...' if len(result.unplaced) > 10 else ''}")
+
+        final_schedule = [ScheduleEntry(workload_id=wid, timeslot_id=sid, room_id=rid)
+                          for wid, sid, rid in result.placed]
+        final_schedule += [ScheduleEntry(workload_id=wid, timeslot_id=sid, room_id=None)
+                           for wid, sid in result.unplaced]
+        return final_schedule
+
+    def _save_schedule(self, final_schedule):
+        with self.telemetry.phase("save"):
+            delete_school_schedule(self.school_id)
+            db.session.add_all(final_schedule)
+            materialize_views(self.school_id)  # сетки страниц — в той же транзакции, что и расписание
+            db.session.commit()
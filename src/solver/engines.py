@@ -0,0 +1,25 @@
+"""
+Варианты модели расписания с одним интерфейсом run_algorithm:
+  bool     — булева переменная на каждую пару (нагрузка, слот), см. engine.py (по умолчанию);
+  interval — интервал на урок, сдвоенные уроки одним блоком, см. intervals.py;
+  heuristic — без CP-SAT: жадное построение + табу-поиск, см. heuristic.py.
+"""
+from src.solver.engine import SchoolScheduler
+from src.solver.heuristic import HeuristicScheduler
+from src.solver.intervals import IntervalScheduler
+
+DEFAULT_ENGINE = "bool"
+
+ENGINES = {
+    "bool": SchoolScheduler,
+    "interval": IntervalScheduler,
+    "heuristic": HeuristicScheduler,
+}
+
+
+def get_engine(name=None):
+    """Класс планировщика по имени варианта (None — по умолчанию). ValueError для неизвестного имени."""
+    name = name or DEFAULT_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Неизвестный вариант модели: {name}. Доступны: {', '.join(ENGINES)}")
+    return ENGINES[name]
@@ -0,0 +1,187 @@
+"""
+Проверки допустимости до и после решения.
+
+precheck — очевидные границы за миллисекунды (NumPy, без CP-SAT): если нагрузка заведомо
+не помещается, нет смысла ждать весь лимит времени решателя. Все проверки "error" —
+строгие необходимые условия модели (нарушено — модель точно неразрешима); "warning" —
+подозрительные данные, которые модель не запрещает (например, перегрузка учителя).
+
+explain_infeasibility — если CP-SAT доказал неразрешимость: каждое семейство ограничений
+включается своим литералом-допущением (assumption), и решатель возвращает набор семейств,
+которых вместе уже достаточно для противоречия. Затем набор ужимается до минимального.
+"""
+import numpy as np
+from ortools.sat.python import cp_model
+
+from src.models.enums import SubgroupType
+from src.solver.snapshot import ROOM_TYPES, SUBGROUP_CODE
+from src.utils.constraints_config import ConstraintType
+
+# Семейства ограничений модели: фазы build_model "constraints.*" (см. SolveTelemetry.phase)
+FAMILY_PREFIX = "constraints."
+
+
+def _issue(check, severity, message, need, have, **ids):
+    return {"check": check, "severity": severity, "message": message,
+            "need": int(need), "have": int(have), **ids}
+
+
+def _union_by(positions, n, allowed):
+    """Слоты, допустимые хотя бы одной нагрузке каждой группы: bool[n, n_slots]."""
+    result = np.zeros((n, allowed.shape[1]), dtype=bool)
+    np.logical_or.at(result, positions, allowed)
+    return result
+
+
+def precheck(snap, pre):
+    """
+    Необходимые условия разрешимости по снимку и результату пресолва.
+    Возвращает список проблем [{"check", "severity", "message", "need", "have", ...}].
+    """
+    issues = []
+    allowed, hours = pre.allowed, snap.w_hours.astype(np.int64)
+    n_allowed = allowed.sum(axis=1)
+    w_ids = snap.workload_ids
+
+    # 1. Нагрузка: часов больше, чем допустимых слотов
+    for k in np.flatnonzero(hours > n_allowed).tolist():
+        issues.append(_issue("workload", "error",
+                             f"Нагрузка #{w_ids[k]}: {hours[k]} ч, а допустимых слотов {n_allowed[k]}",
+                             hours[k], n_allowed[k], workload_id=int(w_ids[k])))
+
+    # 2. Класс: уроки всем классом идут по одному в слот, урок подгруппы не совпадает с уроком класса
+    g_pos = np.searchsorted(snap.group_ids, snap.w_group)
+    n_groups = len(snap.group_ids)
+    whole = snap.w_subgroup == SUBGROUP_CODE[SubgroupType.WHOLE_CLASS]
+    g_need = np.bincount(g_pos, weights=hours * whole, minlength=n_groups).astype(np.int64)
+    g_split = np.zeros(n_groups, dtype=np.int64)
+    np.maximum.at(g_split, g_pos[~whole], hours[~whole])
+    g_need += g_split
+    g_have = _union_by(g_pos, n_groups, allowed).sum(axis=1)
+    for k in np.flatnonzero(g_need > g_have).tolist():
+        issues.append(_issue("group", "error",
+                             f"Класс #{snap.group_ids[k]}: нужно {g_need[k]} слотов, допустимо {g_have[k]}",
+                             g_need[k], g_have[k], group_id=int(snap.group_ids[k])))
+
+    # 3. Учитель: не больше одного урока в слот (кроме вакансий); max_hours — только предупреждение
+    t_pos = np.searchsorted(snap.teacher_ids, snap.w_teacher)
+    n_teachers = len(snap.teacher_ids)
+    t_need = np.bincount(t_pos, weights=hours, minlength=n_teachers).astype(np.int64)
+    t_have = _union_by(t_pos, n_teachers, allowed).sum(axis=1)
+    real = ~snap.teacher_is_vacancy
+    for k in np.flatnonzero(real & (t_need > t_have)).tolist():
+        issues.append(_issue("teacher", "error",
+                             f"Учитель #{snap.teacher_ids[k]}: {t_need[k]} ч, а доступных слотов {t_have[k]}",
+                             t_need[k], t_have[k], teacher_id=int(snap.teacher_ids[k])))
+    max_hours = snap.teacher_max_hours.astype(np.int64)
+    for k in np.flatnonzero(real & (max_hours > 0) & (t_need > max_hours)).tolist():
+        issues.append(_issue("teacher_max_hours", "warning",
+                             f"Учитель #{snap.teacher_ids[k]}: {t_need[k]} ч при норме {max_hours[k]}",
+                             t_need[k], max_hours[k], teacher_id=int(snap.teacher_ids[k])))
+
+    # 4. Кабинеты: часов одного типа не больше, чем кабинетов этого типа x допустимых слотов
+    capacities = snap.room_capacities().astype(np.int64)
+    n_types = len(capacities)
+    rt_need = np.bincount(pre.room_type, weights=hours, minlength=n_types).astype(np.int64)
+    rt_have = capacities * _union_by(pre.room_type.astype(np.int64), n_types, allowed).sum(axis=1)
+    for k in np.flatnonzero(rt_need > rt_have).tolist():
+        issues.append(_issue("rooms", "error",
+                             f"Кабинеты {ROOM_TYPES[k].value}: нужно {rt_need[k]} урок-слотов, есть {rt_have[k]}",
+                             rt_need[k], rt_have[k], room_type=ROOM_TYPES[k].value))
+
+    # 5. Правила школы (snapshot.rules): лимиты по (класс, предмет) в день
+    issues += _rule_checks(snap, allowed, hours, g_pos)
+    return issues
+
+
+def _rule_checks(snap, allowed, hours, g_pos):
+    issues = []
+    s_pos = np.searchsorted(snap.subject_ids, snap.w_subject)
+    key = g_pos * len(snap.subject_ids) + s_pos
+    pairs, inverse = np.unique(key, return_inverse=True)
+    inverse = inverse.ravel()
+    pair_hours = np.bincount(inverse, weights=hours, minlength=len(pairs)).astype(np.int64)
+    pair_allowed = _union_by(inverse, len(pairs), allowed)
+    pair_group = snap.group_ids[pairs // len(snap.subject_ids)]
+    pair_subject = pairs % len(snap.subject_ids)
+
+    days = np.unique(snap.slot_day)
+    day_len = np.array([(snap.slot_day == d).sum() for d in days.tolist()], dtype=np.int64)
+    per_day = np.stack([pair_allowed[:, snap.slot_day == d].sum(axis=1) for d in days.tolist()], axis=1) \
+        if len(days) else np.zeros((len(pairs), 0), dtype=np.int64)
+
+    for rule in snap.rules:
+        rtype = rule.type
+        if rtype not in (ConstraintType.MAX_PER_DAY, ConstraintType.MAX_CONTINUOUS):
+            continue
+        wanted = np.isin(pair_subject, np.searchsorted(snap.subject_ids, rule.subject_ids))
+        limit = rule.max_value
+        if rtype == ConstraintType.MAX_PER_DAY:
+            have = np.minimum(per_day, limit).sum(axis=1)
+        else:
+            # Не больше limit подряд: в дне из P уроков — не больше P - P // (limit + 1)
+            have = np.minimum(per_day, day_len - day_len // (limit + 1)).sum(axis=1)
+
+        for k in np.flatnonzero(wanted & (pair_hours > have)).tolist():
+            subject = snap.subject_names[pair_subject[k]]
+            issues.append(_issue(rtype.value, "error",
+                                 f"Класс #{pair_group[k]}, {subject}: {pair_hours[k]} ч, "
+                                 f"а правило {rtype.value} (≤ {limit}) допускает {have[k]}",
+                                 pair_hours[k], have[k], group_id=int(pair_group[k]), subject=subject))
+    return issues
+
+
+def explain_infeasibility(scheduler, snapshot, time_limit=10.0):
+    """
+    Минимальный набор семейств ограничений, несовместимых вместе.
+    scheduler — новый SchoolScheduler (модель строится заново, цель не нужна).
+    Возвращает список семейств (например ["teacher", "max_per_day"]) или None, если за
+    time_limit противоречие не подтвердилось.
+    """
+    model, solver = scheduler.model, scheduler.solver
+    scheduler.build_model(snapshot)
+    model.ClearObjective()
+
+    proto = model.Proto()
+    literals = {}
+    for name, ranges in scheduler.telemetry.constraint_ranges.items():
+        if not name.startswith(FAMILY_PREFIX):
+            continue
+        lit = model.NewBoolVar(f"family_{name}")
+        for start, end in ranges:
+            for k in range(start, end):
+                proto.constraints[k].enforcement_literal.append(lit.Index())
+        literals[name[len(FAMILY_PREFIX):]] = lit
+
+    params = solver.parameters
+    params.max_time_in_seconds = time_limit
+    params.num_search_workers = 1  # ядро по допущениям строится только в однопоточном поиске
+    params.log_search_progress = False
+
+    def infeasible(families):
+        model.ClearAssumptions()
+        model.AddAssumptions([literals[f] for f in families])
+        return solver.Solve(model) == cp_model.INFEASIBLE
+
+    if not infeasible(list(literals)):
+        return None
+    names = {lit.Index(): f for f, lit in literals.items()}
+    core = [names[k] for k in solver.SufficientAssumptionsForInfeasibility()]
+
+    # Достаточный набор -> минимальный: выбрасываем по одному семейству, пока противоречие остается
+    for family in list(core):
+        rest = [f for f in core if f != family]
+        if rest and infeasible(rest):
+            core = rest
+    return core
+
+
+def describe_infeasibility(info, limit=3):
+    """Короткое описание причины для сообщения задачи."""
+    if info.get("checks"):
+        checks = info["checks"]
+        text = "; ".join(c["message"] for c in checks[:limit])
+        return text + (f" (и еще {len(checks) - limit})" if len(checks) > limit else "")
+    if info.get("core"):
+        return "противоречат ограничения " + ", ".join(info["core"])
+    return "решение не существует"
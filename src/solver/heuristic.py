@@ -0,0 +1,376 @@
+"""
+Эвристический вариант (без CP-SAT): жадное построение + табу-поиск на массивах занятости.
+
+Для очень больших школ и быстрого предпросмотра ("как примерно будет выглядеть").
+Вход — тот же ProblemSnapshot, выход — те же ScheduleEntry (через SchoolScheduler._save_schedule).
+Оптимальность не гарантируется; допустимость — только если поиск довел нарушения до нуля.
+
+Состояние — матрицы занятости на оси времени (как в intervals.py: день * ширина + урок,
+между днями пустая позиция): учитель, класс (весь класс / подгруппы), тип кабинета,
+нагрузка, пара (класс, предмет) для правил. Стоимость урока в каждой допустимой позиции
+считается вектором сразу по всем позициям:
+    BIG * нарушения жестких правил - (гравитация + приоритетные уроки + "магнит" учителя)
+— та же цель, что у булевой модели, с теми же жесткими правилами.
+
+  * построение: нагрузки от самых стесненных (мало допустимых слотов на час), каждый урок —
+    в самую дешевую позицию;
+  * табу-поиск: урок (чаще — из конфликтных) переносится в лучшую позицию (или остается),
+    возврат на покинутое место запрещен TABU_TENURE итераций, если только это не новый рекорд.
+
+Найденное расписание годится и как подсказка (hint) для CP-SAT — см. heuristic_hints.
+"""
+import time
+
+import numpy as np
+
+from src.models.enums import SubgroupType
+from src.solver.engine import SchoolScheduler
+from src.solver.presolve import presolve
+from src.solver.snapshot import SUBGROUP_CODE
+from src.utils.constraints_config import ConstraintType
+
+HEURISTIC_TIME_LIMIT = 3.0   # сек на построение и поиск
+BIG = 1_000_000              # штраф за нарушение жесткого правила (больше любой мягкой цели урока)
+FORBIDDEN = BIG ** 2         # позиция недопустима (второй урок той же нагрузки в слоте)
+MAGNET_BONUS = 5000          # как в булевой модели
+TABU_TENURE = 12
+CONFLICT_FOCUS = 0.8         # доля итераций, которые трогают конфликтные уроки
+MAX_STALL = 5000             # итераций без рекорда при нуле нарушений — поиск закончен
+
+
+class TimetableState:
+    """Размещение уроков и матрицы занятости. Уроки — по одному на каждый час нагрузки."""
+
+    def __init__(self, snap, pre, seed=42):
+        self.rng = np.random.default_rng(seed)
+
+        # Ось времени
+        days = np.unique(snap.slot_day)
+        self.n_days = len(days)
+        self.width = int(snap.slot_period.max(initial=0)) + 2
+        self.horizon = self.n_days * self.width + 1
+        self.slot_pos = np.searchsorted(days, snap.slot_day) * self.width + snap.slot_period.astype(np.int64) + 1
+        self.slot_at = np.full(self.horizon, -1, dtype=np.int64)
+        self.slot_at[self.slot_pos] = np.arange(snap.n_slots)
+        self.day_of = np.arange(self.horizon) // self.width
+        self.period_of = np.zeros(self.horizon, dtype=np.int64)
+        self.period_of[self.slot_pos] = snap.slot_period
+
+        # Нагрузки: учитель (-1 — вакансия, без конфликтов), класс, подгруппа, тип кабинета
+        n_w = snap.n_workloads
+        t_pos = np.searchsorted(snap.teacher_ids, snap.w_teacher)
+        self.w_teacher = np.where(snap.teacher_is_vacancy[t_pos], -1, t_pos)
+        self.w_group = np.searchsorted(snap.group_ids, snap.w_group)
+        self.w_whole = snap.w_subgroup == SUBGROUP_CODE[SubgroupType.WHOLE_CLASS]
+        self.w_room = pre.room_type.astype(np.int64)
+        self.capacity = snap.room_capacities().astype(np.int64)
+        self.w_positions = [np.sort(self.slot_pos[np.flatnonzero(pre.allowed[i])]) for i in range(n_w)]
+
+        # Мягкая цель урока по позиции: гравитация к началу смены + приоритетные уроки
+        dist = np.where(snap.w_shift.reshape(-1, 1) == 1, self.period_of, np.abs(self.period_of - 6))
+        self.score = -(dist ** 2)
+        self._rules(snap)
+
+        # Уроки
+        hours = np.where(pre.allowed.any(axis=1), np.maximum(snap.w_hours, 0), 0).astype(np.int64)
+        self.lesson_w = np.repeat(np.arange(n_w), hours)
+        self.lesson_pos = np.full(len(self.lesson_w), -1, dtype=np.int64)
+
+        h = self.horizon
+        self.teacher = np.zeros((len(snap.teacher_ids), h), dtype=np.int32)
+        self.whole = np.zeros((len(snap.group_ids), h), dtype=np.int32)
+        self.sub = np.zeros((len(snap.group_ids), h), dtype=np.int32)
+        self.room = np.zeros((len(self.capacity), h), dtype=np.int32)
+        self.workload = np.zeros((n_w, h), dtype=np.int32)
+        self.pair = np.zeros((self.n_pairs, h), dtype=np.int32)
+        self.soft_total = 0   # мягкая цель (как Objective булевой модели)
+
+    def _rules(self, snap):
+        """Правила школы (snapshot.rules): бонусы приоритетных уроков в score, лимиты — по парам (класс, предмет)."""
+        key = self.w_group * len(snap.subject_ids) + np.searchsorted(snap.subject_ids, snap.w_subject)
+        pairs, self.pair_of = np.unique(key, return_inverse=True)
+        self.pair_of = self.pair_of.ravel()
+        self.n_pairs = len(pairs)
+        self.w_rules = [[] for _ in range(snap.n_workloads)]
+        self.rules = []   # [(тип, лимит, bool[n_pairs])]
+
+        for rule in snap.rules:
+            wanted = np.isin(snap.w_subject, rule.subject_ids)
+            if rule.type == ConstraintType.PERIOD_PRIORITY:
+                preferred = np.isin(self.period_of, rule.preferred_periods)
+                self.score = self.score + np.outer(wanted, preferred) * rule.bonus
+            elif rule.type in (ConstraintType.MAX_PER_DAY, ConstraintType.MAX_CONTINUOUS):
+                pair_mask = np.zeros(self.n_pairs, dtype=bool)
+                pair_mask[self.pair_of[wanted]] = True
+                self.rules.append((rule.type, rule.max_value, pair_mask))
+                for i in np.flatnonzero(wanted).tolist():
+                    self.w_rules[i].append((rule.type, rule.max_value))
+
+    # --- Изменение состояния ---
+
+    def _update(self, lesson, pos, sign):
+        i = self.lesson_w[lesson]
+        t, g = self.w_teacher[i], self.w_group[i]
+        if t >= 0:
+            # "Магнит": соседние занятые позиции учителя (до изменения занятости)
+            busy = self.teacher[t]
+            if busy[pos] == (0 if sign > 0 else 1):
+                self.soft_total += sign * MAGNET_BONUS * (int(busy[pos - 1] > 0) + int(busy[pos + 1] > 0))
+            busy[pos] += sign
+        (self.whole if self.w_whole[i] else self.sub)[g, pos] += sign
+        self.room[self.w_room[i], pos] += sign
+        self.workload[i, pos] += sign
+        self.pair[self.pair_of[i], pos] += sign
+        self.soft_total += sign * int(self.score[i, pos])
+        self.lesson_pos[lesson] = pos if sign > 0 else -1
+
+    def place(self, lesson, pos):
+        self._update(lesson, pos, 1)
+
+    def remove(self, lesson):
+        self._update(lesson, self.lesson_pos[lesson], -1)
+
+    # --- Стоимость ---
+
+    def costs(self, i):
+        """(позиции, стоимость) урока нагрузки i в каждой допустимой позиции при текущей занятости."""
+        positions = self.w_positions[i]
+        t, g, rt, p = self.w_teacher[i], self.w_group[i], self.w_room[i], self.pair_of[i]
+
+        hard = self.whole[g, positions].astype(np.int64)
+        if self.w_whole[i]:
+            hard += self.sub[g, positions]
+        hard += self.room[rt, positions] >= self.capacity[rt]
+        soft = self.score[i, positions].astype(np.int64)
+        if t >= 0:
+            busy = self.teacher[t]
+            hard += busy[positions]
+            free = busy[positions] == 0
+            soft += MAGNET_BONUS * free * ((busy[positions - 1] > 0).astype(np.int64) + (busy[positions + 1] > 0))
+
+        occupied = self.pair[p] > 0
+        for kind, limit in self.w_rules[i]:
+            if kind == ConstraintType.MAX_PER_DAY:
+                per_day = np.bincount(self.day_of, weights=self.pair[p], minlength=self.n_days + 1)
+                hard += per_day[self.day_of[positions]] >= limit
+            else:
+                # Окна из limit + 1 позиций с этой позицией, где остальные уже заняты
+                for k in range(limit + 1):
+                    full = np.ones(len(positions), dtype=bool)
+                    for q in range(limit + 1):
+                        if q != k:
+                            full &= np.take(occupied, positions - k + q, mode="clip")
+                    hard += full
+
+        cost = BIG * hard - soft
+        cost[self.workload[i, positions] > 0] = FORBIDDEN
+        return positions, cost
+
+    def hard_total(self):
+        """Число нарушений жестких правил (пары конфликтов, превышения вместимости и лимитов)."""
+        total = int((self.teacher * (self.teacher - 1) // 2).sum())
+        total += int((self.whole * (self.whole - 1) // 2).sum() + (self.whole * self.sub).sum())
+        total += int(np.maximum(self.room - self.capacity.reshape(-1, 1), 0).sum())
+        for kind, limit, pair_mask in self.rules:
+            occ = self.pair[pair_mask]
+            if kind == ConstraintType.MAX_PER_DAY:
+                per_day = occ[:, :-1].reshape(len(occ), self.n_days, self.width).sum(axis=2)
+                total += int(np.maximum(per_day - limit, 0).sum())
+            else:
+                total += int(self._full_windows(occ > 0, limit).sum())
+        return total
+
+    @staticmethod
+    def _full_windows(busy, limit):
+        """bool[пары, начало окна]: все limit + 1 позиций окна заняты."""
+        n = busy.shape[1] - limit
+        full = busy[:, :n].copy()
+        for q in range(1, limit + 1):
+            full &= busy[:, q:q + n]
+        return full
+
+    def conflicted(self):
+        """Уроки, участвующие хотя бы в одном нарушении."""
+        lw, pos = self.lesson_w, self.lesson_pos
+        t, g, rt, p = self.w_teacher[lw], self.w_group[lw], self.w_room[lw], self.pair_of[lw]
+        whole = self.w_whole[lw]
+
+        bad = np.where(whole, self.whole[g, pos] + self.sub[g, pos] > 1, self.whole[g, pos] > 0)
+        bad |= (t >= 0) & (self.teacher[np.maximum(t, 0), pos] > 1)
+        bad |= self.room[rt, pos] > self.capacity[rt]
+        for kind, limit, pair_mask in self.rules:
+            in_rule = pair_mask[p]
+            if kind == ConstraintType.MAX_PER_DAY:
+                per_day = self.pair[:, :-1].reshape(self.n_pairs, self.n_days, self.width).sum(axis=2)
+                day = np.minimum(self.day_of[pos], self.n_days - 1)
+                bad |= in_rule & (per_day[p, day] > limit)
+            else:
+                full = self._full_windows(self.pair > 0, limit)
+                # Позиция внутри полного окна: окно начинается в pos - k, k = 0..limit
+                covered = np.zeros_like(self.pair, dtype=bool)
+                for k in range(limit + 1):
+                    covered[:, k:k + full.shape[1]] |= full
+                bad |= in_rule & covered[p, pos]
+        return np.flatnonzero(bad)
+
+    # --- Построение и поиск ---
+
+    def construct(self):
+        """Жадно: нагрузки от самых стесненных, каждый урок — в самую дешевую позицию."""
+        n_w = len(self.w_positions)
+        hours = np.bincount(self.lesson_w, minlength=n_w)
+        slack = np.array([len(p) for p in self.w_positions]) - hours
+        teacher_hours = np.bincount(np.maximum(self.w_teacher, 0), weights=hours * (self.w_teacher >= 0))
+        order = np.lexsort((-hours, -teacher_hours[np.maximum(self.w_teacher, 0)] * (self.w_teacher >= 0), slack))
+        first = np.searchsorted(self.lesson_w, np.arange(n_w))
+        for i in order.tolist():
+            for lesson in range(first[i], first[i] + hours[i]):
+                positions, cost = self.costs(i)
+                self.place(lesson, positions[self._pick(cost)])
+
+    def _pick(self, cost):
+        """Индекс минимума, равные — случайно."""
+        best = np.flatnonzero(cost == cost.min())
+        return best[0] if len(best) == 1 else self.rng.choice(best)
+
+    def search(self, deadline, stop=None):
+        """Табу-поиск до deadline (time.time()). Лучшее размещение остается в lesson_pos."""
+        n_l = len(self.lesson_w)
+        if not n_l:
+            return {"iterations": 0, "improvements": 0}
+        tabu = np.zeros_like(self.workload)
+        hard = self.hard_total()
+        current = BIG * hard - self.soft_total
+        best_cost, best_pos = current, self.lesson_pos.copy()
+        conflicted = self.conflicted() if hard else np.empty(0, dtype=np.int64)
+        it = improvements = stall = 0
+
+        while time.time() < deadline and not (stop and stop()):
+            it += 1
+            if it % 100 == 0:
+                conflicted = self.conflicted() if hard else conflicted[:0]
+            if len(conflicted) and self.rng.random() < CONFLICT_FOCUS:
+                lesson = int(self.rng.choice(conflicted))
+            else:
+                lesson = int(self.rng.integers(n_l))
+
+            i, old = self.lesson_w[lesson], self.lesson_pos[lesson]
+            self.remove(lesson)
+            positions, cost = self.costs(i)
+            delta = cost - cost[np.searchsorted(positions, old)]
+            tabu_move = (tabu[i, positions] > it) & (current + delta >= best_cost)
+            candidates = np.flatnonzero((cost < FORBIDDEN) & ~tabu_move)
+            if not len(candidates):
+                self.place(lesson, old)
+                continue
+            k = candidates[self._pick(delta[candidates])]
+            self.place(lesson, positions[k])
+            tabu[i, old] = it + TABU_TENURE
+            current += int(delta[k])
+            hard = max(0, hard + int(round(delta[k] / BIG)))
+
+            if current < best_cost:
+                best_cost, best_pos = current, self.lesson_pos.copy()
+                improvements += 1
+                stall = 0
+            else:
+                stall += 1
+                if best_cost < BIG and stall > MAX_STALL:
+                    break
+
+        self._restore(best_pos)
+        return {"iterations": it, "improvements": improvements}
+
+    def _restore(self, positions):
+        for lesson in range(len(self.lesson_w)):
+            if self.lesson_pos[lesson] != positions[lesson]:
+                self.remove(lesson)
+        for lesson in range(len(self.lesson_w)):
+            if self.lesson_pos[lesson] < 0:
+                self.place(lesson, positions[lesson])
+
+    def active(self, snap):
+        """Пары (workload_id, slot_id) текущего размещения."""
+        w_ids, s_ids = snap.workload_ids, snap.slot_ids
+        return list(zip(w_ids[self.lesson_w].tolist(), s_ids[self.slot_at[self.lesson_pos]].tolist()))
+
+
+def heuristic_schedule(snap, pre=None, time_limit=HEURISTIC_TIME_LIMIT, seed=42, stop=None):
+    """
+    Расписание без CP-SAT: ([(workload_id, slot_id)], info).
+    info: hard_violations (0 — расписание допустимо), objective, iterations, секунды фаз.
+    """
+    started = time.time()
+    pre = pre if pre is not None else presolve(snap)
+    state = TimetableState(snap, pre, seed)
+    state.construct()
+    constructed = time.time()
+    construct_violations = state.hard_total()
+    search = state.search(started + time_limit, stop)
+    info = {
+        "hard_violations": state.hard_total(),
+        "construct_violations": construct_violations,
+        "objective": state.soft_total,
+        "lessons": len(state.lesson_w),
+        "construct_seconds": round(constructed - started, 3),
+        "search_seconds": round(time.time() - constructed, 3),
+        **search,
+    }
+    return state.active(snap), info
+
+
+def heuristic_hints(snap, blocked_slots=(), time_limit=HEURISTIC_TIME_LIMIT):
+    """Подсказка для CP-SAT (apply_hints): эвристическое расписание, даже если нарушения остались."""
+    active, info = heuristic_schedule(snap, presolve(snap, blocked_slots), time_limit)
+    print(f"🧭 Эвристическая подсказка: {len(active)} уроков, нарушений {info['hard_violations']}, "
+          f"{info['construct_seconds'] + info['search_seconds']:.1f} сек.")
+    return active
+
+
+class HeuristicScheduler(SchoolScheduler):
+    engine = "heuristic"
+
+    def __init__(self, school_id, profile=None):
+        super().__init__(school_id, profile)
+        self.time_limit = HEURISTIC_TIME_LIMIT
+        self.seed = 42
+
+    def run_algorithm(self, snapshot, decompose=None, hints=None, max_changes=None, portfolio=False, replay=None):
+        if decompose or portfolio or replay or hints:
+            raise ValueError("Эвристика поддерживает только одиночный расчет "
+                             "(без декомпозиции, портфеля, повтора и теплого старта)")
+        start_time = time.time()
+        ok = False
+        try:
+            if not self._precheck(snapshot):
+                return False
+            ok = self._run_heuristic(snapshot)
+            return ok
+        finally:
+            self._record_run(snapshot, "single", ok, time.time() - start_time)
+
+    def _run_heuristic(self, snapshot):
+        print(f"🧠 ЗАПУСК ЭВРИСТИКИ: {snapshot.n_workloads} нагрузок, лимит {self.time_limit} сек.")
+        tel = self.telemetry
+        self.snapshot = snapshot
+        with tel.phase("presolve"):
+            pre = presolve(snapshot, self.blocked_slots)
+        with tel.phase("solve"):
+            active, info = heuristic_schedule(snapshot, pre, self.time_limit, self.seed,
+                                              stop=lambda: self.stop_requested)
+        feasible = info["hard_violations"] == 0
+        tel.stats["heuristic"] = info
+        tel.stats.update(status="FEASIBLE" if feasible else "INFEASIBLE", objective=info["objective"])
+        print(f"⏱ Эвристика: построение {info['construct_seconds']:.2f} сек "
+              f"(нарушений {info['construct_violations']}), поиск {info['search_seconds']:.2f} сек "
+              f"({info['iterations']} итераций), нарушений {info['hard_violations']}, "
+              f"objective={info['objective']}.")
+
+        if self.stop_requested and not self.keep_best:
+            print("⛔ Расчет остановлен по запросу — расписание не сохранено.")
+            return False
+        if not feasible:
+            print("💥 Эвристика не нашла расписание без нарушений — попробуйте решатель CP-SAT.")
+            return False
+        self._save_schedule(self._assign_rooms(active))
+        return True
@@ -0,0 +1,109 @@
+from collections import defaultdict
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class ConstraintIndex:
+    """
+    Предвычисленные индексы для построения модели.
+    Все семейства ограничений читают переменные отсюда, а не перебирают
+    списки нагрузок заново — построение модели идет за ~линейное время.
+
+    Работает поверх ProblemSnapshot: нагрузки и слоты адресуются позициями
+    i / j в колонках снимка.
+    """
+
+    def __init__(self, snap):
+        self.snap = snap
+
+        # Колонки снимка один раз переводим в списки Python (быстрее, чем numpy-скаляры в циклах)
+        self.w_teacher = snap.w_teacher.tolist()
+        self.w_group = snap.w_group.tolist()
+        self.w_subject = snap.w_subject.tolist()
+        self.w_room_type = snap.w_room_type.tolist()
+        self.w_subgroup = snap.w_subgroup.tolist()
+        self.w_shift = snap.w_shift.tolist()
+        self.slot_day = snap.slot_day.tolist()
+        self.slot_period = snap.slot_period.tolist()
+
+        self.teacher_is_vacancy = dict(zip(snap.teacher_ids.tolist(), snap.teacher_is_vacancy.tolist()))
+
+        # Нагрузки по ключам (значения — позиции i)
+        self.by_group = defaultdict(list)          # group_id -> [i]
+        self.by_subject = defaultdict(list)        # subject_id -> [i]
+        self.by_group_subject = defaultdict(list)  # (group_id, subject_id) -> [i]
+        self.by_teacher = defaultdict(list)        # teacher_id -> [i]
+        self.by_room_type = defaultdict(list)      # код RoomType -> [i]
+
+        for i in range(snap.n_workloads):
+            self.by_group[self.w_group[i]].append(i)
+            self.by_subject[self.w_subject[i]].append(i)
+            self.by_group_subject[(self.w_group[i], self.w_subject[i])].append(i)
+            self.by_teacher[self.w_teacher[i]].append(i)
+            self.by_room_type[self.w_room_type[i]].append(i)
+
+        # Временная сетка (значения — позиции j; снимок уже отсортирован по дню и уроку)
+        self.slots_by_day = defaultdict(list)      # day -> [j по порядку уроков]
+        for j in range(snap.n_slots):
+            self.slots_by_day[self.slot_day[j]].append(j)
+        self.days = sorted(self.slots_by_day)
+
+        # Переменные решения (заполняются через add_var)
+        self.vars_by_workload = defaultdict(list)          # i -> [(j, var)]
+        self.vars_by_group_slot = defaultdict(list)        # (group_id, j) -> [(код подгруппы, var)]
+        self.vars_by_teacher_day = defaultdict(lambda: defaultdict(list))  # (teacher_id, day) -> period -> [var]
+        self.vars_by_room_type_slot = defaultdict(list)    # (код RoomType, j) -> [var]
+        self.vars_by_group_subject_slot = defaultdict(list)  # (group_id, subject_id, j) -> [var]
+
+    def add_var(self, i, j, var):
+        """Регистрирует переменную (нагрузка i, слот j) во всех индексах сразу."""
+        self.vars_by_workload[i].append((j, var))
+        self.vars_by_group_slot[(self.w_group[i], j)].append((self.w_subgroup[i], var))
+        self.vars_by_teacher_day[(self.w_teacher[i], self.slot_day[j])][self.slot_period[j]].append(var)
+        self.vars_by_room_type_slot[(self.w_room_type[i], j)].append(var)
+        self.vars_by_group_subject_slot[(self.w_group[i], self.w_subject[i], j)].append(var)
+
+    def group_subject_pairs(self, subject_ids):
+        """Пары (group_id, subject_id) предметов правила, реально встречающиеся в нагрузке."""
+        wanted = set(subject_ids)
+        return [key for key in self.by_group_subject if key[1] in wanted]
+
+
+class DenseVars(Mapping):
+    """
+    time_vars облегченной модели (см. SchoolScheduler.lean): (workload_id, slot_id) -> BoolVar
+    поверх плотного массива индексов var_index[i, j] (-1 — переменной нет).
+    Кортежи-ключи и объекты переменных создаются только при обращении.
+    """
+
+    def __init__(self, model, var_index, workload_ids, slot_ids):
+        self.model = model
+        self.var_index = var_index
+        self.workload_ids = np.asarray(workload_ids)
+        self.slot_ids = np.asarray(slot_ids)
+        self.w_pos = {wid: i for i, wid in enumerate(self.workload_ids.tolist())}
+        self.s_pos = {sid: j for j, sid in enumerate(self.slot_ids.tolist())}
+
+    def __getitem__(self, key):
+        wid, sid = key
+        if wid not in self.w_pos or sid not in self.s_pos:
+            raise KeyError(key)
+        k = int(self.var_index[self.w_pos[wid], self.s_pos[sid]])
+        if k < 0:
+            raise KeyError(key)
+        return self.model.GetBoolVarFromProtoIndex(k)
+
+    def __iter__(self):
+        rows, cols = np.nonzero(self.var_index >= 0)
+        return zip(self.workload_ids[rows].tolist(), self.slot_ids[cols].tolist())
+
+    def __len__(self):
+        return int(np.count_nonzero(self.var_index >= 0))
+
+    def items(self):
+        rows, cols = np.nonzero(self.var_index >= 0)
+        var_of = self.model.GetBoolVarFromProtoIndex
+        for wid, sid, k in zip(self.workload_ids[rows].tolist(), self.slot_ids[cols].tolist(),
+                               self.var_index[rows, cols].tolist()):
+            yield (wid, sid), var_of(k)
@@ -0,0 +1,365 @@
+"""
+Интервальный вариант модели (тот же интерфейс run_algorithm, что у SchoolScheduler).
+
+Вместо булевой переменной на каждую пару (нагрузка, слот) каждый урок — интервал
+на оси времени: одна целочисленная переменная начала на блок. Сдвоенные уроки
+(лабораторные, физкультура) — нативно, один интервал длины 2.
+
+Ось времени: позиция = номер дня * ширина дня + номер урока; между днями есть пустая
+позиция, поэтому блок не может "перетечь" на следующий день, а соседние позиции — это
+всегда соседние уроки одного дня.
+
+Ограничения:
+  * учитель — AddNoOverlap по всем его интервалам (кроме вакансий);
+  * класс — AddNoOverlap по каждому "сегменту" учеников: урок всем классом попадает во все
+    сегменты, урок подгруппы — в сегменты своей подгруппы (подгруппы одного разбиения
+    идут одновременно, разных разбиений — пересекаются по ученикам);
+  * кабинеты — AddCumulative по типу кабинета (вместимость = число кабинетов типа);
+  * правила школы (snapshot.rules) — через литералы "блок начинается в t" (только там, где нужны).
+Цель та же, что у булевой модели: гравитация к началу смены, приоритетные уроки
+(таблица по позиции начала, AddElement) и "магнит" соседних уроков учителя.
+
+Декомпозиция и портфель работают только с булевой моделью.
+"""
+import itertools
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from src.models.enums import RoomType, SubgroupType
+from src.solver.engine import SchoolScheduler, KEEP_BONUS
+from src.solver.presolve import presolve
+from src.solver.snapshot import ROOM_TYPE_CODE, SUBGROUP_CODE
+from src.utils.constraints_config import ConstraintType
+
+# Сдвоенный урок раз в неделю (если часов >= 2): лабораторные и физкультура
+DOUBLE_PERIOD_TYPES = {ROOM_TYPE_CODE[t] for t in (RoomType.LAB_PHYSICS, RoomType.LAB_CHEMISTRY,
+                                                     RoomType.LAB_BIO, RoomType.GYM)}
+
+# Разбиения класса: подгруппы одного разбиения могут идти одновременно
+SUBGROUP_PARTITIONS = (
+    (SUBGROUP_CODE[SubgroupType.GROUP_1], SUBGROUP_CODE[SubgroupType.GROUP_2]),
+    (SUBGROUP_CODE[SubgroupType.BOYS], SUBGROUP_CODE[SubgroupType.GIRLS]),
+)
+
+# Бонус за пару соседних уроков учителя (как "магнит" булевой модели)
+MAGNET_BONUS = 5000
+
+
+@dataclass
+class Block:
+    """Урок (или сдвоенный урок) нагрузки на оси времени."""
+    i: int              # позиция нагрузки в снимке
+    k: int              # номер блока внутри нагрузки
+    length: int
+    starts: list        # допустимые позиции начала
+    start: object = None
+    interval: object = None
+    literals: dict = None   # позиция -> BoolVar "начинается здесь" (создаются по требованию)
+
+
+class IntervalScheduler(SchoolScheduler):
+    engine = "interval"
+
+    def __init__(self, school_id, profile=None):
+        super().__init__(school_id, profile)
+        self.double_periods = True
+        self.blocks = []
+
+    def cache_variant(self):
+        return f"{self.engine}:{int(self.double_periods)}"
+
+    def run_algorithm(self, snapshot, decompose=None, hints=None, max_changes=None, portfolio=False, replay=None):
+        if decompose or portfolio or replay:
+            raise ValueError("Интервальная модель поддерживает только одиночный расчет "
+                             "(без декомпозиции, портфеля и повтора)")
+        return super().run_algorithm(snapshot, hints=hints, max_changes=max_changes)
+
+    def _build_or_load(self, snapshot, key, hints=None):
+        """Кэш моделей хранит булевы time_vars — интервальную модель всегда строим заново."""
+        return self.build_model(snapshot, hints)
+
+    # --- Ось времени ---
+
+    def _axis(self, snap):
+        days = sorted(set(snap.slot_day.tolist()))
+        day_pos = {d: k for k, d in enumerate(days)}
+        self.day_width = int(snap.slot_period.max(initial=0)) + 2
+        self.horizon = max(1, len(days) * self.day_width)
+        self.axis = [day_pos[d] * self.day_width + p
+                     for d, p in zip(snap.slot_day.tolist(), snap.slot_period.tolist())]
+        self.slot_at = {t: j for j, t in enumerate(self.axis)}
+
+    def _period(self, t):
+        return t % self.day_width
+
+    # --- Модель ---
+
+    def build_model(self, snapshot, hints=None, symmetry=True):
+        """Строит интервальную CP-модель. hints/symmetry — для совместимости: блоки нагрузки и так упорядочены."""
+        self.snapshot = snapshot
+        tel, model = self.telemetry, self.model
+        self.symmetry_classes = []
+
+        with tel.phase("presolve"):
+            pre = presolve(snapshot, self.blocked_slots)
+            self._axis(snapshot)
+
+        w_ids = snapshot.workload_ids.tolist()
+        w_hours = snapshot.w_hours.tolist()
+        room_type = pre.room_type.tolist()
+
+        # 1. БЛОКИ: интервалы уроков
+        self.blocks = []
+        self.blocks_by_workload = defaultdict(list)
+        with tel.phase("variables"):
+            for i, wid in enumerate(w_ids):
+                allowed = [self.axis[j] for j in np.flatnonzero(pre.allowed[i]).tolist()]
+                if not allowed or w_hours[i] <= 0:
+                    continue
+                allowed_set = set(allowed)
+                double_starts = [t for t in allowed if t + 1 in allowed_set]
+                lengths = [2] if (self.double_periods and room_type[i] in DOUBLE_PERIOD_TYPES
+                                  and w_hours[i] >= 2 and double_starts) else []
+                lengths += [1] * (w_hours[i] - sum(lengths))
+                for k, length in enumerate(lengths):
+                    b = Block(i=i, k=k, length=length, starts=double_starts if length == 2 else allowed)
+                    b.start = model.NewIntVarFromDomain(cp_model.Domain.FromValues(b.starts), f's_w{wid}_{k}')
+                    b.interval = model.NewFixedSizeIntervalVar(b.start, length, f'i_w{wid}_{k}')
+                    self.blocks.append(b)
+                    self.blocks_by_workload[i].append(b)
+
+        if pre.impossible:
+            print(f"⚠️ Нет ни одного допустимого слота для нагрузок: {pre.impossible}")
+            model.AddBoolOr([])
+
+        # 2. ЧАСЫ: одинарные уроки нагрузки упорядочены (разные позиции, без перестановок)
+        with tel.phase("constraints.hours", model):
+            for blocks in self.blocks_by_workload.values():
+                singles = [b for b in blocks if b.length == 1]
+                for a, b in zip(singles, singles[1:]):
+                    model.Add(a.start + 1 <= b.start)
+
+        # 3. ПРАВИЛА И ЦЕЛЬ
+        objectives = []
+        bonus = self._apply_external_constraints(objectives)
+        with tel.phase("objective", model):
+            self._add_score_tables(objectives, bonus)
+        with tel.phase("constraints.magnet", model):
+            self._add_magnets(objectives)
+        self.objectives = objectives
+        model.Maximize(sum(objectives))
+
+        # 4. ЖЕСТКИЕ ПРАВИЛА
+        self._add_standard_constraints(pre.room_type)
+
+        proto = model.Proto()
+        self.presolve_report = {
+            "variables": len(proto.variables),
+            "variables_removed": pre.n_removed,
+            "removed_by": pre.removed,
+            "blocks": len(self.blocks),
+            "double_blocks": sum(b.length == 2 for b in self.blocks),
+            "constraints": len(proto.constraints),
+            "impossible": pre.impossible,
+        }
+        print(f"⏱ Интервальная модель: блоков {len(self.blocks)} "
+              f"(сдвоенных {self.presolve_report['double_blocks']}), "
+              f"переменных {len(proto.variables)}, ограничений {len(proto.constraints)}.")
+        return model
+
+    def _start_literals(self, b):
+        """Литералы "блок начинается в t" с каналом к переменной начала."""
+        if b.literals is None:
+            b.literals = {t: self.model.NewBoolVar(f'{b.start.Name()}_t{t}') for t in b.starts}
+            self.model.AddExactlyOne(b.literals.values())
+            self.model.Add(b.start == sum(t * lit for t, lit in b.literals.items()))
+        return b.literals
+
+    def _pair_blocks(self, subject_ids):
+        """Блоки по парам (класс, предмет) для предметов правила."""
+        snap = self.snapshot
+        wanted = set(subject_ids)
+        pairs = defaultdict(list)
+        for i, blocks in self.blocks_by_workload.items():
+            if int(snap.w_subject[i]) in wanted:
+                pairs[(int(snap.w_group[i]), int(snap.w_subject[i]))].extend(blocks)
+        return pairs
+
+    def _apply_external_constraints(self, objectives):
+        """Правила школы (snapshot.rules). Возвращает бонусы приоритетных уроков: позиция i -> {урок: бонус}."""
+        snap, model = self.snapshot, self.model
+        bonus = defaultdict(lambda: defaultdict(int))
+
+        for rule in snap.rules:
+            with self.telemetry.phase(f"constraints.{rule.type.value}", model):
+                # ПРАВИЛО: Запрет на N уроков подряд
+                if rule.type == ConstraintType.MAX_CONTINUOUS:
+                    limit = rule.max_value
+                    for blocks in self._pair_blocks(rule.subject_ids).values():
+                        if sum(b.length for b in blocks) <= limit:
+                            continue
+                        if len({b.i for b in blocks}) == 1 and all(b.length == 1 for b in blocks):
+                            # Упорядоченные одинарные уроки: limit + 1 подряд <=> s[k + limit] = s[k] + limit
+                            for a, b in zip(blocks, blocks[limit:]):
+                                model.Add(b.start - a.start != limit)
+                        else:
+                            self._limit_windows(blocks, limit)
+
+                # ПРАВИЛО: Лимит одного предмета в день для класса
+                elif rule.type == ConstraintType.MAX_PER_DAY:
+                    for blocks in self._pair_blocks(rule.subject_ids).values():
+                        if sum(b.length for b in blocks) <= rule.max_value:
+                            continue
+                        daily = defaultdict(list)
+                        for b in blocks:
+                            for t, lit in self._start_literals(b).items():
+                                daily[t // self.day_width].append(b.length * lit)
+                        for terms in daily.values():
+                            model.Add(sum(terms) <= rule.max_value)
+
+                # ПРАВИЛО: Приоритетные часы (Soft constraint) — в таблицы цели
+                elif rule.type == ConstraintType.PERIOD_PRIORITY:
+                    subjects = set(rule.subject_ids)
+                    for i in self.blocks_by_workload:
+                        if int(snap.w_subject[i]) in subjects:
+                            for p in rule.preferred_periods:
+                                bonus[i][p] += rule.bonus
+        return bonus
+
+    def _limit_windows(self, blocks, limit):
+        """Не больше limit уроков в любых limit + 1 соседних позициях (общий случай)."""
+        occupancy = defaultdict(list)
+        for b in blocks:
+            for t, lit in self._start_literals(b).items():
+                for q in range(b.length):
+                    occupancy[t + q].append(lit)
+        for t in sorted(occupancy):
+            window = [lit for q in range(limit + 1) for lit in occupancy.get(t + q, ())]
+            if len(window) > limit:
+                self.model.Add(sum(window) <= limit)
+
+    def _add_score_tables(self, objectives, bonus):
+        """Гравитация к началу смены + приоритетные уроки: таблица по позиции начала блока."""
+        snap = self.snapshot
+        shift = snap.w_shift.tolist()
+        for b in self.blocks:
+            table = [0] * self.horizon
+            for t in b.starts:
+                score = 0
+                for q in range(b.length):
+                    period = self._period(t + q)
+                    dist = period if shift[b.i] == 1 else abs(period - 6)
+                    score += bonus.get(b.i, {}).get(period, 0) - dist ** 2
+                table[t] = score
+            values = [table[t] for t in b.starts]
+            target = self.model.NewIntVar(min(values), max(values), f'score_{b.start.Name()}')
+            self.model.AddElement(b.start, table, target)
+            objectives.append(target)
+
+    def _add_magnets(self, objectives):
+        """Бонус за соседние уроки учителя: литерал "блок b сразу после блока a" (конец a = начало b)."""
+        snap = self.snapshot
+        vacancy = dict(zip(snap.teacher_ids.tolist(), snap.teacher_is_vacancy.tolist()))
+        by_teacher = defaultdict(list)
+        for b in self.blocks:
+            teacher = int(snap.w_teacher[b.i])
+            if not vacancy.get(teacher):
+                by_teacher[teacher].append(b)
+                if b.length > 1:
+                    objectives.append(MAGNET_BONUS * (b.length - 1))  # соседние уроки внутри сдвоенного
+
+        for t_id, blocks in by_teacher.items():
+            starts = {id(b): set(b.starts) for b in blocks}
+            for a, b in itertools.permutations(blocks, 2):
+                if a.i == b.i and a.length == b.length == 1 and b.k != a.k + 1:
+                    continue  # одинарные уроки нагрузки упорядочены: соседями могут быть только k и k+1
+                if not any(t + a.length in starts[id(b)] for t in a.starts):
+                    continue
+                adjacent = self.model.NewBoolVar(f'adj_{a.start.Name()}_{b.start.Name()}')
+                self.model.Add(a.start + a.length == b.start).OnlyEnforceIf(adjacent)
+                objectives.append(adjacent * MAGNET_BONUS)
+
+    def _add_standard_constraints(self, room_type):
+        snap, tel, model = self.snapshot, self.telemetry, self.model
+        vacancy = dict(zip(snap.teacher_ids.tolist(), snap.teacher_is_vacancy.tolist()))
+
+        with tel.phase("constraints.teacher", model):
+            by_teacher = defaultdict(list)
+            for b in self.blocks:
+                by_teacher[int(snap.w_teacher[b.i])].append(b.interval)
+            for t_id, intervals in by_teacher.items():
+                if not vacancy.get(t_id) and len(intervals) > 1:
+                    model.AddNoOverlap(intervals)
+
+        with tel.phase("constraints.group", model):
+            whole = SUBGROUP_CODE[SubgroupType.WHOLE_CLASS]
+            by_group = defaultdict(list)
+            for b in self.blocks:
+                by_group[int(snap.w_group[b.i])].append((int(snap.w_subgroup[b.i]), b.interval))
+            for entries in by_group.values():
+                codes = {code for code, _ in entries}
+                partitions = [p for p in SUBGROUP_PARTITIONS if codes & set(p)]
+                # Сегмент учеников — по одной подгруппе из каждого используемого разбиения
+                for segment in itertools.product(*partitions):
+                    intervals = [iv for code, iv in entries if code == whole or code in segment]
+                    if len(intervals) > 1:
+                        model.AddNoOverlap(intervals)
+
+        with tel.phase("constraints.rooms", model):
+            capacities = snap.room_capacities()
+            by_type = defaultdict(list)
+            for b in self.blocks:
+                by_type[int(room_type[b.i])].append(b.interval)
+            for rt, intervals in by_type.items():
+                if len(intervals) > capacities[rt]:
+                    model.AddCumulative(intervals, [1] * len(intervals), int(capacities[rt]))
+
+    # --- Решение ---
+
+    def apply_hints(self, hints, max_changes=None, keep_bonus=KEEP_BONUS):
+        """Теплый старт: уроки подсказки раскладываются по блокам нагрузки (сдвоенные — на соседние уроки)."""
+        w_pos = {wid: i for i, wid in enumerate(self.snapshot.workload_ids.tolist())}
+        s_pos = {sid: j for j, sid in enumerate(self.snapshot.slot_ids.tolist())}
+        hinted = defaultdict(set)
+        for wid, sid in set(hints):
+            if wid in w_pos and sid in s_pos:
+                hinted[w_pos[wid]].add(self.axis[s_pos[sid]])
+
+        kept = []
+        for i, blocks in self.blocks_by_workload.items():
+            free = hinted.get(i, set())
+            for b in sorted(blocks, key=lambda b: (-b.length, b.k)):
+                starts = set(b.starts)
+                t = next((t for t in sorted(free)
+                          if t in starts and all(t + q in free for q in range(b.length))), None)
+                if t is None:
+                    continue
+                free -= {t + q for q in range(b.length)}
+                self.model.AddHint(b.start, t)
+                keep = self.model.NewBoolVar(f'keep_{b.start.Name()}')
+                self.model.Add(b.start == t).OnlyEnforceIf(keep)
+                self.model.Add(b.start != t).OnlyEnforceIf(~keep)
+                kept.append((b.length, keep))
+
+        if not kept:
+            return 0
+        # Подсказка может частично не совпасть с новой моделью — решатель ее починит
+        self.allow_hint_repair()
+
+        n_kept = sum(length for length, _ in kept)
+        total = sum(length * keep for length, keep in kept)
+        if max_changes is not None:
+            self.model.Add(total >= n_kept - max_changes)
+        if keep_bonus:
+            self.model.Maximize(sum(self.objectives) + keep_bonus * total)
+        print(f"🔥 Теплый старт: {n_kept} из {len(hints)} уроков подсказки совпали с блоками модели.")
+        return n_kept
+
+    def lessons(self, value):
+        """Пары (workload_id, slot_id) по значениям начал блоков."""
+        w_ids, s_ids = self.snapshot.workload_ids.tolist(), self.snapshot.slot_ids.tolist()
+        return [(w_ids[b.i], s_ids[self.slot_at[value(b.start) + q]])
+                for b in self.blocks for q in range(b.length)]
@@ -0,0 +1,241 @@
+"""
+Портфельный режим: несколько по-разному настроенных CP-SAT "гонщиков" в отдельных процессах.
+
+Каждый гонщик сам строит модель из снимка (построение детерминировано — модели одинаковые)
+и решает ее со своей конфигурацией: seed, linearization_level, стратегия ветвления,
+сначала допустимость или сразу цель. Лучшее найденное значение цели общее (shared Value):
+как только граница любого гонщика подтверждает нужный gap относительно общего лучшего
+решения, все останавливаются. Побеждает лучшее решение.
+Гонщик решает тем же путем, что и одиночный расчет (SchoolScheduler._solve_with_watchdog):
+стоп профиля без улучшений и двухфазный режим действуют и здесь.
+
+Воспроизведение: запись победителя (конфигурация, профиль, лимит времени, потоки и
+детерминированное время) можно передать в run_algorithm(replay=...) — CP-SAT пройдет тот же путь поиска.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, asdict
+
+from ortools.sat.python import cp_model
+
+from src.solver.progress import ProgressCallback
+
+
+@dataclass(frozen=True)
+class RacerConfig:
+    name: str
+    random_seed: int
+    linearization_level: int = 1
+    search_branching: str = "AUTOMATIC_SEARCH"
+    feasibility_first: bool = False   # сначала любое допустимое решение, затем цель от него
+
+    def apply(self, parameters):
+        parameters.random_seed = self.random_seed
+        parameters.linearization_level = self.linearization_level
+        parameters.search_branching = getattr(parameters.SearchBranching, self.search_branching)
+
+    def to_dict(self):
+        return asdict(self)
+
+
+DEFAULT_PORTFOLIO = (
+    RacerConfig("default", 42),
+    RacerConfig("feasibility-first", 23, feasibility_first=True),
+    RacerConfig("lin2", 7, linearization_level=2),
+    RacerConfig("pseudo-cost", 101, search_branching="PSEUDO_COST_SEARCH"),
+    RacerConfig("lp-search", 5, linearization_level=2, search_branching="LP_SEARCH"),
+    RacerConfig("quick-restart", 77, search_branching="PORTFOLIO_WITH_QUICK_RESTART_SEARCH"),
+)
+
+# Стоп гонки, если профиль не задает gap (deep): 0.1%
+DEFAULT_TARGET_GAP = 0.001
+
+
+def solve_configured(scheduler, config, callback, deterministic_time=None):
+    """
+    Решение модели планировщика с конфигурацией гонщика — тем же путем, что и одиночный расчет
+    (SchoolScheduler._solve_with_watchdog): стоп профиля без улучшений, двухфазный режим.
+    feasibility_first: двухфазный режим, даже если профиль его не включает.
+    callback — колбэк решений с points / last_improvement / best, как у ProgressCallback.
+    deterministic_time — лимит детерминированного времени оптимизации (для воспроизведения).
+    """
+    params = scheduler.solver.parameters
+    config.apply(params)
+    if params.num_search_workers > 1:
+        params.interleave_search = True  # детерминированный многопоточный поиск
+
+    scheduler.two_phase = scheduler.two_phase or config.feasibility_first
+    scheduler.progress = callback
+    return scheduler._solve_with_watchdog(deterministic_time)
+
+
+class _RaceCallback(cp_model.CpSolverSolutionCallback):
+    """
+    Обмен с остальными гонщиками: общее лучшее значение цели и общий флаг остановки.
+    Свои решения ведет как ProgressCallback (points, last_improvement, best) — для стопа профиля.
+    """
+
+    def __init__(self, time_vars, name, shared_best, stop, target_gap, events):
+        super().__init__()
+        self.time_vars = time_vars
+        self.name = name
+        self.shared_best = shared_best
+        self.stop = stop
+        self.target_gap = target_gap
+        self.events = events
+        self.started = time.time()
+        self.points = []
+        self.best = None
+        self.last_improvement = self.started
+
+    def on_solution_callback(self):
+        objective, bound = self.ObjectiveValue(), self.BestObjectiveBound()
+        point = {
+            "objective": objective, "best_bound": bound,
+            "gap": abs(bound - objective) / max(1.0, abs(objective)),
+            "wall_time": time.time() - self.started,
+        }
+        self.best = [key for key, var in self.time_vars.items() if self.BooleanValue(var)]
+        self.points.append(point)
+        self.last_improvement = time.time()
+
+        with self.shared_best.get_lock():
+            improved = objective > self.shared_best.value
+            if improved:
+                self.shared_best.value = objective
+            best = self.shared_best.value
+
+        if improved:
+            self.events.put(("point", self.name, point, self.best))
+
+        # Своя граница + общее лучшее решение: модель у всех одна, оценка корректна
+        if (bound - best) / max(1.0, abs(best)) <= self.target_gap:
+            self.stop.set()
+            self.StopSearch()
+
+
+def _racer(config, snap, profile, two_phase, time_limit, workers, target_gap, hints, max_changes, best, stop,
+           events):
+    """Процесс-гонщик."""
+    from src.solver.engine import SchoolScheduler
+
+    try:
+        scheduler = SchoolScheduler(snap.school_id, profile)
+        scheduler.two_phase = two_phase
+        params = scheduler.solver.parameters
+        params.max_time_in_seconds = time_limit
+        params.num_search_workers = workers
+        params.log_search_progress = False
+        scheduler.build_model(snap, hints)
+        if hints:
+            scheduler.apply_hints(hints, max_changes)
+
+        callback = _RaceCallback(scheduler.time_vars, config.name, best, stop, target_gap, events)
+        done = threading.Event()
+
+        def watch():
+            while not done.wait(0.2):
+                if stop.is_set():
+                    scheduler.stop(keep_best=True)  # и между фазами двухфазного решения
+                    return
+
+        threading.Thread(target=watch, daemon=True).start()
+        try:
+            status = solve_configured(scheduler, config, callback)
+        finally:
+            done.set()
+
+        solver = scheduler.solver
+        ok = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        # Итог фазы 1 (оптимизация не успела или гонка закончилась раньше): цель не известна
+        scored = ok and not scheduler.from_feasibility
+        events.put(("result", config.name, {
+            "config": config.to_dict(),
+            "profile": profile,
+            "two_phase": two_phase,
+            "max_time_in_seconds": time_limit,
+            "workers": workers,
+            "status": solver.StatusName(status),
+            "objective": solver.ObjectiveValue() if scored else None,
+            "best_bound": solver.BestObjectiveBound() if scored else None,
+            "deterministic_time": solver.deterministic_time,
+            "wall_time": solver.WallTime(),
+            "conflicts": solver.NumConflicts(),
+            "branches": solver.NumBranches(),
+        }, scheduler.active_lessons() if ok else None))
+    except Exception as e:
+        events.put(("result", config.name, {"config": config.to_dict(), "status": f"ERROR: {e}"}, None))
+
+
+def race(scheduler, snap, hints=None, max_changes=None, configs=None, cpu_budget=None, target_gap=None):
+    """
+    Гонка портфеля. scheduler — родительский SchoolScheduler: его профиль и лимит времени
+    используются гонщиками, stop() прерывает гонку, progress получает общие улучшения.
+    Возвращает (active победителя или None, сводка гонки).
+    """
+    if multiprocessing.current_process().daemon:
+        # Задача в prefork-пуле Celery: демоническому процессу нельзя запускать гонщиков
+        raise RuntimeError("Портфель нельзя запустить из демонического процесса — воркеру нужен --pool threads")
+
+    params = scheduler.solver.parameters
+    cpu_budget = max(1, cpu_budget or params.num_search_workers or os.cpu_count() or 1)
+    configs = list(configs or DEFAULT_PORTFOLIO)[:cpu_budget]
+    workers = max(1, cpu_budget // len(configs))
+    time_limit = params.max_time_in_seconds
+    target_gap = target_gap if target_gap is not None else (scheduler.profile.relative_gap_limit or DEFAULT_TARGET_GAP)
+
+    print(f"🏁 Портфель: {len(configs)} гонщиков по {workers} потока, цель gap {target_gap:.2%}: "
+          f"{', '.join(c.name for c in configs)}")
+
+    # spawn: не наследуем соединения с БД и состояние OR-Tools родителя
+    ctx = multiprocessing.get_context("spawn")
+    best = ctx.Value('d', float('-inf'))
+    stop = ctx.Event()
+    events = ctx.Queue()
+    procs = [ctx.Process(target=_racer, daemon=True,
+                         args=(c, snap, scheduler.profile.name, scheduler.two_phase, time_limit, workers, target_gap,
+                               hints, max_changes, best, stop, events))
+             for c in configs]
+    for p in procs:
+        p.start()
+
+    scheduler.progress = ProgressCallback({})
+    results = {}
+    deadline = time.time() + time_limit + 60  # запас на построение модели в процессах
+    while len(results) < len(configs) and time.time() < deadline:
+        if scheduler.stop_requested:
+            stop.set()
+        try:
+            kind, name, data, active = events.get(timeout=0.5)
+        except queue.Empty:
+            if not any(p.is_alive() for p in procs) and events.empty():
+                break
+            continue
+        if kind == "point":
+            scheduler.progress.best = active
+            scheduler.progress.points.append(data)
+            scheduler.progress.last_improvement = time.time()
+            print(f"   📈 {name}: objective={data['objective']:.0f}, bound={data['best_bound']:.0f}")
+        else:
+            results[name] = (data, active)
+            print(f"   {name}: {data['status']}, objective={data.get('objective')}")
+
+    stop.set()
+    for p in procs:
+        p.join(timeout=5)
+        if p.is_alive():
+            p.terminate()
+
+    finished = [(data, active) for data, active in results.values() if active is not None]
+    summary = {"target_gap": target_gap, "racers": [data for data, _ in results.values()], "winner": None}
+    if not finished:
+        return None, summary
+
+    # Решение без цели (только фаза 1) выигрывает, лишь если других нет
+    winner, active = max(finished, key=lambda r: r[0]["objective"] if r[0]["objective"] is not None else float("-inf"))
+    summary["winner"] = winner
+    print(f"🏆 Победитель: {winner['config']['name']} (objective={winner['objective']})")
+    return active, summary
@@ -0,0 +1,129 @@
+"""
+Пресолв: до построения модели отсекаем пары (нагрузка, слот), которые заведомо невозможны.
+
+Источники запретов:
+  * смена класса и сетка звонков (TimeSlot.shift_number) — окно смены берется из календаря школы;
+  * недоступность учителя (Teacher.constraints, JSON):
+        {"unavailable_days": [5],              # весь день
+         "unavailable_periods": [1, 2],        # эти уроки в любой день
+         "unavailable_slots": [[1, 3], [2, 4]]}  # [день, урок]
+  * слоты учителя, отданные другой части задачи при декомпозиции (blocked_slots);
+  * типы кабинетов, которых в школе нет: спортзал — урок поставить некуда,
+    остальные спец. кабинеты заменяются обычными (как и при раздаче кабинетов).
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.models.enums import RoomType
+from src.solver.snapshot import ROOM_TYPE_CODE
+
+# Насколько окно смены может выходить за уроки этой смены в календаре: (раньше, позже).
+# При стандартной сетке (1-7 / 8-14) это дает прежние границы: 1 смена — 1-8, 2 смена — 5-14.
+SHIFT_OVERLAP = {1: (0, 1), 2: (3, 0)}
+
+# Окна смен, если в календаре школы нет уроков этой смены
+DEFAULT_SHIFT_WINDOWS = {1: (1, 8), 2: (5, 14)}
+
+
+def shift_windows(snap):
+    """Окно уроков для каждой смены: {смена: (первый урок, последний урок)}."""
+    windows = {}
+    for shift in set(snap.w_shift.tolist()) | set(DEFAULT_SHIFT_WINDOWS):
+        periods = snap.slot_period[snap.slot_shift == shift]
+        if not len(periods):
+            windows[shift] = DEFAULT_SHIFT_WINDOWS.get(shift, (1, int(snap.slot_period.max(initial=1))))
+            continue
+        early, late = SHIFT_OVERLAP.get(shift, (0, 0))
+        windows[shift] = (int(periods.min()) - early, int(periods.max()) + late)
+    return windows
+
+
+def teacher_unavailable_slots(snap):
+    """Маски недоступности из Teacher.constraints: {teacher_id: bool[n_slots]} (True — нельзя)."""
+    result = {}
+    for t_id, rules in zip(snap.teacher_ids.tolist(), snap.teacher_constraints):
+        if not rules:
+            continue
+        mask = np.zeros(snap.n_slots, dtype=bool)
+        mask |= np.isin(snap.slot_day, rules.get("unavailable_days") or [])
+        mask |= np.isin(snap.slot_period, rules.get("unavailable_periods") or [])
+        for pair in rules.get("unavailable_slots") or []:
+            if len(pair) == 2:
+                mask |= (snap.slot_day == pair[0]) & (snap.slot_period == pair[1])
+        if mask.any():
+            result[t_id] = mask
+    return result
+
+
+def effective_room_types(snap):
+    """
+    Тип кабинета каждой нагрузки для ограничений вместимости: спец. кабинета нет в школе —
+    урок идет в обычный (спортзал не заменяется). Второй результат — нагрузки без спортзала.
+    """
+    capacities = snap.room_capacities()
+    room_type = snap.w_room_type.copy()
+    missing = capacities[room_type] == 0
+    gym = ROOM_TYPE_CODE[RoomType.GYM]
+    room_type[missing & (room_type != gym)] = ROOM_TYPE_CODE[RoomType.STANDARD]
+    return room_type, missing & (room_type == gym)
+
+
+@dataclass
+class PresolveResult:
+    allowed: np.ndarray            # bool[n_workloads, n_slots]
+    room_type: np.ndarray          # тип кабинета для ограничений вместимости (с учетом замен)
+    removed: dict = field(default_factory=dict)   # причина -> сколько переменных отсечено
+    impossible: list = field(default_factory=list)  # workload_id без единого допустимого слота
+
+    @property
+    def n_vars(self):
+        return int(self.allowed.sum())
+
+    @property
+    def n_removed(self):
+        return sum(self.removed.values())
+
+
+def presolve(snap, blocked_slots=()):
+    """Допустимые слоты для каждой нагрузки. Каждая причина считается только по еще живым парам."""
+    n_w, n_s = snap.n_workloads, snap.n_slots
+    allowed = np.ones((n_w, n_s), dtype=bool)
+    removed = {}
+
+    def cut(reason, rows, mask):
+        before = int(allowed[rows].sum())
+        allowed[rows] &= ~mask
+        removed[reason] = removed.get(reason, 0) + before - int(allowed[rows].sum())
+
+    # 1. Смена класса по календарю
+    windows = shift_windows(snap)
+    lo = np.array([windows[s][0] for s in snap.w_shift.tolist()], dtype=np.int16).reshape(-1, 1)
+    hi = np.array([windows[s][1] for s in snap.w_shift.tolist()], dtype=np.int16).reshape(-1, 1)
+    before = allowed.sum()
+    allowed &= (snap.slot_period >= lo) & (snap.slot_period <= hi)
+    removed["shift"] = int(before - allowed.sum())
+
+    # 2. Недоступность учителя (Teacher.constraints) и резервы декомпозиции
+    removed["teacher"] = 0
+    for t_id, mask in teacher_unavailable_slots(snap).items():
+        cut("teacher", snap.w_teacher == t_id, mask)
+
+    removed["reserved"] = 0
+    if blocked_slots:
+        slot_pos = {sid: j for j, sid in enumerate(snap.slot_ids.tolist())}
+        by_teacher = {}
+        for t_id, sid in blocked_slots:
+            if sid in slot_pos:
+                by_teacher.setdefault(t_id, np.zeros(n_s, dtype=bool))[slot_pos[sid]] = True
+        for t_id, mask in by_teacher.items():
+            cut("reserved", snap.w_teacher == t_id, mask)
+
+    # 3. Типы кабинетов, которых нет в школе
+    room_type, no_gym = effective_room_types(snap)
+    removed["room"] = 0
+    if no_gym.any():
+        cut("room", no_gym, np.ones(n_s, dtype=bool))
+
+    impossible = snap.workload_ids[(allowed.sum(axis=1) == 0) & (snap.w_hours > 0)].tolist()
+    return PresolveResult(allowed=allowed, room_type=room_type, removed=removed, impossible=impossible)
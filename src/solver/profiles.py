@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SolverProfile:
+    """Набор параметров CP-SAT под сценарий использования."""
+    name: str
+    max_time_in_seconds: float
+    num_search_workers: int
+    relative_gap_limit: float        # стоп, когда (bound - objective) / objective меньше этого
+    no_improvement_timeout: float    # стоп, если столько секунд нет улучшения (0 — не ограничено)
+    log_search_progress: bool
+    two_phase: bool = False          # сначала любое допустимое расписание, затем оптимизация от него
+
+    def apply(self, parameters):
+        parameters.max_time_in_seconds = self.max_time_in_seconds
+        parameters.num_search_workers = self.num_search_workers
+        parameters.relative_gap_limit = self.relative_gap_limit
+        parameters.log_search_progress = self.log_search_progress
+
+
+PROFILES = {
+    # Черновик для завуча: первый приличный вариант за секунды
+    "draft": SolverProfile("draft", max_time_in_seconds=10.0, num_search_workers=4,
+                           relative_gap_limit=0.05, no_improvement_timeout=3.0, log_search_progress=False,
+                           two_phase=True),
+    # Рабочий расчет: до 10 минут, но останавливаемся, когда улучшения кончились
+    "standard": SolverProfile("standard", max_time_in_seconds=600.0, num_search_workers=8,
+                              relative_gap_limit=0.005, no_improvement_timeout=60.0, log_search_progress=True),
+    # Ночной прогон: ищем почти идеальный вариант
+    "deep": SolverProfile("deep", max_time_in_seconds=3600.0, num_search_workers=8,
+                          relative_gap_limit=0.0, no_improvement_timeout=0, log_search_progress=True),
+}
+
+DEFAULT_PROFILE = "standard"
+
+
+def get_profile(name=None):
+    """Профиль по имени (None — профиль по умолчанию). ValueError для неизвестного имени."""
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Неизвестный профиль решателя: {name}. Доступны: {', '.join(PROFILES)}")
+    return PROFILES[name]
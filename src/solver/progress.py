@@ -0,0 +1,41 @@
+import time
+
+from ortools.sat.python import cp_model
+
+
+class ProgressCallback(cp_model.CpSolverSolutionCallback):
+    """
+    Колбэк CP-SAT: фиксирует каждое улучшающее решение (цель, граница, gap, время)
+    и держит последнее найденное расписание, чтобы его можно было сохранить досрочно.
+    """
+
+    def __init__(self, time_vars, verbose=True, decode=None):
+        super().__init__()
+        self.time_vars = time_vars
+        # decode(value) -> [(workload_id, slot_id)]: для моделей без булевых time_vars (см. intervals.py)
+        self.decode = decode
+        self.verbose = verbose
+        self.points = []   # [{objective, best_bound, gap, wall_time}] — только дописывается
+        self.best = None   # [(workload_id, slot_id)] последнего решения
+        self.started = time.time()
+        self.last_improvement = self.started
+
+    def on_solution_callback(self):
+        objective = self.ObjectiveValue()
+        bound = self.BestObjectiveBound()
+        point = {
+            "objective": objective,
+            "best_bound": bound,
+            "gap": abs(bound - objective) / max(1.0, abs(objective)),
+            "wall_time": time.time() - self.started,
+        }
+        # Список заменяется целиком — читатель из другого потока видит либо старое, либо новое
+        if self.decode is not None:
+            self.best = self.decode(self.Value)
+        else:
+            self.best = [key for key, var in self.time_vars.items() if self.BooleanValue(var)]
+        self.points.append(point)
+        self.last_improvement = time.time()
+        if self.verbose:
+            print(f"   📈 #{len(self.points)}: objective={objective:.0f}, bound={bound:.0f}, "
+                  f"gap={point['gap']:.2%}, {point['wall_time']:.1f} сек")
@@ -0,0 +1,239 @@
+"""
+Оценка готового расписания — независимо от решателя (его Objective после выхода процесса теряется).
+
+Расписание раскладывается в тензоры занятости NumPy:
+  учитель x день x урок, класс x день x урок (весь класс и подгруппы отдельно),
+  пара (класс, предмет) x день x урок для правил, тип кабинета x слот, кабинет x слот.
+Все метрики — векторные операции над тензорами, поэтому evaluate_many оценивает пачку
+расписаний-кандидатов (одни и те же уроки, разные слоты) за один проход.
+
+Метрики:
+  hard       — нарушения жестких правил (должны быть 0): конфликты учителей, классов,
+               кабинетов, вместимость типов кабинетов, правила школы (rules.py), часы нагрузки;
+  windows    — окна учителей и классов (пустые уроки между первым и последним уроком дня);
+  rules      — соблюдение правил школы (нарушения по правилу, доля приоритетных уроков);
+  balance    — равномерность уроков класса по дням (стандартное отклонение, разброс);
+  rooms      — загрузка кабинетов по типам, уроки без кабинета, кабинеты меньше класса;
+  objective  — цель булевой модели (гравитация + приоритетные уроки + "магнит"), для сравнения.
+"""
+import numpy as np
+
+from src.extensions import db
+from src.models.enums import SubgroupType
+from src.models.schedule import ScheduleEntry, Workload
+from src.solver.presolve import effective_room_types
+from src.solver.snapshot import ROOM_TYPES, SUBGROUP_CODE, ProblemSnapshot
+from src.utils.constraints_config import ConstraintType
+
+MAGNET_BONUS = 5000
+# Размер тензоров одной пачки evaluate_many (ячеек), чтобы не упереться в память
+CHUNK_CELLS = 20_000_000
+
+
+def _counts(index, k, shape):
+    """Тензор счетчиков (k, *shape) по плоским индексам внутри одного кандидата."""
+    size = int(np.prod(shape))
+    offsets = (np.arange(k) * size).reshape(-1, 1)
+    flat = np.bincount((index + offsets).ravel(), minlength=k * size)
+    return flat.reshape((k, *shape))
+
+
+def _gaps(busy):
+    """Окна по последней оси: (последний - первый + 1) - занятых, для строк без уроков 0."""
+    n_busy = busy.sum(axis=-1)
+    n = busy.shape[-1]
+    first = busy.argmax(axis=-1)
+    last = n - 1 - busy[..., ::-1].argmax(axis=-1)
+    return np.where(n_busy > 0, last - first + 1 - n_busy, 0)
+
+
+class ScheduleEvaluator:
+    """Метрики расписаний одной школы (снимок — справочники и нагрузка)."""
+
+    def __init__(self, snap):
+        self.snap = snap
+        days = np.unique(snap.slot_day)
+        self.n_days = len(days)
+        self.n_periods = int(snap.slot_period.max(initial=0)) + 1   # индекс = номер урока: соседние уроки соседние
+        self.slot_day = np.searchsorted(days, snap.slot_day)
+        self.slot_period = snap.slot_period.astype(np.int64)
+        self.slot_cell = self.slot_day * self.n_periods + self.slot_period
+
+        t_pos = np.searchsorted(snap.teacher_ids, snap.w_teacher)
+        self.real_teachers = np.flatnonzero(~snap.teacher_is_vacancy)
+        self.w_teacher = t_pos
+        self.w_group = np.searchsorted(snap.group_ids, snap.w_group)
+        self.w_whole = snap.w_subgroup == SUBGROUP_CODE[SubgroupType.WHOLE_CLASS]
+        self.w_room_type = effective_room_types(snap)[0].astype(np.int64)
+        self.capacity = snap.room_capacities().astype(np.int64)
+
+        # Мягкая цель урока по слоту — как в булевой модели
+        dist = np.where(snap.w_shift.reshape(-1, 1) == 1, self.slot_period, np.abs(self.slot_period - 6))
+        self.score = -(dist ** 2)
+
+        # Правила: лимиты — по парам (класс, предмет), приоритетные часы — маска нагрузки x слот
+        key = self.w_group * len(snap.subject_ids) + np.searchsorted(snap.subject_ids, snap.w_subject)
+        _, self.w_pair = np.unique(key, return_inverse=True)
+        self.w_pair = self.w_pair.ravel()
+        self.n_pairs = int(self.w_pair.max(initial=-1)) + 1
+        self.rules = []
+        for rule in snap.rules:
+            wanted = np.isin(snap.w_subject, rule.subject_ids)
+            if rule.type == ConstraintType.PERIOD_PRIORITY:
+                preferred = np.isin(self.slot_period, rule.preferred_periods)
+                self.score = self.score + np.outer(wanted, preferred) * rule.bonus
+                self.rules.append((rule, wanted, preferred))
+            else:
+                pairs = np.zeros(self.n_pairs, dtype=bool)
+                pairs[self.w_pair[wanted]] = True
+                self.rules.append((rule, wanted, pairs))
+
+    # --- Пачка кандидатов ---
+
+    def evaluate_many(self, lesson_w, lesson_slot):
+        """
+        lesson_w — позиция нагрузки каждого урока (n_lessons,), общие для всех кандидатов;
+        lesson_slot — позиции слотов (k, n_lessons). Возвращает {метрика: массив (k,)}.
+        """
+        lesson_slot = np.atleast_2d(lesson_slot)
+        cells = max(len(self.snap.teacher_ids), len(self.snap.group_ids), 1) * self.n_days * self.n_periods
+        chunk = max(1, CHUNK_CELLS // max(cells, 1))
+        parts = [self._evaluate_chunk(np.asarray(lesson_w), lesson_slot[k:k + chunk])
+                 for k in range(0, len(lesson_slot), chunk)]
+        return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+    def _evaluate_chunk(self, lesson_w, lesson_slot):
+        k = len(lesson_slot)
+        d, p = self.n_days, self.n_periods
+        cell = self.slot_cell[lesson_slot]                       # (k, n) день * P + урок
+        out = {}
+
+        # Учителя (вакансии не конфликтуют и окон не имеют)
+        teacher = _counts(self.w_teacher[lesson_w] * d * p + cell, k, (len(self.snap.teacher_ids), d, p))
+        teacher = teacher[:, self.real_teachers]
+        busy = teacher > 0
+        out["teacher_conflicts"] = np.maximum(teacher - 1, 0).sum(axis=(1, 2, 3))
+        out["teacher_windows"] = _gaps(busy).sum(axis=(1, 2))
+        out["teachers_with_windows"] = (_gaps(busy).sum(axis=2) > 0).sum(axis=1)
+        adjacent = (busy[..., :-1] & busy[..., 1:]).sum(axis=(1, 2, 3))
+
+        # Классы: урок всем классом не совпадает ни с чем, подгруппы между собой могут
+        n_g = len(self.snap.group_ids)
+        g_index = self.w_group[lesson_w] * d * p + cell
+        whole_lesson = self.w_whole[lesson_w]
+        whole = _counts(np.where(whole_lesson, g_index, n_g * d * p), k, (n_g * d * p + 1,))[:, :-1]
+        sub = _counts(np.where(whole_lesson, n_g * d * p, g_index), k, (n_g * d * p + 1,))[:, :-1]
+        whole, sub = whole.reshape(k, n_g, d, p), sub.reshape(k, n_g, d, p)
+        out["group_conflicts"] = (np.maximum(whole - 1, 0) + (whole > 0) * sub).sum(axis=(1, 2, 3))
+        group_busy = (whole + sub) > 0
+        out["group_windows"] = _gaps(group_busy).sum(axis=(1, 2))
+        per_day = group_busy.sum(axis=3)                          # (k, классы, дни)
+        out["daily_std"] = per_day.std(axis=2).mean(axis=1) if n_g else np.zeros(k)
+        out["daily_spread"] = (per_day.max(axis=2) - per_day.min(axis=2)).max(axis=1) if n_g else np.zeros(k)
+
+        # Вместимость типов кабинетов по слотам
+        n_s, n_rt = len(self.slot_cell), len(self.capacity)
+        by_type = _counts(self.w_room_type[lesson_w] * n_s + lesson_slot, k, (n_rt, n_s))
+        out["room_type_overflow"] = np.maximum(by_type - self.capacity.reshape(-1, 1), 0).sum(axis=(1, 2))
+
+        # Часы нагрузки
+        hours = _counts(lesson_w + np.zeros((k, 1), dtype=np.int64), k, (len(self.w_whole),))
+        out["hours_mismatch"] = np.abs(hours - self.snap.w_hours.astype(np.int64)).sum(axis=1)
+
+        # Правила школы
+        pair = _counts(self.w_pair[lesson_w] * d * p + cell, k, (max(self.n_pairs, 1), d, p))
+        rule_violations = np.zeros(k, dtype=np.int64)
+        for rule, wanted, mask in self.rules:
+            name = f"rule_{rule.type.value}"
+            if rule.type == ConstraintType.MAX_PER_DAY:
+                value = np.maximum(pair[:, mask].sum(axis=3) - rule.max_value, 0).sum(axis=(1, 2))
+            elif rule.type == ConstraintType.MAX_CONTINUOUS:
+                occupied = pair[:, mask] > 0
+                limit = rule.max_value
+                full = occupied[..., :p - limit].copy()
+                for q in range(1, limit + 1):
+                    full &= occupied[..., q:q + p - limit]
+                value = full.sum(axis=(1, 2, 3))
+            else:
+                # Доля уроков предметов правила в приоритетные часы (мягкое правило)
+                lessons = wanted[lesson_w]
+                on_time = (lessons & mask[lesson_slot]).sum(axis=1)
+                out[name] = np.round(on_time / max(int(lessons.sum()), 1), 3)
+                continue
+            out[name] = out.get(name, 0) + value
+            rule_violations += value
+
+        out["hard_violations"] = (out["teacher_conflicts"] + out["group_conflicts"] + out["room_type_overflow"]
+                                  + out["hours_mismatch"] + rule_violations)
+        out["objective"] = self.score[lesson_w, lesson_slot].sum(axis=1) + MAGNET_BONUS * adjacent
+        return out
+
+    # --- Одно расписание (с кабинетами) ---
+
+    def evaluate(self, entries):
+        """
+        entries — [(workload_id, slot_id)] или [(workload_id, slot_id, room_id)].
+        Возвращает отчет {"lessons", "hard", "windows", "rules", "balance", "rooms", "objective"}.
+        """
+        snap = self.snap
+        w_pos = {wid: i for i, wid in enumerate(snap.workload_ids.tolist())}
+        s_pos = {sid: j for j, sid in enumerate(snap.slot_ids.tolist())}
+        r_pos = {rid: r for r, rid in enumerate(snap.room_ids.tolist())}
+        rows = [(w_pos[e[0]], s_pos[e[1]], r_pos.get(e[2], -1) if len(e) > 2 else -1)
+                for e in entries if e[0] in w_pos and e[1] in s_pos]
+        lesson = np.array(rows, dtype=np.int64).reshape(-1, 3)
+        lesson_w, lesson_slot, lesson_room = lesson[:, 0], lesson[:, 1], lesson[:, 2]
+
+        m = {name: value[0] for name, value in self.evaluate_many(lesson_w, lesson_slot.reshape(1, -1)).items()}
+        rooms = self._rooms(lesson_w, lesson_slot, lesson_room)
+        hard = {key: int(m[key]) for key in ("teacher_conflicts", "group_conflicts", "room_type_overflow",
+                                             "hours_mismatch")}
+        hard["room_conflicts"] = rooms.pop("conflicts")
+        rules = {name[len("rule_"):]: float(value) if isinstance(value, float) else int(value)
+                 for name, value in m.items() if name.startswith("rule_")}
+        return {
+            "lessons": len(rows),
+            "ignored": len(entries) - len(rows),
+            "hard": {**hard, "total": int(m["hard_violations"]) + hard["room_conflicts"]},
+            "windows": {"teacher": int(m["teacher_windows"]), "teachers_with_windows": int(m["teachers_with_windows"]),
+                        "group": int(m["group_windows"])},
+            "rules": rules,
+            "balance": {"daily_std": round(float(m["daily_std"]), 3), "daily_spread": int(m["daily_spread"])},
+            "rooms": rooms,
+            "objective": int(m["objective"]),
+        }
+
+    def _rooms(self, lesson_w, lesson_slot, lesson_room):
+        snap = self.snap
+        n_r, n_s = len(snap.room_ids), len(self.slot_cell)
+        placed = lesson_room >= 0
+        occupancy = np.bincount(lesson_room[placed] * n_s + lesson_slot[placed], minlength=n_r * n_s).reshape(n_r, n_s)
+        busy_by_type = np.bincount(snap.room_type, weights=(occupancy > 0).sum(axis=1), minlength=len(ROOM_TYPES))
+        rooms_by_type = np.bincount(snap.room_type, minlength=len(ROOM_TYPES))
+        utilisation = {ROOM_TYPES[t].value: round(float(busy_by_type[t]) / (rooms_by_type[t] * n_s), 3)
+                       for t in np.flatnonzero(rooms_by_type).tolist()}
+
+        # Класс (подгруппа — половина) не помещается в кабинет
+        size = snap.group_size[self.w_group[lesson_w[placed]]].astype(np.float64)
+        size = np.where(self.w_whole[lesson_w[placed]], size, np.ceil(size / 2))
+        too_small = int((snap.room_capacity[lesson_room[placed]] < size).sum())
+        return {
+            "conflicts": int(np.maximum(occupancy - 1, 0).sum()),
+            "without_room": int((~placed).sum()),
+            "too_small": too_small,
+            "utilisation": utilisation,
+        }
+
+
+def load_schedule_entries(school_id):
+    """Текущее расписание школы: [(workload_id, timeslot_id, room_id)]."""
+    rows = db.session.query(ScheduleEntry.workload_id, ScheduleEntry.timeslot_id, ScheduleEntry.room_id) \
+        .join(Workload, Workload.id == ScheduleEntry.workload_id) \
+        .filter(Workload.school_id == school_id).all()
+    return [tuple(row) for row in rows]
+
+
+def evaluate_school(school_id):
+    """Отчет о качестве текущего расписания школы (см. ScheduleEvaluator.evaluate)."""
+    snap = ProblemSnapshot.load(school_id)
+    return ScheduleEvaluator(snap).evaluate(load_schedule_entries(school_id))
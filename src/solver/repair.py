@@ -0,0 +1,205 @@
+"""
+Локальный ремонт расписания после сбоя (заболел учитель, закрыли кабинет, поменялись часы).
+
+Идея (Large Neighbourhood Search):
+  1. Модель строится один раз с учетом сбоя, текущее расписание — подсказка + бонус за сохранение.
+  2. По сбою выбирается "окрестность" — затронутые нагрузки, их классы и учителя.
+  3. Все уроки вне окрестности фиксируются, решается только окрестность (короткий лимит).
+  4. Если окрестность не решается — она расширяется на следующее кольцо соседей.
+  5. Оставшееся время — итерации улучшения на случайных окрестностях внутри затронутой зоны.
+"""
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from src.solver.engine import SchoolScheduler
+
+REPAIR_MAX_TIME = 300.0   # предел time_limit ремонта, сек (/repair): дольше — это уже полный расчет
+
+
+@dataclass
+class Disruption:
+    """Описание сбоя."""
+    teacher_unavailable: dict = field(default_factory=dict)  # teacher_id -> [slot_id]
+    removed_rooms: list = field(default_factory=list)         # [room_id]
+    hours_changed: dict = field(default_factory=dict)         # workload_id -> новое число часов
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            teacher_unavailable={int(t): [int(s) for s in slots]
+                                 for t, slots in (data.get("teacher_unavailable") or {}).items()},
+            removed_rooms=[int(r) for r in data.get("removed_rooms") or []],
+            hours_changed={int(w): int(h) for w, h in (data.get("hours_changed") or {}).items()},
+        )
+
+
+def apply_disruption(snap, disruption):
+    """Новый снимок с учетом сбоя (часы нагрузки, закрытые кабинеты)."""
+    w_hours = snap.w_hours.copy()
+    pos = {wid: i for i, wid in enumerate(snap.workload_ids.tolist())}
+    for wid, hours in disruption.hours_changed.items():
+        if wid in pos:
+            w_hours[pos[wid]] = hours
+
+    keep = ~np.isin(snap.room_ids, disruption.removed_rooms)
+    return replace(snap, w_hours=w_hours,
+                   room_ids=snap.room_ids[keep], room_type=snap.room_type[keep],
+                   room_capacity=snap.room_capacity[keep],
+                   room_building=[b for b, k in zip(snap.room_building, keep.tolist()) if k])
+
+
+class ScheduleRepair:
+    """Ремонт расписания поверх SchoolScheduler."""
+
+    def __init__(self, scheduler, time_limit=5.0, iteration_limit=1.0, max_rings=3, seed=42):
+        self.scheduler = scheduler
+        self.time_limit = time_limit
+        self.iteration_limit = iteration_limit
+        self.max_rings = max_rings
+        self.rnd = random.Random(seed)
+
+    def run(self, snapshot, current, disruption):
+        """
+        current — текущее расписание [(workload_id, slot_id)].
+        Возвращает список выбранных уроков после ремонта или None.
+        scheduler.stop() прерывает ремонт: с keep_best — возвращается лучшее найденное, без — None.
+        """
+        start = time.time()
+        sch = self.scheduler
+        snap = apply_disruption(snapshot, disruption)
+        sch.blocked_slots |= {(t, s) for t, slots in disruption.teacher_unavailable.items() for s in slots}
+
+        # Симметрии не упорядочиваем: уроки вне окрестности фиксируются по текущему расписанию
+        sch.break_symmetry = False
+        # Окрестности маленькие и решаются по секунде: один поток, зато подсказка чинится
+        # (repair_hint при нескольких потоках роняет процесс, см. SchoolScheduler.allow_hint_repair)
+        sch.solver.parameters.num_search_workers = 1
+        sch.build_model(snap)
+        sch.apply_hints(current)
+        current = set(current)
+
+        # Уроки нагрузки по текущему расписанию
+        self._vars_by_wid = defaultdict(list)
+        for (wid, sid), var in sch.time_vars.items():
+            self._vars_by_wid[wid].append((sid, var))
+
+        self._w_group = dict(zip(snap.workload_ids.tolist(), snap.w_group.tolist()))
+        self._w_teacher = dict(zip(snap.workload_ids.tolist(), snap.w_teacher.tolist()))
+        vacancy = dict(zip(snap.teacher_ids.tolist(), snap.teacher_is_vacancy.tolist()))
+        self._by_group, self._by_teacher = defaultdict(set), defaultdict(set)
+        for wid in self._w_group:
+            self._by_group[self._w_group[wid]].add(wid)
+            if not vacancy.get(self._w_teacher[wid]):
+                self._by_teacher[self._w_teacher[wid]].add(wid)
+
+        seeds = self._seed_workloads(snap, current, disruption)
+        print(f"🩹 Ремонт: затронуто {len(seeds)} нагрузок.")
+
+        # 1. Расширяем окрестность, пока она не станет разрешимой
+        hood, best, best_obj = set(seeds), None, None
+        for ring in range(self.max_rings + 1):
+            hood = self._expand(hood) if ring else self._expand(hood, groups_only=True)
+            best_obj, best = self._solve_neighbourhood(hood, current, start)
+            print(f"   Кольцо {ring}: окрестность {len(hood)} нагрузок -> "
+                  f"{'решено' if best is not None else 'нет решения'}")
+            if best is not None or self._time_left(start) <= 0 or sch.stop_requested:
+                break
+
+        if best is None or self._cancelled():
+            return None
+
+        # 2. LNS-улучшение: случайные части затронутой зоны, остальное фиксировано по лучшему решению
+        zone = sorted(hood)
+        while self._time_left(start) > 0.2 and len(zone) > 1 and not sch.stop_requested:
+            sub = set(self.rnd.sample(zone, max(1, len(zone) // 2)))
+            obj, active = self._solve_neighbourhood(self._expand(sub, groups_only=True), best, start)
+            if active is not None and obj > best_obj:
+                best_obj, best = obj, active
+        if self._cancelled():
+            return None
+
+        moved = len(current - best)
+        print(f"✅ Ремонт за {time.time() - start:.2f} сек: сдвинуто {moved} уроков из {len(current)}.")
+        return sorted(best)
+
+    def _seed_workloads(self, snap, current, disruption):
+        """Нагрузки, которые сбой затрагивает напрямую."""
+        seeds = set(disruption.hours_changed)
+        scheduled = {wid for wid, _ in current}
+        seeds |= set(self._w_group) - scheduled
+
+        blocked = self.scheduler.blocked_slots
+        for wid, sid in current:
+            if (self._w_teacher.get(wid), sid) in blocked:
+                seeds.add(wid)
+
+        # Закрытые кабинеты: слоты, где уроков данного типа больше, чем осталось кабинетов
+        if disruption.removed_rooms:
+            capacities = snap.room_capacities()
+            w_rt = dict(zip(snap.workload_ids.tolist(), snap.w_room_type.tolist()))
+            per_slot = defaultdict(list)
+            for wid, sid in current:
+                if wid in w_rt:
+                    per_slot[(w_rt[wid], sid)].append(wid)
+            for (rt, sid), wids in per_slot.items():
+                if len(wids) > capacities[rt]:
+                    seeds.update(wids)
+        return seeds & set(self._w_group)
+
+    def _expand(self, hood, groups_only=False):
+        """Следующее кольцо: все нагрузки тех же классов (и учителей)."""
+        result = set(hood)
+        for wid in hood:
+            result |= self._by_group[self._w_group[wid]]
+            if not groups_only:
+                result |= self._by_teacher.get(self._w_teacher[wid], set())
+        return result
+
+    def _solve_neighbourhood(self, hood, fixed_from, start):
+        """Решает модель, где нагрузки вне hood зафиксированы по fixed_from."""
+        sch = self.scheduler
+        model = sch.model.Clone()
+        proto = model.Proto()
+        for wid, entries in self._vars_by_wid.items():
+            if wid in hood: continue
+            for sid, var in entries:
+                value = 1 if (wid, sid) in fixed_from else 0
+                domain = proto.variables[var.Index()].domain  # у булевой переменной [0, 1]
+                domain[0] = domain[1] = value
+
+        sch.solver.parameters.max_time_in_seconds = max(0.1, min(self.iteration_limit, self._time_left(start)))
+        status = sch.solver.Solve(model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None, None
+        return sch.solver.ObjectiveValue(), set(sch.active_lessons())
+
+    def _cancelled(self):
+        """Остановлен без сохранения (отмена задачи)."""
+        return self.scheduler.stop_requested and not self.scheduler.keep_best
+
+    def _time_left(self, start):
+        return self.time_limit - (time.time() - start)
+
+
+def repair_schedule(snapshot, current, disruption, time_limit=5.0, scheduler=None, should_save=None):
+    """
+    Ремонт + сохранение расписания. Возвращает True, если ремонт удался.
+    scheduler — планировщик, которым управляет фоновая задача (stop/отмена, см. _JobMonitor);
+    should_save — проверка перед записью: False — результат отбрасывается (задачу отменили).
+    """
+    scheduler = scheduler or SchoolScheduler(snapshot.school_id)
+    scheduler.solver.parameters.log_search_progress = False
+    active = ScheduleRepair(scheduler, time_limit=time_limit).run(snapshot, current, disruption)
+    if active is None:
+        print("💥 Ремонт не удался или отменен — расписание не изменено.")
+        return False
+    if should_save is not None and not should_save():
+        print("⛔ Задача закрыта до сохранения — расписание не изменено.")
+        return False
+    scheduler._save_schedule(scheduler._assign_rooms(active))
+    return True
@@ -0,0 +1,151 @@
+"""
+Распределение кабинетов после того, как сетка времени утверждена.
+
+В каждом слоте уроки не зависят от других слотов, поэтому задача решается отдельно
+по слотам (параллельно) как задача о назначениях (min-cost flow):
+  урок -> подходящий свободный кабинет, или урок -> "без кабинета" (очень дорого).
+Одинаковые кабинеты (тип, вместимость, корпус) взаимозаменяемы и в потоке склеены
+в один узел с пропускной способностью = их количеству — дуг на порядки меньше.
+
+Жесткие условия: тип кабинета (спец. предмет без своего кабинета идет в обычный,
+спортзал не заменяется) и вместимость кабинета >= размер класса/подгруппы.
+Мягкие (стоимость): спец. кабинет лучше обычного, класс держим в одном корпусе,
+маленькая группа не занимает большой кабинет.
+"""
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+from ortools.graph.python import min_cost_flow
+
+from src.models.enums import RoomType, SubgroupType
+from src.solver.snapshot import ROOM_TYPE_CODE, SUBGROUP_CODE
+
+UNPLACED_COST = 1_000_000   # урок без кабинета
+FALLBACK_COST = 1_000       # спец. предмет в обычном кабинете
+BUILDING_COST = 100         # урок не в "своем" корпусе класса
+MAX_SLACK_COST = 50         # штраф за лишние места (1 за место, не больше)
+
+
+@dataclass
+class RoomAssignment:
+    placed: list = field(default_factory=list)    # [(workload_id, slot_id, room_id)]
+    unplaced: list = field(default_factory=list)  # [(workload_id, slot_id)] — кабинет не нашелся
+
+
+class RoomAssigner:
+    """Назначение кабинетов по снимку задачи."""
+
+    def __init__(self, snap, workers=None):
+        self.snap = snap
+        self.workers = workers or os.cpu_count() or 1
+        self.w_pos = {wid: i for i, wid in enumerate(snap.workload_ids.tolist())}
+
+        # Сколько мест нужно уроку: класс целиком или половина (подгруппа)
+        size = dict(zip(snap.group_ids.tolist(), snap.group_size.tolist()))
+        need = np.array([size.get(g, 0) for g in snap.w_group.tolist()], dtype=np.int32)
+        half = snap.w_subgroup != SUBGROUP_CODE[SubgroupType.WHOLE_CLASS]
+        need[half] = (need[half] + 1) // 2
+        self.need = need
+
+        # Корпуса — коды (-1: корпус не указан)
+        buildings = sorted({b for b in snap.room_building if b})
+        code = {b: k for k, b in enumerate(buildings)}
+        self.buildings = buildings
+        self.room_building = np.array([code.get(b, -1) for b in snap.room_building], dtype=np.int32)
+
+        # Классы одинаковых кабинетов: (тип, вместимость, корпус) -> позиции кабинетов
+        keys = np.stack([snap.room_type.astype(np.int32), snap.room_capacity.astype(np.int32),
+                         self.room_building], axis=1).reshape(-1, 3)
+        classes, inverse = np.unique(keys, axis=0, return_inverse=True)
+        self.cls_type, self.cls_capacity, self.cls_building = classes.T
+        self.cls_rooms = [np.flatnonzero(inverse.ravel() == c).tolist() for c in range(len(classes))]
+        self.cls_count = np.array([len(r) for r in self.cls_rooms], dtype=np.int64)
+
+    def assign(self, active):
+        """
+        active — [(workload_id, slot_id)]. Два прохода: первый определяет "свой" корпус
+        каждого класса (где у него больше всего уроков), второй назначает с его учетом.
+        """
+        by_slot = defaultdict(list)
+        for wid, sid in active:
+            by_slot[sid].append(self.w_pos[wid])
+
+        home = np.full(len(self.snap.workload_ids), -1, dtype=np.int32)
+        by_slot_rooms = self._solve_all(by_slot, home)
+
+        if len(self.buildings) > 1:
+            votes = defaultdict(Counter)
+            for _, pairs in by_slot_rooms:
+                for i, r in pairs:
+                    if r is not None and self.room_building[r] >= 0:
+                        votes[int(self.snap.w_group[i])][int(self.room_building[r])] += 1
+            group_home = {g: c.most_common(1)[0][0] for g, c in votes.items()}
+            home = np.array([group_home.get(g, -1) for g in self.snap.w_group.tolist()], dtype=np.int32)
+            by_slot_rooms = self._solve_all(by_slot, home)
+
+        result = RoomAssignment()
+        w_ids, room_ids = self.snap.workload_ids.tolist(), self.snap.room_ids.tolist()
+        for sid, pairs in by_slot_rooms:
+            for i, r in pairs:
+                if r is None:
+                    result.unplaced.append((w_ids[i], sid))
+                else:
+                    result.placed.append((w_ids[i], sid, room_ids[r]))
+        return result
+
+    def _solve_all(self, by_slot, home):
+        slots = list(by_slot.items())
+        if self.workers == 1 or len(slots) < 2:
+            return [(sid, self._solve_slot(lessons, home)) for sid, lessons in slots]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(lambda item: self._solve_slot(item[1], home), slots)
+            return list(zip([sid for sid, _ in slots], results))
+
+    def _solve_slot(self, lessons, home):
+        """Назначение в одном слоте: [(позиция нагрузки, позиция кабинета или None)]."""
+        lessons = np.asarray(lessons, dtype=np.int64)
+        n, m = len(lessons), len(self.cls_rooms)
+        if m == 0:
+            return [(i, None) for i in lessons.tolist()]
+
+        lt = self.snap.w_room_type[lessons][:, None]
+        exact = self.cls_type[None, :] == lt
+        fallback = ((self.cls_type == ROOM_TYPE_CODE[RoomType.STANDARD])[None, :]
+                    & (lt != ROOM_TYPE_CODE[RoomType.GYM]) & ~exact)
+        slack = self.cls_capacity[None, :] - self.need[lessons][:, None]
+        ok = (exact | fallback) & (slack >= 0)
+
+        cost = FALLBACK_COST * fallback + np.minimum(slack, MAX_SLACK_COST)
+        h = home[lessons][:, None]
+        cost += BUILDING_COST * ((h >= 0) & (self.cls_building[None, :] >= 0) & (self.cls_building[None, :] != h))
+
+        li, ci = np.nonzero(ok)
+        # Узлы: уроки 0..n-1, классы кабинетов n..n+m-1, источник, сток
+        src, sink = n + m, n + m + 1
+        tails = np.concatenate([np.full(n, src), li, np.arange(n), n + np.arange(m)])
+        heads = np.concatenate([np.arange(n), n + ci, np.full(n, sink), np.full(m, sink)])
+        caps = np.concatenate([np.ones(n + len(li) + n, dtype=np.int64), self.cls_count])
+        costs = np.concatenate([np.zeros(n), cost[li, ci], np.full(n, UNPLACED_COST), np.zeros(m)])
+
+        flow = min_cost_flow.SimpleMinCostFlow()
+        arcs = flow.add_arcs_with_capacity_and_unit_cost(
+            tails.astype(np.int32), heads.astype(np.int32), caps, costs.astype(np.int64))
+        supplies = np.zeros(n + m + 2, dtype=np.int64)
+        supplies[src], supplies[sink] = n, -n
+        flow.set_nodes_supplies(np.arange(n + m + 2, dtype=np.int32), supplies)
+        if flow.solve() != flow.OPTIMAL:
+            return [(i, None) for i in lessons.tolist()]
+
+        # Конкретные кабинеты раздаем внутри класса по порядку
+        used = flow.flows(arcs[n:n + len(li)]) > 0
+        free = [iter(rooms) for rooms in self.cls_rooms]
+        chosen = {k: next(free[c]) for k, c in zip(li[used].tolist(), ci[used].tolist())}
+        return [(i, chosen.get(k)) for k, i in enumerate(lessons.tolist())]
+
+
+def assign_rooms(snap, active, workers=None):
+    """Кабинеты для уроков [(workload_id, slot_id)] -> RoomAssignment."""
+    return RoomAssigner(snap, workers).assign(active)
@@ -0,0 +1,134 @@
+"""
+Правила расписания школы: хранение, проверка и компиляция.
+
+Правила хранятся по школам (ConstraintRule, формат как в constraints_config.py). У школы без
+единой строки действуют GLOBAL_CONSTRAINTS. Перед записью правило проверяется (validate_rule),
+перед расчетом компилируется: названия предметов -> id предметов школы (CompiledRule).
+Решатель, эвристика, проверки и оценка работают с id, без сравнения строк.
+
+Скомпилированные правила кэшируются в процессе по (школа, School.rules_version, справочник
+предметов). Любое изменение ConstraintRule увеличивает rules_version (см. события в конце
+модуля), поэтому кэш устаревает и в других процессах-воркерах — без общей памяти.
+"""
+from dataclasses import dataclass
+
+from sqlalchemy import event, update
+
+from src.extensions import db
+from src.models.school import ConstraintRule, School
+from src.utils.constraints_config import GLOBAL_CONSTRAINTS, ConstraintType
+
+MAX_PERIOD = 14
+LIMIT_RULES = (ConstraintType.MAX_PER_DAY, ConstraintType.MAX_CONTINUOUS)
+
+_compiled = {}   # (school_id, rules_version) -> (ключ справочника предметов, правила)
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """Правило в терминах одной школы: id предметов вместо названий."""
+    type: ConstraintType
+    subject_ids: tuple             # id предметов школы (неизвестные названия отброшены)
+    max_value: int = 0             # MAX_PER_DAY / MAX_CONTINUOUS
+    preferred_periods: tuple = ()  # PERIOD_PRIORITY
+    bonus: int = 0                 # PERIOD_PRIORITY
+
+
+def validate_rule(data):
+    """
+    Проверка правила (dict в формате constraints_config; type — ConstraintType или его значение).
+    Возвращает нормализованный dict, ValueError с понятным текстом — если правило некорректно.
+    """
+    try:
+        rtype = ConstraintType(getattr(data.get("type"), "value", data.get("type")))
+    except ValueError:
+        raise ValueError(f"Неизвестный тип правила: {data.get('type')}. "
+                         f"Доступны: {', '.join(t.value for t in ConstraintType)}")
+
+    subjects = data.get("subjects")
+    if not isinstance(subjects, (list, tuple)) or not subjects \
+            or not all(isinstance(s, str) and s.strip() for s in subjects):
+        raise ValueError("subjects: нужен непустой список названий предметов")
+    rule = {"type": rtype, "subjects": list(dict.fromkeys(s.strip() for s in subjects))}
+
+    if rtype in LIMIT_RULES:
+        max_value = data.get("max_value")
+        if not isinstance(max_value, int) or isinstance(max_value, bool) or not 1 <= max_value <= MAX_PERIOD:
+            raise ValueError(f"max_value: целое от 1 до {MAX_PERIOD}")
+        rule["max_value"] = max_value
+    else:
+        periods = data.get("preferred_periods")
+        if not isinstance(periods, (list, tuple)) or not periods \
+                or not all(isinstance(p, int) and 1 <= p <= MAX_PERIOD for p in periods):
+            raise ValueError(f"preferred_periods: непустой список номеров уроков от 1 до {MAX_PERIOD}")
+        bonus = data.get("bonus")
+        if not isinstance(bonus, int) or isinstance(bonus, bool) or bonus <= 0:
+            raise ValueError("bonus: положительное целое")
+        rule["preferred_periods"] = sorted(set(periods))
+        rule["bonus"] = bonus
+    return rule
+
+
+def compile_rules(rules, subject_ids, subject_names):
+    """Правила (dict) -> кортеж CompiledRule для справочника предметов школы."""
+    id_by_name = dict(zip(subject_names, subject_ids))
+    compiled = []
+    for rule in rules:
+        rule = validate_rule(rule)
+        compiled.append(CompiledRule(
+            type=rule["type"],
+            subject_ids=tuple(sorted(int(id_by_name[n]) for n in rule["subjects"] if n in id_by_name)),
+            max_value=rule.get("max_value", 0),
+            preferred_periods=tuple(rule.get("preferred_periods", ())),
+            bonus=rule.get("bonus", 0),
+        ))
+    return tuple(compiled)
+
+
+def school_rules(school_id):
+    """Действующие правила школы (dict); у школы без своих правил — GLOBAL_CONSTRAINTS."""
+    rows = ConstraintRule.query.filter_by(school_id=school_id).order_by(ConstraintRule.id).all()
+    if not rows:
+        return GLOBAL_CONSTRAINTS
+    return [row.to_rule() for row in rows if row.enabled]
+
+
+def load_rules(school_id, subject_ids, subject_names):
+    """Скомпилированные правила школы: из кэша процесса, пока не изменились правила или предметы."""
+    version = db.session.query(School.rules_version).filter(School.id == school_id).scalar() or 0
+    subjects = (tuple(int(s) for s in subject_ids), tuple(subject_names))
+    cached = _compiled.get((school_id, version))
+    if cached is not None and cached[0] == subjects:
+        return cached[1]
+
+    rules = compile_rules(school_rules(school_id), *subjects)
+    for key in [k for k in _compiled if k[0] == school_id]:
+        del _compiled[key]
+    _compiled[(school_id, version)] = (subjects, rules)
+    return rules
+
+
+def default_rules(subject_ids, subject_names):
+    """GLOBAL_CONSTRAINTS для справочника предметов (снимки без БД, см. ProblemSnapshot.from_objects)."""
+    return compile_rules(GLOBAL_CONSTRAINTS, subject_ids, subject_names)
+
+
+@event.listens_for(ConstraintRule, "before_insert")
+@event.listens_for(ConstraintRule, "before_update")
+def _validate_on_save(mapper, connection, target):
+    """Проверка при любой записи (API, админка, скрипты): некорректное правило не сохраняется."""
+    rule = validate_rule(target.to_rule())
+    target.rule_type = rule["type"]
+    target.subjects = rule["subjects"]
+    target.max_value = rule.get("max_value")
+    target.preferred_periods = rule.get("preferred_periods")
+    target.bonus = rule.get("bonus")
+
+
+@event.listens_for(ConstraintRule, "after_insert")
+@event.listens_for(ConstraintRule, "after_update")
+@event.listens_for(ConstraintRule, "after_delete")
+def _bump_version(mapper, connection, target):
+    """Новая версия правил школы — скомпилированные правила во всех процессах устаревают."""
+    connection.execute(update(School).where(School.id == target.school_id)
+                       .values(rules_version=School.rules_version + 1))
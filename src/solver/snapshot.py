@@ -0,0 +1,191 @@
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from src.extensions import db
+from src.models.enums import RoomType, SubgroupType
+from src.models.schedule import Workload, TimeSlot, StudentGroup, ScheduleEntry
+from src.models.school import Room, Subject, Teacher
+from src.solver.rules import default_rules, load_rules
+
+# Enum-ы хранятся в колонках как коды (индекс в этих кортежах)
+ROOM_TYPES = tuple(RoomType)
+SUBGROUPS = tuple(SubgroupType)
+ROOM_TYPE_CODE = {rt: i for i, rt in enumerate(ROOM_TYPES)}
+SUBGROUP_CODE = {sg: i for i, sg in enumerate(SUBGROUPS)}
+
+# Колонки, которые идут "по строке нагрузки"
+WORKLOAD_COLUMNS = ('workload_ids', 'w_teacher', 'w_group', 'w_subject',
+                    'w_room_type', 'w_hours', 'w_subgroup', 'w_shift')
+
+
+def _ids(values):
+    return np.asarray(values, dtype=np.int64)
+
+
+def _small(values):
+    return np.asarray(values, dtype=np.int16)
+
+
+@dataclass
+class ProblemSnapshot:
+    """
+    Компактный снимок задачи без ORM: плоские NumPy-колонки.
+    Загружается несколькими bulk-запросами, легко сериализуется (pickle)
+    и передается в рабочие процессы.
+    """
+    school_id: int
+
+    # Нагрузка (строка i = одна нагрузка, отсортировано по id)
+    workload_ids: np.ndarray
+    w_teacher: np.ndarray
+    w_group: np.ndarray
+    w_subject: np.ndarray
+    w_room_type: np.ndarray   # код ROOM_TYPES
+    w_hours: np.ndarray
+    w_subgroup: np.ndarray    # код SUBGROUPS
+    w_shift: np.ndarray       # смена класса
+
+    # Временная сетка (отсортировано по дню и уроку)
+    slot_ids: np.ndarray
+    slot_day: np.ndarray
+    slot_period: np.ndarray
+    slot_shift: np.ndarray
+
+    # Справочники
+    teacher_ids: np.ndarray
+    teacher_is_vacancy: np.ndarray
+    teacher_max_hours: np.ndarray
+    teacher_constraints: list  # Teacher.constraints (JSON) или None
+    group_ids: np.ndarray
+    group_shift: np.ndarray
+    group_size: np.ndarray
+    subject_ids: np.ndarray
+    subject_names: list
+
+    # Кабинеты
+    room_ids: np.ndarray
+    room_type: np.ndarray     # код ROOM_TYPES
+    room_capacity: np.ndarray
+    room_building: list
+
+    # Правила школы, скомпилированные по id предметов (см. rules.py)
+    rules: tuple = ()
+
+    @property
+    def n_workloads(self):
+        return len(self.workload_ids)
+
+    @property
+    def n_slots(self):
+        return len(self.slot_ids)
+
+    def subset(self, positions):
+        """Снимок только с частью нагрузок (позиции i); справочники и сетка общие."""
+        positions = np.asarray(positions, dtype=np.int64)
+        return replace(self, **{name: getattr(self, name)[positions] for name in WORKLOAD_COLUMNS})
+
+    def room_capacities(self):
+        """Количество кабинетов каждого типа: массив по кодам ROOM_TYPES."""
+        return np.bincount(self.room_type, minlength=len(ROOM_TYPES))
+
+    @classmethod
+    def load(cls, school_id):
+        """Загрузка одной школы bulk-запросами по колонкам (без ORM-объектов)."""
+        q = db.session.query
+        w_rows = q(Workload.id, Workload.teacher_id, Workload.group_id, Workload.subject_id,
+                   Workload.required_room_type, Workload.hours_per_week, Workload.subgroup) \
+            .filter(Workload.school_id == school_id).order_by(Workload.id).all()
+        s_rows = q(TimeSlot.id, TimeSlot.day_of_week, TimeSlot.period_number, TimeSlot.shift_number) \
+            .filter(TimeSlot.school_id == school_id) \
+            .order_by(TimeSlot.day_of_week, TimeSlot.period_number).all()
+        t_rows = q(Teacher.id, Teacher.is_vacancy, Teacher.max_hours, Teacher.constraints) \
+            .filter(Teacher.school_id == school_id).order_by(Teacher.id).all()
+        g_rows = q(StudentGroup.id, StudentGroup.shift, StudentGroup.size) \
+            .filter(StudentGroup.school_id == school_id).order_by(StudentGroup.id).all()
+        subj_rows = q(Subject.id, Subject.name) \
+            .filter(Subject.school_id == school_id).order_by(Subject.id).all()
+        r_rows = q(Room.id, Room.room_type, Room.capacity, Room.building) \
+            .filter(Room.school_id == school_id).order_by(Room.id).all()
+
+        group_shift = {gid: shift for gid, shift, _ in g_rows}
+
+        return cls(
+            school_id=school_id,
+            workload_ids=_ids([r[0] for r in w_rows]),
+            w_teacher=_ids([r[1] for r in w_rows]),
+            w_group=_ids([r[2] for r in w_rows]),
+            w_subject=_ids([r[3] for r in w_rows]),
+            w_room_type=_small([ROOM_TYPE_CODE[r[4]] for r in w_rows]),
+            w_hours=_small([r[5] for r in w_rows]),
+            w_subgroup=_small([SUBGROUP_CODE[r[6]] for r in w_rows]),
+            w_shift=_small([group_shift.get(r[2], 1) for r in w_rows]),
+            slot_ids=_ids([r[0] for r in s_rows]),
+            slot_day=_small([r[1] for r in s_rows]),
+            slot_period=_small([r[2] for r in s_rows]),
+            slot_shift=_small([r[3] for r in s_rows]),
+            teacher_ids=_ids([r[0] for r in t_rows]),
+            teacher_is_vacancy=np.asarray([bool(r[1]) for r in t_rows], dtype=bool),
+            teacher_max_hours=_small([r[2] or 0 for r in t_rows]),
+            teacher_constraints=[r[3] for r in t_rows],
+            group_ids=_ids([r[0] for r in g_rows]),
+            group_shift=_small([r[1] for r in g_rows]),
+            group_size=_small([r[2] for r in g_rows]),
+            subject_ids=_ids([r[0] for r in subj_rows]),
+            subject_names=[r[1] for r in subj_rows],
+            room_ids=_ids([r[0] for r in r_rows]),
+            room_type=_small([ROOM_TYPE_CODE[r[1]] for r in r_rows]),
+            room_capacity=_small([r[2] for r in r_rows]),
+            room_building=[r[3] or "" for r in r_rows],
+            rules=load_rules(school_id, [r[0] for r in subj_rows], [r[1] for r in subj_rows]),
+        )
+
+    @classmethod
+    def from_objects(cls, school_id, workloads, slots, rooms):
+        """Снимок из уже загруженных объектов (ORM или любых с теми же атрибутами); правила — GLOBAL_CONSTRAINTS."""
+        workloads = sorted(workloads, key=lambda x: x.id)
+        slots = sorted(slots, key=lambda x: (x.day_of_week, x.period_number))
+        rooms = sorted(rooms, key=lambda x: x.id)
+
+        teachers = {w.teacher_id: w.teacher for w in workloads}
+        groups = {w.group_id: w.group for w in workloads}
+        subjects = {w.subject_id: w.subject for w in workloads}
+        t_ids, g_ids, subj_ids = sorted(teachers), sorted(groups), sorted(subjects)
+
+        return cls(
+            school_id=school_id,
+            workload_ids=_ids([w.id for w in workloads]),
+            w_teacher=_ids([w.teacher_id for w in workloads]),
+            w_group=_ids([w.group_id for w in workloads]),
+            w_subject=_ids([w.subject_id for w in workloads]),
+            w_room_type=_small([ROOM_TYPE_CODE[w.required_room_type] for w in workloads]),
+            w_hours=_small([w.hours_per_week for w in workloads]),
+            w_subgroup=_small([SUBGROUP_CODE[w.subgroup] for w in workloads]),
+            w_shift=_small([w.group.shift for w in workloads]),
+            slot_ids=_ids([s.id for s in slots]),
+            slot_day=_small([s.day_of_week for s in slots]),
+            slot_period=_small([s.period_number for s in slots]),
+            slot_shift=_small([getattr(s, 'shift_number', 1) for s in slots]),
+            teacher_ids=_ids(t_ids),
+            teacher_is_vacancy=np.asarray([bool(teachers[t].is_vacancy) for t in t_ids], dtype=bool),
+            teacher_max_hours=_small([getattr(teachers[t], 'max_hours', 0) or 0 for t in t_ids]),
+            teacher_constraints=[getattr(teachers[t], 'constraints', None) for t in t_ids],
+            group_ids=_ids(g_ids),
+            group_shift=_small([groups[g].shift for g in g_ids]),
+            group_size=_small([getattr(groups[g], 'size', 30) for g in g_ids]),
+            subject_ids=_ids(subj_ids),
+            subject_names=[subjects[s].name for s in subj_ids],
+            room_ids=_ids([r.id for r in rooms]),
+            room_type=_small([ROOM_TYPE_CODE[r.room_type] for r in rooms]),
+            room_capacity=_small([getattr(r, 'capacity', 30) for r in rooms]),
+            room_building=[getattr(r, 'building', "") or "" for r in rooms],
+            rules=default_rules(subj_ids, [subjects[s].name for s in subj_ids]),
+        )
+
+
+def load_schedule_hints(school_id):
+    """Текущее расписание школы как пары (workload_id, timeslot_id) — для теплого старта."""
+    rows = db.session.query(ScheduleEntry.workload_id, ScheduleEntry.timeslot_id) \
+        .join(Workload, Workload.id == ScheduleEntry.workload_id) \
+        .filter(Workload.school_id == school_id).all()
+    return [(wid, sid) for wid, sid in rows]
@@ -0,0 +1,36 @@
+"""
+Симметрии модели: взаимозаменяемые нагрузки.
+
+Две нагрузки взаимозаменяемы, если обмен их уроками переводит любое решение в решение
+с той же целью. Для модели SchoolScheduler это так, когда у нагрузок совпадают:
+класс, предмет, часы, тип кабинета (после замен пресолва), "весь класс / подгруппа",
+допустимые слоты и учитель — либо оба учителя вакансии (у вакансий нет ни конфликтов,
+ни "магнита" окон). Типичные случаи: GROUP_1 и GROUP_2 одного предмета у одного учителя,
+несколько "Вакансия (...)" на одном предмете класса.
+
+Внутри такого класса решатель перебирает равноценные перестановки; engine упорядочивает
+нагрузки по первому уроку (см. SchoolScheduler._break_symmetries).
+"""
+import numpy as np
+
+from src.models.enums import SubgroupType
+from src.solver.snapshot import SUBGROUP_CODE
+
+
+def symmetric_classes(snap, pre):
+    """Классы взаимозаменяемых нагрузок: [[позиция i, ...]] — только классы из 2+ нагрузок."""
+    if not snap.n_workloads:
+        return []
+    vacancy = snap.teacher_is_vacancy[np.searchsorted(snap.teacher_ids, snap.w_teacher)]
+    teacher = np.where(vacancy, -1, snap.w_teacher)
+    whole = snap.w_subgroup == SUBGROUP_CODE[SubgroupType.WHOLE_CLASS]
+    keys = np.column_stack([snap.w_group, snap.w_subject, snap.w_hours, pre.room_type,
+                            whole, teacher, pre.allowed]).astype(np.int64)
+    _, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+
+    # Нагрузки без уроков или без допустимых слотов переменных не имеют — упорядочивать нечего
+    members = np.flatnonzero((counts[inverse] > 1) & (snap.w_hours > 0) & pre.allowed.any(axis=1))
+    members = members[np.argsort(inverse[members], kind="stable")]
+    cuts = np.flatnonzero(np.diff(inverse[members])) + 1
+    return [group.tolist() for group in np.split(members, cuts) if len(group) > 1]
@@ -0,0 +1,68 @@
+"""
+Телеметрия одного запуска решателя: время по фазам, размер модели по семействам
+ограничений, статистика CP-SAT и пик памяти. Собирается в памяти, в БД пишется
+одной строкой SolveRun в конце run_algorithm.
+"""
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_memory_mb():
+    """Пик RSS процесса и его дочерних процессов (части декомпозиции), МБ. None — не поддерживается."""
+    if resource is None:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024  # Linux: ru_maxrss в КБ
+
+
+class SolveTelemetry:
+    def __init__(self):
+        self.phases = {}                 # фаза -> секунды (повторные входы суммируются)
+        self.constraints_by_family = {}  # семейство -> сколько ограничений добавлено
+        self.stats = {}                  # статистика решателя и прочие цифры запуска
+        self.constraint_ranges = {}      # семейство -> [(первый, последний + 1)] индексы в CpModelProto
+
+    @contextmanager
+    def phase(self, name, model=None):
+        """Замер фазы. С model — заодно считаем, сколько ограничений добавила фаза."""
+        start = time.perf_counter()
+        before = len(model.Proto().constraints) if model is not None else 0
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+            if model is not None:
+                after = len(model.Proto().constraints)
+                self.constraints_by_family[name] = self.constraints_by_family.get(name, 0) + after - before
+                self.constraint_ranges.setdefault(name, []).append((before, after))
+
+    def record_solver(self, solver, status):
+        """Ответ CP-SAT после Solve."""
+        objective, bound = solver.ObjectiveValue(), solver.BestObjectiveBound()
+        self.stats.update({
+            "status": solver.StatusName(status),
+            "conflicts": solver.NumConflicts(),
+            "branches": solver.NumBranches(),
+            "solver_wall_time": solver.WallTime(),
+            "objective": objective,
+            "best_bound": bound,
+            "gap": abs(bound - objective) / max(1.0, abs(objective)),
+        })
+
+    def add_part(self, part):
+        """Сводка части декомпозиции: счетчики складываются, фазы — по максимуму (части идут параллельно)."""
+        for key in ("conflicts", "branches", "variables", "constraints", "objective"):
+            self.stats[key] = self.stats.get(key, 0) + (part.get(key) or 0)
+        statuses = self.stats.setdefault("part_statuses", [])
+        statuses.append(part.get("status"))
+        self.stats["status"] = next((s for s in statuses if s != "OPTIMAL"), "OPTIMAL")
+        for name, seconds in part.get("phases", {}).items():
+            self.phases[f"parts.{name}"] = max(self.phases.get(f"parts.{name}", 0.0), seconds)
+        for name, count in part.get("constraints_by_family", {}).items():
+            self.constraints_by_family[name] = self.constraints_by_family.get(name, 0) + count
@@ -0,0 +1,149 @@
+"""
+Пакетный расчет нескольких школ (ночная перегенерация по району).
+
+Для каждой школы создается обычная SolveJob (статус, прогресс, отмена, телеметрия — как у
+одиночной задачи), а сами задачи решаются в пуле процессов:
+  * одновременно считается не больше max_parallel школ;
+  * CPU-бюджет делится поровну между одновременно идущими расчетами (num_search_workers);
+  * крупные школы (по числу нагрузок) стартуют первыми — меньше "хвост" в конце пакета.
+Каждый процесс пишет только расписание своей школы (см. delete_school_schedule).
+"""
+import multiprocessing
+import os
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from celery import shared_task
+from flask import current_app
+from sqlalchemy import func
+
+from src.extensions import db
+from src.models.enums import JobStatus
+from src.models.jobs import SolveJob
+from src.models.schedule import Workload
+from src.models.school import School
+from src.tasks.jobs import create_job, run_job, JobConflictError, HEARTBEAT_EVERY
+
+
+def plan_batch(n_jobs, cpu_budget=None, max_parallel=None):
+    """Сколько школ считать одновременно и сколько потоков CP-SAT дать каждой."""
+    cpu_budget = max(1, cpu_budget or os.cpu_count() or 1)
+    parallel = max(1, min(n_jobs, max_parallel or cpu_budget, cpu_budget))
+    return parallel, max(1, cpu_budget // parallel)
+
+
+def create_batch(school_ids=None, params=None, cpu_budget=None, max_parallel=None):
+    """
+    Создает задачи для списка школ (None — все школы).
+    Возвращает (jobs, conflicts, parallel): школы, где уже идет расчет, попадают в conflicts.
+    """
+    if not school_ids:
+        school_ids = [sid for (sid,) in db.session.query(School.id).order_by(School.id)]
+    school_ids = list(dict.fromkeys(int(s) for s in school_ids))
+
+    sizes = dict(db.session.query(Workload.school_id, func.count(Workload.id))
+                 .filter(Workload.school_id.in_(school_ids)).group_by(Workload.school_id).all())
+    order = sorted(school_ids, key=lambda s: -sizes.get(s, 0))
+    parallel, workers = plan_batch(len(order), cpu_budget, max_parallel)
+
+    jobs, conflicts = [], []
+    for school_id in order:
+        try:
+            jobs.append(create_job(school_id, {**(params or {}), 'workers': workers, 'batch': True}))
+        except JobConflictError as e:
+            conflicts.append(e.job)
+    return jobs, conflicts, parallel
+
+
+def submit_batch(school_ids=None, params=None, cpu_budget=None, max_parallel=None):
+    """create_batch + постановка всего пакета в очередь одной задачей."""
+    jobs, conflicts, parallel = create_batch(school_ids, params, cpu_budget, max_parallel)
+    if jobs:
+        solve_batch_task.delay([job.id for job in jobs], parallel)
+    return jobs, conflicts
+
+
+def _run_in_process(job_id):
+    """Рабочий процесс пула: свое приложение и свое соединение с БД."""
+    from src.app import create_app
+
+    app = create_app()
+    with app.app_context():
+        run_job(job_id)
+        job = db.session.get(SolveJob, job_id)
+        return job.to_dict()
+
+
+def _keep_queued(app, job_ids, finished):
+    """
+    Пульс задач пакета, ждущих своей очереди: пакет жив, и expire_stale_jobs не снимает их
+    по QUEUE_TIMEOUT. Умер процесс пакета — пульс прекращается, и задачи снимаются.
+    """
+    with app.app_context():
+        while not finished.wait(HEARTBEAT_EVERY.total_seconds()):
+            db.session.query(SolveJob) \
+                .filter(SolveJob.id.in_(job_ids), SolveJob.status == JobStatus.QUEUED) \
+                .update({SolveJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+            db.session.commit()
+        db.session.remove()
+
+
+def run_batch(job_ids, parallel):
+    """Решает задачи пакета, не больше parallel одновременно. Возвращает итоговые статусы."""
+    finished = threading.Event()
+    keeper = threading.Thread(target=_keep_queued, daemon=True,
+                              args=(current_app._get_current_object(), list(job_ids), finished))
+    keeper.start()
+    try:
+        return _run_batch(job_ids, parallel)
+    finally:
+        finished.set()
+        keeper.join()
+
+
+def _run_batch(job_ids, parallel):
+    results = []
+
+    def done(job):
+        print(f"📦 Школа {job['school_id']}: {job['status']} — {job['message']}")
+        results.append(job)
+
+    if parallel > 1 and multiprocessing.current_process().daemon:
+        # Воркер с prefork-пулом (задача в демоническом процессе): пул процессов не запустить
+        print("⚠️ Пакет запущен в демоническом процессе — школы считаются по очереди (нужен --pool threads).")
+        parallel = 1
+
+    if parallel == 1 or len(job_ids) == 1:
+        for job_id in job_ids:
+            run_job(job_id)
+            done(db.session.get(SolveJob, job_id).to_dict())
+        return results
+
+    # spawn: не наследуем соединения с БД и состояние OR-Tools родителя
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=parallel, mp_context=ctx) as pool:
+        futures = {pool.submit(_run_in_process, job_id): job_id for job_id in job_ids}
+        for future in as_completed(futures):
+            try:
+                done(future.result())
+            except Exception as e:
+                # Процесс упал целиком — задача осталась RUNNING, закрываем ее здесь
+                done(_fail_job(futures[future], f"Ошибка процесса: {e}"))
+    return results
+
+
+def _fail_job(job_id, message):
+    job = db.session.get(SolveJob, job_id)
+    db.session.refresh(job)
+    if job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+        job.status = JobStatus.FAILED
+        job.message = message
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    return job.to_dict()
+
+
+@shared_task(ignore_result=True)
+def solve_batch_task(job_ids, parallel):
+    run_batch(job_ids, parallel)
@@ -0,0 +1,13 @@
+"""
+Точка входа воркера:
+    celery -A src.tasks.celery_worker worker --pool threads --loglevel=info
+
+Пул — потоки (worker_pool в config.py): расчеты сами запускают процессы, а из задач
+prefork-пула (демонических процессов) это запрещено.
+"""
+from src.app import create_app
+import src.tasks.jobs  # noqa: F401  (регистрация задач)
+import src.tasks.batch  # noqa: F401
+
+flask_app = create_app()
+celery = flask_app.extensions["celery"]
@@ -0,0 +1,285 @@
+"""
+Фоновые задачи расчета расписания.
+
+Веб-запрос только создает SolveJob и ставит задачу в очередь; сам расчет идет в воркере
+Celery (или в процессе, если JOB_BACKEND=eager — для тестов и запуска без Redis).
+Состояние задачи хранится в таблице solve_jobs, на школу — не больше одной активной.
+"""
+import threading
+from datetime import datetime, timedelta
+
+from celery import shared_task
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from src.extensions import db
+from src.models.enums import JobStatus
+from src.models.jobs import SolveJob, SolveProgress, SolveRun, ACTIVE_STATUSES
+from src.models.school import School
+from src.solver.cache import SolveCache
+from src.solver.engines import get_engine
+from src.solver.feasibility import describe_infeasibility
+from src.solver.heuristic import heuristic_hints
+from src.solver.repair import Disruption, repair_schedule
+from src.solver.snapshot import ProblemSnapshot, load_schedule_hints
+
+# Пульс идущей задачи (см. _JobMonitor). Задача RUNNING без пульса дольше STALE_AFTER —
+# воркер умер (OOM, SIGKILL, падение OR-Tools), она закрывается и не блокирует школу
+HEARTBEAT_EVERY = timedelta(seconds=15)
+STALE_AFTER = timedelta(minutes=5)
+# Задача QUEUED дольше QUEUE_TIMEOUT (от создания или последнего пульса пакета, см. batch.py) —
+# сообщение потерялось в брокере или воркер так и не взял ее
+QUEUE_TIMEOUT = timedelta(hours=1)
+
+
+class JobConflictError(Exception):
+    """У школы уже есть активная задача."""
+
+    def __init__(self, job):
+        super().__init__(f"Для школы {job.school_id} уже идет расчет (задача #{job.id})")
+        self.job = job
+
+
+def expire_stale_jobs(school_id):
+    """
+    Зависшие задачи школы -> FAILED: RUNNING без пульса дольше STALE_AFTER,
+    QUEUED без старта дольше QUEUE_TIMEOUT. Возвращает их число.
+    """
+    now = datetime.utcnow()
+    last_sign = db.func.coalesce(SolveJob.heartbeat_at, SolveJob.started_at, SolveJob.created_at)
+    stale = SolveJob.query.filter(SolveJob.school_id == school_id, db.or_(
+        db.and_(SolveJob.status == JobStatus.RUNNING, last_sign < now - STALE_AFTER),
+        db.and_(SolveJob.status == JobStatus.QUEUED, last_sign < now - QUEUE_TIMEOUT))).all()
+    for job in stale:
+        job.message = "Воркер перестал отвечать — расчет прерван" if job.status == JobStatus.RUNNING \
+            else "Задача не дождалась воркера — снята с очереди"
+        job.status = JobStatus.FAILED
+        job.finished_at = now
+    if stale:
+        db.session.commit()
+        print(f"🪦 Школа {school_id}: закрыто зависших задач — {len(stale)}.")
+    return len(stale)
+
+
+def active_job(school_id):
+    expire_stale_jobs(school_id)
+    return SolveJob.query.filter(SolveJob.school_id == school_id,
+                                 SolveJob.status.in_(ACTIVE_STATUSES)).first()
+
+
+def create_job(school_id, params=None):
+    """Создает задачу в статусе QUEUED (без постановки в очередь). JobConflictError, если школа уже считается."""
+    running = active_job(school_id)
+    if running:
+        raise JobConflictError(running)
+
+    job = SolveJob(school_id=school_id, params=params or {})
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Гонка двух запросов: уникальный индекс по активным задачам сработал раньше нас
+        db.session.rollback()
+        raise JobConflictError(active_job(school_id))
+    return job
+
+
+def submit_job(school_id, params=None):
+    """Создает задачу и ставит ее в очередь. JobConflictError, если школа уже считается."""
+    job = create_job(school_id, params)
+    result = solve_schedule_task.delay(job.id)
+    job.task_id = result.id
+    db.session.commit()
+    return job
+
+
+def control_job(job, command):
+    """Команда идущему расчету: "stop" — остановить и сохранить лучшее, "save" — сохранить лучшее."""
+    if job.status != JobStatus.RUNNING:
+        return False
+    job.control = command
+    db.session.commit()
+    return True
+
+
+def cancel_job(job):
+    """Отмена: задача в очереди не стартует, идущий расчет останавливается без сохранения."""
+    if job.status not in ACTIVE_STATUSES:
+        return False
+    job.status = JobStatus.CANCELLED
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+class _JobMonitor(threading.Thread):
+    """
+    Поток-наблюдатель рядом с решателем:
+      * переносит точки прогресса из ProgressCallback в таблицу solve_progress;
+      * выполняет команды из БД: отмена (без сохранения), "stop" (стоп + сохранить лучшее),
+        "save" (сохранить лучшее найденное, расчет продолжается).
+    """
+
+    def __init__(self, app, job_id, scheduler, interval=1.0):
+        super().__init__(daemon=True)
+        self.app = app
+        self.job_id = job_id
+        self.scheduler = scheduler
+        self.interval = interval
+        self.flushed = 0
+        self.done = threading.Event()
+
+    def run(self):
+        with self.app.app_context():
+            while not self.done.wait(self.interval):
+                self.flush_progress()
+                job = db.session.get(SolveJob, self.job_id)
+                db.session.refresh(job)
+
+                # Отменена или закрыта как зависшая (expire_stale_jobs) — стоп без сохранения
+                if job.status != JobStatus.RUNNING:
+                    self.scheduler.stop()
+                    break
+                now = datetime.utcnow()
+                if job.heartbeat_at is None or now - job.heartbeat_at >= HEARTBEAT_EVERY:
+                    job.heartbeat_at = now
+                    db.session.commit()
+                if job.control == 'stop':
+                    self.scheduler.stop(keep_best=True)
+                elif job.control == 'save':
+                    self.save_best()
+                if job.control:
+                    job.control = None
+                    db.session.commit()
+            db.session.remove()
+
+    def flush_progress(self):
+        """Новые точки прогресса -> БД (колбэк сам в базу не ходит, чтобы не тормозить поиск)."""
+        progress = self.scheduler.progress
+        if progress is None or len(progress.points) <= self.flushed:
+            return
+        new_points = progress.points[self.flushed:]
+        db.session.add_all([SolveProgress(job_id=self.job_id, **p) for p in new_points])
+        db.session.commit()
+        self.flushed += len(new_points)
+
+    def save_best(self):
+        progress = self.scheduler.progress
+        if progress is None or progress.best is None:
+            return
+        best = progress.best
+        self.scheduler._save_schedule(self.scheduler._assign_rooms(best))
+        print(f"💾 Сохранено лучшее на текущий момент расписание ({len(best)} уроков).")
+
+
+def _replay_record(run_id):
+    """Запись победителя портфельного запуска SolveRun (для повтора его поиска)."""
+    if not run_id:
+        return None
+    run = db.session.get(SolveRun, run_id)
+    winner = ((run.stats or {}).get('portfolio') or {}).get('winner') if run else None
+    if winner is None:
+        raise ValueError(f"Запуск #{run_id} не портфельный или без победителя")
+    return winner
+
+
+def _job_running(job_id):
+    """Задача все еще RUNNING (не отменена и не закрыта как зависшая)."""
+    job = db.session.get(SolveJob, job_id)
+    db.session.refresh(job)
+    return job.status == JobStatus.RUNNING
+
+
+def _run_repair(job_id, scheduler, snapshot, repair):
+    """
+    Ремонт текущего расписания (см. repair.py) под тем же _JobMonitor, что и расчет:
+    пульс, отмена и "stop" доходят до ScheduleRepair; отмененный ремонт расписание не пишет.
+    """
+    current = load_schedule_hints(snapshot.school_id)
+    if not current:
+        return False, "Нет текущего расписания для ремонта"
+    ok = repair_schedule(snapshot, current, Disruption.from_json(repair),
+                         time_limit=float(repair.get('time_limit', 5)), scheduler=scheduler,
+                         should_save=lambda: _job_running(job_id))
+    return ok, "Расписание отремонтировано" if ok else "Не удалось отремонтировать расписание"
+
+
+def run_job(job_id):
+    """Выполнение задачи (внутри воркера, в app context)."""
+    job = db.session.get(SolveJob, job_id)
+    if job is None or job.status != JobStatus.QUEUED:
+        return
+
+    job.status = JobStatus.RUNNING
+    job.started_at = job.heartbeat_at = datetime.utcnow()
+    db.session.commit()
+
+    try:
+        params = job.params or {}
+        # Профиль: из запроса, иначе настройка школы, иначе профиль по умолчанию
+        school = db.session.get(School, job.school_id)
+        profile = params.get('profile') or (school.solver_profile if school else None)
+        scheduler = get_engine(params.get('engine'))(job.school_id, profile)
+        scheduler.job_id = job_id
+        if params.get('workers'):
+            # Доля CPU, выделенная задаче в пакетном расчете (см. batch.py)
+            scheduler.solver.parameters.num_search_workers = int(params['workers'])
+        if 'two_phase' in params:
+            scheduler.two_phase = bool(params['two_phase'])
+        if params.get('lean'):
+            scheduler.lean = True
+            scheduler.debug_names = bool(params.get('debug_names'))
+        if not params.get('no_cache'):
+            scheduler.cache = SolveCache.from_config(current_app.config)
+
+        with scheduler.telemetry.phase("load"):
+            snapshot = ProblemSnapshot.load(job.school_id)
+            hints = load_schedule_hints(job.school_id) if params.get('warm') else None
+        if params.get('heuristic_hint') and snapshot.n_workloads:
+            # Подсказка от эвристики: только ускоряет поиск, поэтому без бонуса за сохранение уроков
+            with scheduler.telemetry.phase("heuristic_hint"):
+                hints = heuristic_hints(snapshot, scheduler.blocked_slots)
+            scheduler.keep_bonus = 0
+            scheduler.complete_hints = True
+        if not snapshot.n_workloads:
+            ok, message = False, "База нагрузки пуста"
+        else:
+            monitor = _JobMonitor(current_app._get_current_object(), job_id, scheduler)
+            monitor.start()
+            try:
+                if params.get('repair'):
+                    ok, message = _run_repair(job_id, scheduler, snapshot, params['repair'])
+                else:
+                    ok = scheduler.run_algorithm(snapshot, decompose=params.get('decompose'),
+                                                 hints=hints, max_changes=params.get('max_changes'),
+                                                 portfolio=params.get('portfolio', False),
+                                                 replay=_replay_record(params.get('replay_run')))
+                    message = "Расписание сохранено" if ok else "Не удалось составить расписание"
+            finally:
+                monitor.done.set()
+                monitor.join()
+                monitor.flush_progress()
+            if ok and scheduler.stop_requested:
+                message = "Остановлено досрочно, сохранено лучшее найденное расписание"
+            if ok and scheduler.unplaced:
+                message += f" (без кабинета: {len(scheduler.unplaced)} уроков)"
+            if not ok and scheduler.infeasibility:
+                message += f": {describe_infeasibility(scheduler.infeasibility)}"
+    except Exception as e:
+        db.session.rollback()
+        ok, message = False, f"Ошибка: {e}"
+
+    job = db.session.get(SolveJob, job_id)
+    db.session.refresh(job)
+    if job.status != JobStatus.RUNNING:
+        return  # отменена или уже закрыта как зависшая
+
+    job.status = JobStatus.DONE if ok else JobStatus.FAILED
+    job.message = message
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+@shared_task(ignore_result=True)
+def solve_schedule_task(job_id):
+    run_job(job_id)
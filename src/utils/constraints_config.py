@@ -5,6 +5,7 @@ class ConstraintType(Enum):
     MAX_CONTINUOUS = "max_continuous"
     PERIOD_PRIORITY = "period_priority"  # <--- Проверь это имя!
 
+# Правила по умолчанию: для школ без своих правил (ConstraintRule, см. src/solver/rules.py)
 GLOBAL_CONSTRAINTS = [
     {
         "type": ConstraintType.MAX_CONTINUOUS,
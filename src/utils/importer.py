@@ -1,26 +1,38 @@
 import pandas as pd
 from src.extensions import db
 from src.models.school import School, Teacher, Subject, Room
-from src.models.schedule import StudentGroup, Workload, ScheduleEntry
+from src.models.schedule import StudentGroup, Workload, delete_school_schedule
 from src.models.enums import RoomType, SubgroupType
+from src.utils.menus import invalidate_menus
 
 
-def import_rooms_from_file(filepath):
+def _get_school(school_id=None):
+    """Школа для импорта: указанная, иначе первая (создается, если базы еще нет)."""
+    if school_id is not None:
+        school = db.session.get(School, school_id)
+        if school is None:
+            raise ValueError(f"Школа {school_id} не найдена")
+        return school
+    school = School.query.first()
+    if not school:
+        school = School(name="Universal School")
+        db.session.add(school)
+        db.session.commit()
+    return school
+
+
+def import_rooms_from_file(filepath, school_id=None):
     if filepath.endswith('.csv'):
         df = pd.read_csv(filepath)
     else:
         df = pd.read_excel(filepath)
     df.columns = [c.strip().lower() for c in df.columns]
 
-    school = School.query.first()
-    if not school:
-        school = School(name="Universal School")
-        db.session.add(school)
-        db.session.commit()
+    school = _get_school(school_id)
 
-    # Очистка
-    db.session.query(ScheduleEntry).delete()
-    db.session.query(Room).delete()
+    # Очистка (только этой школы)
+    delete_school_schedule(school.id)
+    db.session.query(Room).filter(Room.school_id == school.id).delete()
     db.session.commit()
 
     col_map = {'название': 'name', 'name': 'name', 'вместимость': 'capacity', 'capacity': 'capacity',
@@ -60,24 +72,25 @@ def import_rooms_from_file(filepath):
     return count
 
 
-def import_data_from_file(filepath):
+def import_data_from_file(filepath, school_id=None):
     if filepath.endswith('.csv'):
         df = pd.read_csv(filepath)
     else:
         df = pd.read_excel(filepath)
     df.columns = [c.strip().lower() for c in df.columns]
 
-    # Очистка
-    db.session.query(ScheduleEntry).delete()
-    db.session.query(Workload).delete()
-    db.session.commit()  # Важный коммит перед загрузкой
+    school = _get_school(school_id)
 
-    school = School.query.first()
+    # Очистка (только этой школы)
+    delete_school_schedule(school.id)
+    db.session.query(Workload).filter(Workload.school_id == school.id).delete()
+    db.session.commit()  # Важный коммит перед загрузкой
 
     # Кэши
-    subjects_cache = {s.name: s for s in Subject.query.all()}
-    groups_cache = {g.name: g for g in StudentGroup.query.all()}
-    teacher_objs = {t.name: t for t in Teacher.query.all()}
+    subjects_cache = {s.name: s for s in Subject.query.filter_by(school_id=school.id)}
+    groups_cache = {g.name: g for g in StudentGroup.query.filter_by(school_id=school.id)}
+    teacher_objs = {t.name: t for t in Teacher.query.filter_by(school_id=school.id)}
+    menu_size = (len(teacher_objs), len(groups_cache))
 
     count = 0
     # Маппинг колонок (упрощенный)
@@ -144,5 +157,7 @@ def import_data_from_file(filepath):
         db.session.add(w)
         count += 1
 
+    if (len(teacher_objs), len(groups_cache)) != menu_size:
+        invalidate_menus(school.id)  # появились новые учителя или классы
     db.session.commit()
     return count
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Меню учителей и классов (навигация schedule.html) с натуральной сортировкой.
+
+Отсортированное меню кэшируется в процессе по (школа, School.menu_version) и общее для всех
+запросов воркера. Импорт нагрузки и правки учителей/классов в админке увеличивают
+menu_version (invalidate_menus) — кэш устаревает и в других воркерах, без общей памяти.
+На рендер остается один запрос: версия школы.
+"""
+from collections import namedtuple
+
+from sqlalchemy import update
+
+from src.extensions import db
+from src.models.schedule import StudentGroup
+from src.models.school import School, Teacher
+
+MenuItem = namedtuple('MenuItem', ['id', 'name'])
+
+_menus = {}   # school_id -> (menu_version, учителя, классы)
+
+
+# === СОРТИРОВКА УЧИТЕЛЕЙ (1, 2, 10 + Вакансии в конце) ===
+def teacher_sort_key(t):
+    name = t.name.strip()
+    lower_name = name.lower()
+
+    # А. ОПРЕДЕЛЯЕМ ПРЕДМЕТ (Группировка)
+    subject = name
+    is_vacancy = 0  # 0 = Учитель (сверху), 1 = Вакансия (снизу)
+
+    if t.is_vacancy or "вакансия" in lower_name:
+        is_vacancy = 1
+        if "(" in name and ")" in name:
+            start = name.find('(') + 1
+            end = name.find(')')
+            subject = name[start:end].strip()
+        else:
+            subject = name
+    elif "_" in name:
+        subject = name.split('_')[0].strip()
+
+    # Б. ИЗВЛЕКАЕМ НОМЕР (Для Teach_1, Teach_2, Teach_10)
+    number = 0
+    parts = name.split('_')
+    if len(parts) > 1 and parts[-1].isdigit():
+        number = int(parts[-1])  # Превращаем "10" в число 10
+
+    # В. КЛЮЧ СОРТИРОВКИ:
+    # 1. Предмет (Английский вместе)
+    # 2. Вакансия? (Люди выше вакансий)
+    # 3. Номер (2 < 10)
+    # 4. Имя (на случай если номеров нет)
+    return (subject.lower(), is_vacancy, number, name)
+
+
+# === СОРТИРОВКА КЛАССОВ (1, 2 ... 10, 11) ===
+def group_sort_key(g):
+    try:
+        parts = g.name.split('-')
+        if len(parts) >= 2 and parts[0].isdigit():
+            return (int(parts[0]), parts[1])
+        if g.name.isdigit(): return (int(g.name), "")
+        return (999, g.name)
+    except:
+        return (999, g.name)
+
+
+def school_menus(school_id=None):
+    """(учителя, классы) школы — списки MenuItem в порядке меню. Без school_id — первая школа."""
+    query = db.session.query(School.id, School.menu_version)
+    row = query.filter(School.id == school_id).first() if school_id is not None \
+        else query.order_by(School.id).first()
+    if row is None:
+        return [], []
+    school_id, version = row
+
+    cached = _menus.get(school_id)
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+
+    teachers = db.session.query(Teacher.id, Teacher.name, Teacher.is_vacancy) \
+        .filter(Teacher.school_id == school_id).all()
+    teachers.sort(key=teacher_sort_key)
+    groups = db.session.query(StudentGroup.id, StudentGroup.name) \
+        .filter(StudentGroup.school_id == school_id).all()
+    groups.sort(key=group_sort_key)
+
+    menus = ([MenuItem(t.id, t.name) for t in teachers], [MenuItem(g.id, g.name) for g in groups])
+    _menus[school_id] = (version, *menus)
+    return menus
+
+
+def invalidate_menus(school_id):
+    """Новая версия меню школы (без commit) — кэши всех воркеров устаревают."""
+    _menus.pop(school_id, None)
+    db.session.execute(update(School).where(School.id == school_id)
+                       .values(menu_version=School.menu_version + 1))
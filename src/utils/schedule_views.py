@@ -0,0 +1,77 @@
+"""
+Готовые сетки для страниц просмотра (/teacher, /group, /room).
+
+При сохранении расписания школа целиком пересобирается одним запросом с join-ами:
+каждому учителю, классу и кабинету — строка ScheduleView с компактным списком ячеек
+[день, урок, предмет, учитель, класс, кабинет]. Страница читает одну строку по
+уникальному индексу (kind, owner_id) — время ответа не зависит от размера школы.
+
+Сетки пересобираются вместе с расписанием (SchoolScheduler._save_schedule) и после правок
+в админке; удаляются вместе с расписанием (delete_school_schedule).
+"""
+from sqlalchemy import insert
+
+from src.extensions import db
+from src.models.enums import SubgroupType
+from src.models.schedule import ScheduleEntry, ScheduleView, StudentGroup, TimeSlot, Workload
+from src.models.school import Room, Subject, Teacher
+
+KINDS = {'teacher': Teacher, 'group': StudentGroup, 'room': Room}
+SUBGROUP_SUFFIX = {SubgroupType.GROUP_1: " (Гр. 1)", SubgroupType.GROUP_2: " (Гр. 2)"}
+
+
+def materialize_views(school_id):
+    """Пересобирает сетки всех учителей, классов и кабинетов школы (без commit). Возвращает число сеток."""
+    rows = db.session.query(TimeSlot.day_of_week, TimeSlot.period_number, Subject.name, Workload.subgroup,
+                            Workload.teacher_id, Teacher.name, Workload.group_id, StudentGroup.name,
+                            ScheduleEntry.room_id, Room.name) \
+        .select_from(ScheduleEntry) \
+        .join(Workload, Workload.id == ScheduleEntry.workload_id) \
+        .join(TimeSlot, TimeSlot.id == ScheduleEntry.timeslot_id) \
+        .join(Subject, Subject.id == Workload.subject_id) \
+        .join(Teacher, Teacher.id == Workload.teacher_id) \
+        .join(StudentGroup, StudentGroup.id == Workload.group_id) \
+        .outerjoin(Room, Room.id == ScheduleEntry.room_id) \
+        .filter(Workload.school_id == school_id) \
+        .order_by(TimeSlot.day_of_week, TimeSlot.period_number, ScheduleEntry.id).all()
+
+    # Строка есть у каждого учителя / класса / кабинета школы, даже без уроков (пустая неделя)
+    views = {}
+    for kind, model in KINDS.items():
+        for owner_id, name in db.session.query(model.id, model.name).filter(model.school_id == school_id):
+            views[(kind, owner_id)] = {"school_id": school_id, "kind": kind, "owner_id": owner_id,
+                                       "title": name, "cells": []}
+
+    for day, period, subject, subgroup, teacher_id, teacher, group_id, group, room_id, room in rows:
+        cell = [day, period, subject + SUBGROUP_SUFFIX.get(subgroup, ""), teacher, group, room or "?"]
+        for key in (('teacher', teacher_id), ('group', group_id), ('room', room_id)):
+            if key in views:
+                views[key]["cells"].append(cell)
+
+    db.session.query(ScheduleView).filter(ScheduleView.school_id == school_id) \
+        .delete(synchronize_session=False)
+    if views:
+        db.session.execute(insert(ScheduleView), list(views.values()))
+    return len(views)
+
+
+def load_view(kind, owner_id):
+    """
+    Сетка для страницы: (школа, заголовок, {(день, урок): [урок, ...]}) — одна строка по индексу.
+    Если сеток еще нет (база до миграции, правка мимо приложения) — школа собирается один раз.
+    None — владельца нет.
+    """
+    view = ScheduleView.query.filter_by(kind=kind, owner_id=owner_id).first()
+    if view is None:
+        owner = db.session.get(KINDS[kind], owner_id)
+        if owner is None:
+            return None
+        materialize_views(owner.school_id)
+        db.session.commit()
+        view = ScheduleView.query.filter_by(kind=kind, owner_id=owner_id).first()
+
+    grid = {}
+    for day, period, subject, teacher, group, room in view.cells:
+        grid.setdefault((day, period), []).append(
+            {"subject": subject, "teacher": teacher, "group": group, "room": room})
+    return view.school_id, view.title, grid
@@ -0,0 +1,84 @@
+"""
+Отпечаток задачи для кэша: меняется вместе с любым входом расчета и не зависит от id в БД.
+"""
+import copy
+from dataclasses import replace
+
+import pytest
+
+from src.scripts.benchmark_build import make_school
+from src.solver.cache import fingerprint
+from src.solver.rules import compile_rules
+from src.solver.snapshot import ProblemSnapshot
+from src.utils.constraints_config import GLOBAL_CONSTRAINTS
+
+
+@pytest.fixture(scope="module")
+def snap():
+    return ProblemSnapshot.from_objects(0, *make_school(11))
+
+
+def _with_rules(snap, rules):
+    return replace(snap, rules=compile_rules(rules, snap.subject_ids, snap.subject_names))
+
+
+def test_same_problem_same_fingerprint(snap):
+    assert fingerprint(snap) == fingerprint(replace(snap, w_hours=snap.w_hours.copy()))
+
+
+def test_database_ids_do_not_matter(snap):
+    # Повторный импорт: те же данные под новыми id (порядок тот же)
+    shift = 1000
+    reimported = replace(snap, school_id=snap.school_id + 1, workload_ids=snap.workload_ids + shift,
+                         teacher_ids=snap.teacher_ids + shift, w_teacher=snap.w_teacher + shift,
+                         group_ids=snap.group_ids + shift, w_group=snap.w_group + shift,
+                         slot_ids=snap.slot_ids + shift, room_ids=snap.room_ids + shift)
+    assert fingerprint(reimported) == fingerprint(snap)
+
+
+def test_workload_changes_fingerprint(snap):
+    hours = snap.w_hours.copy()
+    hours[0] += 1
+    assert fingerprint(replace(snap, w_hours=hours)) != fingerprint(snap)
+
+
+@pytest.mark.parametrize("field, value", [
+    ("max_value", 3),
+    ("subjects", ["Фізика"]),
+])
+def test_rule_changes_fingerprint(snap, field, value):
+    rules = copy.deepcopy(GLOBAL_CONSTRAINTS)
+    rules[0][field] = value
+    assert fingerprint(_with_rules(snap, rules)) != fingerprint(_with_rules(snap, GLOBAL_CONSTRAINTS))
+
+
+def test_rule_bonus_and_periods_change_fingerprint(snap):
+    base = fingerprint(_with_rules(snap, GLOBAL_CONSTRAINTS))
+    for field, value in (("bonus", 1000), ("preferred_periods", [1, 2])):
+        rules = copy.deepcopy(GLOBAL_CONSTRAINTS)
+        rules[2][field] = value
+        assert fingerprint(_with_rules(snap, rules)) != base
+
+
+def test_disabled_rule_changes_fingerprint(snap):
+    assert fingerprint(_with_rules(snap, GLOBAL_CONSTRAINTS[1:])) != fingerprint(snap)
+
+
+def test_blocked_slots_change_fingerprint(snap):
+    teacher, slot = snap.teacher_ids[0].item(), snap.slot_ids[0].item()
+    other = snap.slot_ids[1].item()
+    base = fingerprint(snap)
+    blocked = fingerprint(snap, blocked_slots={(teacher, slot)})
+    assert blocked != base
+    assert fingerprint(snap, blocked_slots={(teacher, other)}) != blocked
+
+
+def test_room_limits_change_fingerprint(snap):
+    rt, slot = int(snap.room_type[0]), snap.slot_ids[0].item()
+    one = fingerprint(snap, room_limits={(rt, slot): 1})
+    assert one != fingerprint(snap)
+    assert fingerprint(snap, room_limits={(rt, slot): 2}) != one
+
+
+def test_variant_changes_fingerprint(snap):
+    assert len({fingerprint(snap, variant=v) for v in ("bool", "interval:0", "interval:1")}) == 3
@@ -0,0 +1,111 @@
+"""
+Декомпозиция: деление лимита перестановок, резервы общих учителей и кабинетов, упаковка частей.
+"""
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from src.scripts.benchmark_build import make_school
+from src.solver.decomposition import find_components, pack_components, reserve_shared_resources, split_budget
+from src.solver.presolve import shift_windows
+from src.solver.snapshot import ProblemSnapshot
+
+
+@pytest.fixture(scope="module")
+def snap():
+    # 11 классов в две смены: части "shift" делят учителей и кабинеты
+    return ProblemSnapshot.from_objects(0, *make_school(11))
+
+
+@pytest.mark.parametrize("total, weights", [
+    (5, [600, 528]),
+    (7, [1, 1, 1]),
+    (3, [10, 0, 1]),
+    (0, [3, 4]),
+    (100, [1, 2, 3, 5, 7, 11]),
+])
+def test_split_budget_sums_to_total(total, weights):
+    budget = split_budget(total, weights)
+
+    assert sum(budget) == total
+    assert all(b >= 0 for b in budget)
+    for b, w in zip(budget, weights):
+        assert abs(b - total * w / sum(weights)) < 1  # доля — округление пропорции
+        if not w:
+            assert b == 0
+
+
+def test_split_budget_without_hints():
+    assert split_budget(5, [0, 0]) == [0, 0]
+
+
+def _slot_users(snap, parts, shifts_of_part):
+    """Слот -> части, чьи смены (из shifts_of_part) его покрывают."""
+    windows = shift_windows(snap)
+    users = defaultdict(list)
+    for j, period in enumerate(snap.slot_period.tolist()):
+        for p in range(len(parts)):
+            if any(windows[sh][0] <= period <= windows[sh][1] for sh in shifts_of_part[p]):
+                users[snap.slot_ids[j].item()].append(p)
+    return users
+
+
+def test_shared_teacher_slot_goes_to_one_part(snap):
+    parts = find_components(snap, "shift")
+    reservations = reserve_shared_resources(snap, parts)
+    vacancy = dict(zip(snap.teacher_ids.tolist(), snap.teacher_is_vacancy.tolist()))
+
+    shifts = defaultdict(lambda: defaultdict(set))  # teacher_id -> part -> {shift}
+    for p, positions in enumerate(parts):
+        for i in positions.tolist():
+            t_id = int(snap.w_teacher[i])
+            if not vacancy.get(t_id):
+                shifts[t_id][p].add(int(snap.w_shift[i]))
+
+    shared_slots = 0
+    for t_id, by_part in shifts.items():
+        if len(by_part) < 2:
+            continue
+        users = _slot_users(snap, parts, {p: by_part.get(p, set()) for p in range(len(parts))})
+        for s_id, owners in users.items():
+            if len(owners) < 2:
+                continue
+            free = [p for p in owners if (t_id, s_id) not in reservations[p][0]]
+            assert len(free) == 1, (t_id, s_id, free)
+            shared_slots += 1
+    assert shared_slots  # проверка не пустая: общие учителя есть
+
+
+def test_shared_room_limits_sum_to_capacity(snap):
+    parts = find_components(snap, "shift")
+    reservations = reserve_shared_resources(snap, parts)
+    capacities = snap.room_capacities()
+
+    limits = defaultdict(list)  # (rt, slot_id) -> [доля части]
+    for _, room_limits in reservations:
+        for key, n in room_limits.items():
+            limits[key].append(n)
+
+    assert limits
+    for (rt, _), shares in limits.items():
+        assert len(shares) >= 2
+        assert all(n >= 0 for n in shares)
+        assert sum(shares) == int(capacities[rt])
+
+
+def test_pack_components_keeps_every_workload():
+    hours = np.array([5, 1, 1, 3, 2, 4, 1, 2])
+    components = [np.array([0]), np.array([1, 2]), np.array([3]), np.array([4, 5]), np.array([6, 7])]
+
+    packed = pack_components(components, hours, 2)
+
+    assert len(packed) == 2
+    assert sorted(np.concatenate(packed).tolist()) == list(range(len(hours)))
+    loads = [int(hours[p].sum()) for p in packed]
+    assert max(loads) - min(loads) <= hours.max()
+
+
+def test_pack_components_leaves_few_components_alone():
+    components = [np.array([0, 1]), np.array([2])]
+    assert pack_components(components, np.ones(3), 4) is components
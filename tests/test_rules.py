@@ -0,0 +1,59 @@
+"""
+Правила школы: проверка перед записью (validate_rule) и компиляция в id предметов.
+"""
+import pytest
+
+from src.solver.rules import MAX_PERIOD, CompiledRule, compile_rules, validate_rule
+from src.utils.constraints_config import ConstraintType
+
+LIMIT = {"type": "max_per_day", "subjects": ["Фізика"], "max_value": 2}
+PRIORITY = {"type": "period_priority", "subjects": ["Математика"], "preferred_periods": [1, 2], "bonus": 100}
+
+
+@pytest.mark.parametrize("rule", [
+    {**LIMIT, "type": "no_such_rule"},
+    {**LIMIT, "type": None},
+    {**LIMIT, "subjects": []},
+    {**LIMIT, "subjects": "Фізика"},
+    {**LIMIT, "subjects": ["Фізика", "  "]},
+    {**LIMIT, "subjects": [1]},
+    {**LIMIT, "max_value": 0},
+    {**LIMIT, "max_value": MAX_PERIOD + 1},
+    {**LIMIT, "max_value": "2"},
+    {**LIMIT, "max_value": True},
+    {k: v for k, v in LIMIT.items() if k != "max_value"},
+    {**PRIORITY, "preferred_periods": []},
+    {**PRIORITY, "preferred_periods": [0]},
+    {**PRIORITY, "preferred_periods": [MAX_PERIOD + 1]},
+    {**PRIORITY, "preferred_periods": ["1"]},
+    {**PRIORITY, "bonus": 0},
+    {**PRIORITY, "bonus": -5},
+    {**PRIORITY, "bonus": True},
+])
+def test_invalid_rule_rejected(rule):
+    with pytest.raises(ValueError):
+        validate_rule(rule)
+
+
+def test_valid_rules_normalized():
+    limit = validate_rule({**LIMIT, "type": ConstraintType.MAX_PER_DAY, "subjects": [" Фізика", "Фізика", "Хімія"]})
+    assert limit == {"type": ConstraintType.MAX_PER_DAY, "subjects": ["Фізика", "Хімія"], "max_value": 2}
+
+    priority = validate_rule({**PRIORITY, "preferred_periods": [3, 1, 3]})
+    assert priority["type"] == ConstraintType.PERIOD_PRIORITY
+    assert priority["preferred_periods"] == [1, 3]
+    assert priority["bonus"] == 100
+
+
+def test_compile_maps_names_to_ids():
+    rules = compile_rules([{**LIMIT, "subjects": ["Хімія", "Фізика", "Нет такого"]}, PRIORITY],
+                          subject_ids=[10, 20, 30], subject_names=["Фізика", "Хімія", "Математика"])
+    assert rules == (
+        CompiledRule(ConstraintType.MAX_PER_DAY, subject_ids=(10, 20), max_value=2),
+        CompiledRule(ConstraintType.PERIOD_PRIORITY, subject_ids=(30,), preferred_periods=(1, 2), bonus=100),
+    )
+
+
+def test_compile_rejects_invalid_rule():
+    with pytest.raises(ValueError):
+        compile_rules([{**LIMIT, "max_value": 0}], [10], ["Фізика"])
@@ -0,0 +1,47 @@
+"""
+Двухфазное решение: если оптимизации (фаза 2) не хватило времени, остается расписание фазы 1.
+"""
+import pytest
+from ortools.sat.python import cp_model
+
+from src.scripts.benchmark_build import make_school
+from src.solver.engines import get_engine
+from src.solver.progress import ProgressCallback
+from src.solver.snapshot import ProblemSnapshot
+
+
+def _scheduler(engine, phase2_budget):
+    snap = ProblemSnapshot.from_objects(0, *make_school(11))
+    scheduler = get_engine(engine)(school_id=0, profile="draft")
+    params = scheduler.solver.parameters
+    params.num_search_workers = 1
+    params.max_time_in_seconds = 30
+    scheduler.build_model(snap)
+    scheduler.progress = ProgressCallback(scheduler.time_vars, verbose=False, decode=scheduler.lessons)
+
+    # Фаза 1 отрабатывает как есть, фазе 2 остается почти ничего
+    feasibility_phase = scheduler._feasibility_phase
+
+    def short_phase2():
+        status = feasibility_phase()
+        params.max_time_in_seconds = phase2_budget
+        return status
+
+    scheduler._feasibility_phase = short_phase2
+    return snap, scheduler
+
+
+@pytest.mark.parametrize("engine", ["bool", "interval"])
+@pytest.mark.parametrize("phase2_budget", [0.0, 0.001])
+def test_phase1_schedule_survives_short_phase2(engine, phase2_budget):
+    snap, scheduler = _scheduler(engine, phase2_budget)
+
+    status = scheduler._solve_with_watchdog()
+
+    assert scheduler.telemetry.stats["feasibility_phase"]["status"] in ("OPTIMAL", "FEASIBLE")
+    assert status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    if phase2_budget == 0.0:
+        assert scheduler.from_feasibility
+    active = scheduler.active_lessons()
+    assert len(active) == int(snap.w_hours.sum())
+    assert scheduler.progress.best == active
@@ -0,0 +1,46 @@
+"""
+Теплый старт при нескольких потоках CP-SAT.
+
+repair_hint в OR-Tools 9.15 с num_search_workers > 1 роняет процесс (abort, не исключение),
+поэтому расчет идет в отдельном процессе: падение видно по коду выхода.
+"""
+import multiprocessing
+
+from src.scripts.benchmark_build import make_school
+from src.solver.heuristic import heuristic_hints
+from src.solver.snapshot import ProblemSnapshot
+
+WORKERS = 4
+
+
+def _snapshot():
+    return ProblemSnapshot.from_objects(0, *make_school(11))
+
+
+def _warm_solve(hints, result):
+    from src.solver.engine import SchoolScheduler
+
+    scheduler = SchoolScheduler(school_id=0, profile="draft")
+    scheduler.solver.parameters.num_search_workers = WORKERS
+    scheduler.solver.parameters.max_time_in_seconds = 10
+    scheduler.solver.parameters.log_search_progress = False
+    scheduler.build_model(_snapshot(), hints)
+    scheduler.apply_hints(hints, max_changes=5)
+    status = scheduler.solver.Solve(scheduler.model)
+    result.put((bool(scheduler.solver.parameters.repair_hint), scheduler.solver.StatusName(status)))
+
+
+def test_warm_start_with_several_workers():
+    hints = heuristic_hints(_snapshot(), time_limit=2)
+    assert hints
+
+    ctx = multiprocessing.get_context("spawn")
+    result = ctx.Queue()
+    proc = ctx.Process(target=_warm_solve, args=(hints, result))
+    proc.start()
+    proc.join(120)
+
+    assert proc.exitcode == 0
+    repair_hint, status = result.get(timeout=1)
+    assert not repair_hint
+    assert status in ("OPTIMAL", "FEASIBLE")